@@ -1,4 +1,9 @@
+import asyncio
+
 from .main import main
 
 if __name__ == "__main__":
-    main()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nBot stopped by user")
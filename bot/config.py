@@ -4,6 +4,7 @@
 
 from dotenv import load_dotenv
 import os
+import secrets
 
 load_dotenv()
 
@@ -15,8 +16,118 @@ def _to_int(env_key: str):
     val = os.getenv(env_key)
     return int(val) if val and val.strip() else None
 
+def _to_bool(env_key: str, default: bool = False) -> bool:
+    val = os.getenv(env_key)
+    if val is None or not val.strip():
+        return default
+    return val.strip().lower() in ("1", "true", "yes", "on")
+
+def _to_float(env_key: str, default: float) -> float:
+    val = os.getenv(env_key)
+    return float(val) if val and val.strip() else default
+
 ARCHIVE_CHANNEL_ID = _to_int("ARCHIVE_CHANNEL_ID")
 GROUP_ID = _to_int("GROUP_ID")
 
 _admin = os.getenv("ADMIN_USER_IDS", "")
 ADMIN_USER_IDS = [int(x) for x in _admin.split(",") if x.strip().isdigit()]
+
+# إعدادات قاعدة البيانات:
+# DB_READ_POOL_SIZE > 0 يفعّل وضع WAL مع اتصالات قراءة متوازية واتصال كتابة واحد
+DB_READ_POOL_SIZE = _to_int("DB_READ_POOL_SIZE") or 0
+DB_MMAP_SIZE = _to_int("DB_MMAP_SIZE")
+DB_CACHE_SIZE = _to_int("DB_CACHE_SIZE")
+# طابور الكتابة (bot/db/write_queue.py): كاتب واحد يجمع الكتابات ويثبّتها بـ commit واحد
+# كل WRITE_BATCH_DELAY_MS ملّي ثانية أو كل WRITE_BATCH_MAX عملية
+WRITE_QUEUE_ENABLED = _to_bool("WRITE_QUEUE_ENABLED", True)
+WRITE_BATCH_MAX = _to_int("WRITE_BATCH_MAX") or 64
+WRITE_BATCH_DELAY_MS = _to_float("WRITE_BATCH_DELAY_MS", 5.0)
+# قياس زمن كل استعلام في Database مجمّعًا حسب الدالة العامة (العدد، الصفوف، p50/p95/p99) وسجل الاستعلامات البطيئة:
+# ما يتجاوز SLOW_QUERY_MS يُسجَّل مع EXPLAIN QUERY PLAN (وفي SLOW_QUERY_LOG إن حُدد ملف).
+# مفعّل افتراضيًا؛ كلفته نحو 1–2% من زمن الشاشات (scripts/bench_query_stats.py)
+QUERY_STATS_ENABLED = _to_bool("QUERY_STATS_ENABLED", True)
+SLOW_QUERY_MS = _to_float("SLOW_QUERY_MS", 100.0)
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG") or None
+
+# نسخة الكتالوج في الذاكرة: تجيب كل قراءات التنقل دون SQLite
+# وتُعاد بناؤها عند تغيّر PRAGMA data_version (يُفحص كل CATALOG_POLL_SECONDS،
+# وبدون الكتالوج يُفحص بنفس الفترة لإبطال ذاكرة الشاشات عند كتابات العمليات الأخرى)
+CATALOG_ENABLED = _to_bool("CATALOG_ENABLED")
+CATALOG_POLL_SECONDS = _to_float("CATALOG_POLL_SECONDS", 5.0)
+
+# واجهة التنقل: "reply" (لوحة المفاتيح السفلية، الافتراضي) أو "inline"
+# (أزرار مضمّنة تُعدَّل فيها رسالة التنقل نفسها بدل إرسال رسالة لكل خطوة)
+UI_MODE = (os.getenv("UI_MODE") or "reply").strip().lower()
+if UI_MODE not in ("reply", "inline"):
+    raise RuntimeError(f"UI_MODE must be 'reply' or 'inline', got {UI_MODE!r}")
+
+# ذاكرة الشاشات المبنية (نص + لوحة) للشاشات المتكررة؛ 0 يعطّلها
+RENDER_CACHE_SIZE = _to_int("RENDER_CACHE_SIZE")
+if RENDER_CACHE_SIZE is None:
+    RENDER_CACHE_SIZE = 512
+
+# حفظ حالة التنقل لكل مستخدم في SQLite (ملف منفصل عن الأرشيف) لتبقى بعد إعادة التشغيل:
+# تُكتب المتغيرات كل NAV_FLUSH_SECONDS في معاملة واحدة، وتُحمّل لكل مستخدم عند أول تواصل
+NAV_PERSISTENCE = _to_bool("NAV_PERSISTENCE", True)
+STATE_DB_PATH = os.getenv("STATE_DB_PATH") or "database/state.db"
+NAV_FLUSH_SECONDS = _to_float("NAV_FLUSH_SECONDS", 10.0)
+
+# عدد التحديثات التي تُعالج في نفس الوقت (لمستخدمين مختلفين؛ تحديثات المستخدم الواحد تبقى بالترتيب)
+# 1 يعيد المعالجة التسلسلية (تحديث واحد في كل مرة)
+MAX_CONCURRENT_UPDATES = _to_int("MAX_CONCURRENT_UPDATES") or 32
+
+# إخراج المستخدمين الخاملين من الذاكرة (حالة التنقل + مفتاح المحادثة)، يُفحص كل EVICTION_SWEEP_SECONDS:
+# - IDLE_TTL_SECONDS: من لم يتفاعل خلالها يُخرج (0 يعطّل)
+# - MAX_RESIDENT_USERS: حد أعلى للمقيمين في الذاكرة، يُخرج الأقدم نشاطًا أولًا (0 بلا حد)
+# مع NAV_PERSISTENCE تُحفظ الحالة قبل الإخراج وتُستعاد عند أول رسالة تالية
+IDLE_TTL_SECONDS = _to_float("IDLE_TTL_SECONDS", 1800.0)
+MAX_RESIDENT_USERS = _to_int("MAX_RESIDENT_USERS") or 0
+EVICTION_SWEEP_SECONDS = _to_float("EVICTION_SWEEP_SECONDS", 60.0)
+
+# استقبال التحديثات: "polling" (الافتراضي) أو "webhook" (خادم PTB؛ يتطلب python-telegram-bot[webhooks])
+UPDATE_MODE = (os.getenv("UPDATE_MODE") or "polling").strip().lower()
+if UPDATE_MODE not in ("polling", "webhook"):
+    raise RuntimeError(f"UPDATE_MODE must be 'polling' or 'webhook', got {UPDATE_MODE!r}")
+
+# إعدادات الـ webhook:
+# - WEBHOOK_URL: العنوان العام الذي يرسل إليه Telegram (https://bot.example.com)، يُضاف إليه WEBHOOK_PATH
+# - WEBHOOK_PATH / WEBHOOK_SECRET: مسار سري + ترويسة X-Telegram-Bot-Api-Secret-Token؛
+#   إن لم يُحددا يُولّدان عشوائيًا عند كل تشغيل (setWebhook يُستدعى عند كل تشغيل أصلًا)
+# - WEBHOOK_CERT/WEBHOOK_KEY: إن أُعطيا يخدم البوت TLS بنفسه؛ وإلا يُفترض أن TLS ينتهي عند
+#   وكيل عكسي (nginx/caddy) يمرر الطلبات إلى WEBHOOK_LISTEN:WEBHOOK_PORT عبر http
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN") or "127.0.0.1"
+WEBHOOK_PORT = _to_int("WEBHOOK_PORT") or 8443
+WEBHOOK_URL = (os.getenv("WEBHOOK_URL") or "").rstrip("/")
+WEBHOOK_PATH = (os.getenv("WEBHOOK_PATH") or secrets.token_urlsafe(24)).strip("/")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or secrets.token_urlsafe(32)
+WEBHOOK_MAX_CONNECTIONS = _to_int("WEBHOOK_MAX_CONNECTIONS")
+if WEBHOOK_MAX_CONNECTIONS is None:
+    # لا نستخدم "or 40": القيمة 0 خاطئة ويجب أن تُرفض لا أن تُستبدل
+    WEBHOOK_MAX_CONNECTIONS = 40
+WEBHOOK_CERT = os.getenv("WEBHOOK_CERT") or None
+WEBHOOK_KEY = os.getenv("WEBHOOK_KEY") or None
+if UPDATE_MODE == "webhook" and not WEBHOOK_URL:
+    raise RuntimeError("WEBHOOK_URL is required when UPDATE_MODE=webhook")
+if not 1 <= WEBHOOK_MAX_CONNECTIONS <= 100:
+    raise RuntimeError("WEBHOOK_MAX_CONNECTIONS must be between 1 and 100")
+
+# عنوان Bot API بديل (خادم telegram-bot-api محلي، أو scripts/fake_bot_api.py للقياس)؛ يُضاف إليه التوكن
+BOT_API_BASE_URL = os.getenv("BOT_API_BASE_URL") or None
+
+# البحث المضمّن (@bot ...): مدة صلاحية النتائج في ذاكرة البوت وفي Telegram (cache_time)، وحجم الذاكرة
+INLINE_CACHE_SECONDS = _to_float("INLINE_CACHE_SECONDS", 300.0)
+INLINE_CACHE_SIZE = _to_int("INLINE_CACHE_SIZE")
+if INLINE_CACHE_SIZE is None:
+    INLINE_CACHE_SIZE = 1024
+
+# جدولة الطلبات الصادرة (bot/rate_limiter.py): دلو رموز عام ودلو لكل مجموعة، وردود التنقل قبل تسليم المواد
+# - RATE_LIMIT_GLOBAL: رسائل/ث لكل البوت؛ RATE_LIMIT_GROUP: رسائل/ث لكل مجموعة (ومنها GROUP_ID)
+# - RATE_LIMIT_PRIVATE: رسائل/ث لكل محادثة خاصة (0 بلا حد)
+# - RATE_LIMIT_MAX_RETRIES: مرات إعادة الطلب بعد RetryAfter
+RATE_LIMIT_ENABLED = _to_bool("RATE_LIMIT_ENABLED", True)
+RATE_LIMIT_GLOBAL = _to_float("RATE_LIMIT_GLOBAL", 30.0)
+RATE_LIMIT_GROUP = _to_float("RATE_LIMIT_GROUP", 1.0)
+RATE_LIMIT_PRIVATE = _to_float("RATE_LIMIT_PRIVATE", 0.0)
+RATE_LIMIT_MAX_RETRIES = _to_int("RATE_LIMIT_MAX_RETRIES")
+if RATE_LIMIT_MAX_RETRIES is None:
+    RATE_LIMIT_MAX_RETRIES = 3
@@ -1,9 +1,11 @@
 """Conversation states and helpers."""
 
+from .helpers import nav_top
+
 # حالة الحوار ممثلة بأرقام ثابتة مفهومة لـ ConversationHandler
 # نستخدم أرقامًا بسيطة بدل Enum ليتوافق مباشرة مع متطلبات المكتبة.
 
-LEVEL, TERM_LIST, TERM, SUBJECT_LIST, SECTION, YEAR, LECTURER, YEAR_LIST, LECTURER_LIST, LECTURE_LIST, YEAR_CATEGORY_MENU, LECTURE_CATEGORY_MENU = range(12)
+LEVEL, TERM_LIST, TERM, SUBJECT_LIST, SECTION, YEAR, LECTURER, YEAR_LIST, LECTURER_LIST, LECTURE_LIST, YEAR_CATEGORY_MENU, LECTURE_CATEGORY_MENU, SEARCH = range(13)
 
 # خريطة من نوع العقدة في نظام التنقل القديم إلى الحالة المكافئة في ConversationHandler
 NODE_TO_STATE = {
@@ -21,6 +23,7 @@ NODE_TO_STATE = {
     "lecture_list": LECTURE_LIST,
     "year_category_menu": YEAR_CATEGORY_MENU,
     "lecture_category_menu": LECTURE_CATEGORY_MENU,
+    "search": SEARCH,
 }
 
 # قائمة بجميع الحالات لتعريفها داخل ConversationHandler
@@ -29,10 +32,8 @@ ALL_STATES = list(set(NODE_TO_STATE.values()))
 
 def get_state(user_data: dict) -> int:
     """يستخرج الحالة الحالية من بيانات المستخدم بناءً على أعلى عنصر في المكدس."""
-    nav = user_data.get("nav", {})
-    stack = nav.get("stack", [])
-    if not stack:
+    top_type = nav_top(user_data)
+    if top_type is None:
         # الحالة الافتراضية: اختيار المستوى
         return LEVEL
-    top_type = stack[-1][0]
     return NODE_TO_STATE.get(top_type, LEVEL)
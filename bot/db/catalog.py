@@ -0,0 +1,521 @@
+"""In-memory snapshot of the archive catalog.
+
+The navigation hierarchy (levels → terms → subjects → sections → years /
+lecturers → titles → categories) is small, so it can be held in memory and
+every read method of :class:`~bot.db.connection.Database` can be answered
+without touching SQLite.
+
+:class:`CatalogSnapshot` is immutable: it is built once from a consistent read
+transaction and never modified. :class:`Catalog` owns the current snapshot and
+swaps in a freshly built one when ``PRAGMA data_version`` (commits from any
+other connection) or the database's own change counter shows that the file
+was modified. Rebuilding happens in a worker thread, so readers keep using the
+old snapshot until the new one is complete.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import sys
+import time
+from typing import Any, Iterable
+
+import aiosqlite
+
+from ..models import (
+    Subject,
+    Lecturer,
+    Material,
+    SectionSnapshot,
+    YearMenuSnapshot,
+    LecturerSnapshot,
+    SubjectPath,
+)
+from .connection import LECTURE_ATTACHMENT_CATEGORIES
+
+
+logger = logging.getLogger(__name__)
+
+_ATTACHMENTS = frozenset(LECTURE_ATTACHMENT_CATEGORIES)
+
+# Material row layout inside a snapshot group.
+_ID, _CATEGORY, _TITLE, _URL, _YEAR, _LECTURER, _ARCHIVE_CHAT, _ARCHIVE_MESSAGE = range(8)
+
+
+def _deep_sizeof(obj: Any) -> int:
+    """Approximate memory footprint of nested built-in containers."""
+
+    seen: set[int] = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (tuple, list, set, frozenset)):
+            stack.extend(o)
+    return total
+
+
+def _unique(values: Iterable) -> list:
+    """Distinct values in first-seen order (``SELECT DISTINCT`` semantics)."""
+
+    return list(dict.fromkeys(values))
+
+
+class CatalogSnapshot:
+    """Immutable copy of the catalog answering the ``Database`` read API.
+
+    Methods have the same names, arguments and return types as their
+    ``Database`` counterparts but are synchronous.
+    """
+
+    __slots__ = (
+        "data_version",
+        "_levels",
+        "_level_ids",
+        "_terms",
+        "_term_ids",
+        "_subjects",
+        "_subjects_by_scope",
+        "_years",
+        "_year_ids",
+        "_lecturers",
+        "_lecturer_ids",
+        "_sections",
+        "_materials",
+    )
+
+    def __init__(self, conn: sqlite3.Connection, data_version: int = 0) -> None:
+        intern = sys.intern
+        self.data_version = data_version
+
+        self._levels = tuple(conn.execute("SELECT id, name FROM levels ORDER BY id"))
+        self._level_ids = {name: _id for _id, name in self._levels}
+        self._terms = dict(conn.execute("SELECT id, name FROM terms ORDER BY id"))
+        self._term_ids = {name: _id for _id, name in self._terms.items()}
+        self._years = dict(conn.execute("SELECT id, name FROM years ORDER BY id"))
+        self._year_ids = {name: _id for _id, name in self._years.items()}
+        self._lecturers = {
+            _id: (name, role)
+            for _id, name, role in conn.execute("SELECT id, name, role FROM lecturers ORDER BY id")
+        }
+        self._lecturer_ids = {name: _id for _id, (name, _role) in self._lecturers.items()}
+
+        self._subjects: dict[int, tuple[str, str, int, int]] = {}
+        by_scope: dict[tuple[int, int], list[int]] = {}
+        for _id, code, name, level_id, term_id in conn.execute(
+            "SELECT id, code, name, level_id, term_id FROM subjects ORDER BY id"
+        ):
+            self._subjects[_id] = (code, name, level_id, term_id)
+            by_scope.setdefault((level_id, term_id), []).append(_id)
+        self._subjects_by_scope = {k: tuple(v) for k, v in by_scope.items()}
+
+        groups: dict[tuple[int, str], list[tuple]] = {}
+        for subject_id, section, *row in conn.execute(
+            """
+            SELECT subject_id, section, id, category, title, url, year_id, lecturer_id,
+                   archive_chat_id, archive_message_id
+            FROM materials ORDER BY subject_id, section, id
+            """
+        ):
+            row[_CATEGORY] = intern(row[_CATEGORY])
+            row[_TITLE] = intern(row[_TITLE])
+            groups.setdefault((subject_id, intern(section)), []).append(tuple(row))
+        self._materials = {k: tuple(v) for k, v in groups.items()}
+        sections: dict[int, list[str]] = {}
+        for subject_id, section in self._materials:
+            sections.setdefault(subject_id, []).append(section)
+        self._sections = {k: tuple(sorted(v)) for k, v in sections.items()}
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+    @property
+    def material_count(self) -> int:
+        return sum(len(rows) for rows in self._materials.values())
+
+    def footprint(self) -> int:
+        """Approximate number of bytes held by the snapshot."""
+
+        return _deep_sizeof([getattr(self, slot) for slot in self.__slots__])
+
+    def _rows(self, subject_id: int, section: str, **filters) -> Iterable[tuple]:
+        rows = self._materials.get((subject_id, section), ())
+        year_id = filters.get("year_id")
+        lecturer_id = filters.get("lecturer_id")
+        title = filters.get("title")
+        category = filters.get("category")
+        for row in rows:
+            if year_id is not None and row[_YEAR] != year_id:
+                continue
+            if lecturer_id is not None and row[_LECTURER] != lecturer_id:
+                continue
+            if title is not None and row[_TITLE] != title:
+                continue
+            if category is not None and row[_CATEGORY] != category:
+                continue
+            yield row
+
+    # ------------------------------------------------------------------
+    # Basic reads (levels / terms / subjects)
+    # ------------------------------------------------------------------
+    def get_levels(self):
+        return list(self._levels)
+
+    def get_level_id_by_name(self, name: str) -> int | None:
+        return self._level_ids.get(name)
+
+    def get_term_id_by_name(self, name: str) -> int | None:
+        return self._term_ids.get(name)
+
+    def get_year_id_by_name(self, name: str) -> int | None:
+        return self._year_ids.get(name)
+
+    def get_lecturer_id_by_name(self, name: str) -> int | None:
+        return self._lecturer_ids.get(name)
+
+    def get_terms_by_level(self, level_id: int):
+        term_ids = sorted({t for (lvl, t) in self._subjects_by_scope if lvl == level_id})
+        return [(t, self._terms[t]) for t in term_ids if t in self._terms]
+
+    def get_subjects_by_level_and_term(self, level_id: int, term_id: int) -> list[Subject]:
+        return [
+            Subject(id=_id, name=self._subjects[_id][1])
+            for _id in self._subjects_by_scope.get((level_id, term_id), ())
+        ]
+
+    def get_subject_id_by_name(self, level_id: int, term_id: int, subject_name: str) -> int | None:
+        for _id in self._subjects_by_scope.get((level_id, term_id), ()):
+            if self._subjects[_id][1] == subject_name:
+                return _id
+        return None
+
+    def get_subject_path(self, subject_id: int) -> SubjectPath | None:
+        subject = self._subjects.get(subject_id)
+        if subject is None:
+            return None
+        code, name, level_id, term_id = subject
+        level_name = dict(self._levels).get(level_id)
+        term_name = self._terms.get(term_id)
+        if level_name is None or term_name is None:
+            return None
+        return SubjectPath(subject_id, name, code, level_id, level_name, term_id, term_name)
+
+    def get_subjects_for_lecturer(self, lecturer_id: int) -> list[Subject]:
+        subject_ids = {
+            subject_id
+            for (subject_id, _section), rows in self._materials.items()
+            if any(row[_LECTURER] == lecturer_id for row in rows)
+        }
+        return [Subject(id=_id, name=self._subjects[_id][1]) for _id in sorted(subject_ids) if _id in self._subjects]
+
+    def count_subjects(self, level_id: int, term_id: int) -> int:
+        return len(self._subjects_by_scope.get((level_id, term_id), ()))
+
+    def term_feature_flags(self, level_id: int, term_id: int) -> dict:
+        flags: dict[str, bool] = {}
+        for subject_id in self._subjects_by_scope.get((level_id, term_id), ()):
+            for section in self._sections.get(subject_id, ()):
+                flags[section] = True
+        return flags
+
+    def get_available_sections_for_subject(self, subject_id: int) -> list[str]:
+        return list(self._sections.get(subject_id, ()))
+
+    # ------------------------------------------------------------------
+    # Section level reads
+    # ------------------------------------------------------------------
+    def _year_pairs(self, year_ids: Iterable[int | None]):
+        return [(y, self._years[y]) for y in sorted({y for y in year_ids if y is not None}) if y in self._years]
+
+    def get_years_for_subject_section(self, subject_id: int, section: str):
+        return self._year_pairs(row[_YEAR] for row in self._rows(subject_id, section))
+
+    def get_lecturers_for_subject_section(self, subject_id: int, section: str) -> list[Lecturer]:
+        ids = sorted({row[_LECTURER] for row in self._rows(subject_id, section) if row[_LECTURER] is not None})
+        return [Lecturer(id=i, name=self._lecturers[i][0]) for i in ids if i in self._lecturers]
+
+    def has_lecture_category(self, subject_id: int, section: str) -> bool:
+        return any(True for _ in self._rows(subject_id, section, category="lecture"))
+
+    def list_lecture_titles(self, subject_id: int, section: str) -> list[str]:
+        return _unique(row[_TITLE] for row in self._rows(subject_id, section))
+
+    def list_lecture_titles_by_year(self, subject_id: int, section: str, year_id: int) -> list[str]:
+        return _unique(row[_TITLE] for row in self._rows(subject_id, section, year_id=year_id))
+
+    def list_lecture_titles_by_lecturer(self, subject_id: int, section: str, lecturer_id: int) -> list[str]:
+        return _unique(row[_TITLE] for row in self._rows(subject_id, section, lecturer_id=lecturer_id))
+
+    def list_lecture_titles_by_lecturer_year(
+        self, subject_id: int, section: str, lecturer_id: int, year_id: int
+    ) -> list[str]:
+        return _unique(
+            row[_TITLE] for row in self._rows(subject_id, section, lecturer_id=lecturer_id, year_id=year_id)
+        )
+
+    def get_years_for_subject_section_lecturer(self, subject_id: int, section: str, lecturer_id: int):
+        return self._year_pairs(row[_YEAR] for row in self._rows(subject_id, section, lecturer_id=lecturer_id))
+
+    def get_lecture_materials(
+        self,
+        subject_id: int,
+        section: str,
+        *,
+        year_id: int | None = None,
+        lecturer_id: int | None = None,
+        title: str | None = None,
+    ) -> list[Material]:
+        return [
+            Material(
+                id=row[_ID],
+                subject_id=subject_id,
+                section=section,
+                category=row[_CATEGORY],
+                title=row[_TITLE],
+                url=row[_URL],
+                year_id=row[_YEAR],
+                lecturer_id=row[_LECTURER],
+                archive_chat_id=row[_ARCHIVE_CHAT],
+                archive_message_id=row[_ARCHIVE_MESSAGE],
+            )
+            for row in self._rows(
+                subject_id, section, category="lecture", year_id=year_id, lecturer_id=lecturer_id, title=title
+            )
+        ]
+
+    def get_materials_by_category(
+        self,
+        subject_id: int,
+        section: str,
+        category: str,
+        *,
+        year_id: int | None = None,
+        lecturer_id: int | None = None,
+        title: str | None = None,
+    ) -> list[Material]:
+        return [
+            Material(
+                id=row[_ID],
+                subject_id=subject_id,
+                section=section,
+                category=category,
+                title=row[_TITLE],
+                url=row[_URL],
+                year_id=year_id,
+                lecturer_id=lecturer_id,
+                archive_chat_id=row[_ARCHIVE_CHAT],
+                archive_message_id=row[_ARCHIVE_MESSAGE],
+            )
+            for row in self._rows(
+                subject_id, section, category=category, year_id=year_id, lecturer_id=lecturer_id, title=title
+            )
+        ]
+
+    def list_categories_for_subject_section_year(
+        self,
+        subject_id: int,
+        section: str,
+        year_id: int,
+        lecturer_id: int | None = None,
+    ) -> list[str]:
+        return _unique(
+            row[_CATEGORY]
+            for row in self._rows(subject_id, section, year_id=year_id, lecturer_id=lecturer_id)
+            if row[_CATEGORY] != "lecture" and row[_CATEGORY] not in _ATTACHMENTS
+        )
+
+    def list_categories_for_lecture(
+        self,
+        subject_id: int,
+        section: str,
+        title: str,
+        year_id: int | None = None,
+        lecturer_id: int | None = None,
+    ) -> list[str]:
+        return _unique(
+            row[_CATEGORY]
+            for row in self._rows(subject_id, section, title=title, year_id=year_id, lecturer_id=lecturer_id)
+        )
+
+    # ------------------------------------------------------------------
+    # Screen snapshots
+    # ------------------------------------------------------------------
+    def get_section_snapshot(self, subject_id: int, section: str) -> SectionSnapshot:
+        return SectionSnapshot(
+            years=self.get_years_for_subject_section(subject_id, section),
+            lecturers=self.get_lecturers_for_subject_section(subject_id, section),
+            categories={row[_CATEGORY] for row in self._rows(subject_id, section)},
+        )
+
+    def get_year_menu_snapshot(
+        self,
+        subject_id: int,
+        section: str,
+        year_id: int,
+        lecturer_id: int | None = None,
+    ) -> YearMenuSnapshot:
+        rows = list(self._rows(subject_id, section, year_id=year_id, lecturer_id=lecturer_id))
+        return YearMenuSnapshot(
+            lectures_exist=bool(rows),
+            categories=_unique(
+                row[_CATEGORY] for row in rows
+                if row[_CATEGORY] != "lecture" and row[_CATEGORY] not in _ATTACHMENTS
+            ),
+        )
+
+    def get_lecturer_snapshot(self, subject_id: int, section: str, lecturer_id: int) -> LecturerSnapshot:
+        rows = list(self._rows(subject_id, section, lecturer_id=lecturer_id))
+        return LecturerSnapshot(
+            years=self._year_pairs(row[_YEAR] for row in rows),
+            lectures_exist=bool(rows),
+        )
+
+
+def load_snapshot(db_path: str, data_version: int = 0) -> CatalogSnapshot:
+    """Build a snapshot from one consistent read transaction (blocking)."""
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("BEGIN")
+        return CatalogSnapshot(conn, data_version)
+    finally:
+        conn.close()
+
+
+class Catalog:
+    """Owns the current :class:`CatalogSnapshot` and keeps it fresh.
+
+    A background task polls ``PRAGMA data_version`` on a dedicated connection
+    every ``poll_interval`` seconds (it changes whenever another connection
+    commits) and rebuilds the snapshot when it moved. :meth:`mark_stale` is
+    called by ``Database`` after its own writes: reads then miss until the
+    rebuild, which is started immediately, completes.
+    """
+
+    def __init__(self, db_path: str, *, poll_interval: float = 5.0) -> None:
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.load_seconds = 0.0
+        self.footprint_bytes = 0
+        self._snapshot: CatalogSnapshot | None = None
+        self._stale = False
+        self._watcher: aiosqlite.Connection | None = None
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    async def start(self) -> None:
+        """Load the first snapshot and start the background refresher."""
+
+        self._watcher = await aiosqlite.connect(self.db_path)
+        await self.refresh(force=True)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watcher is not None:
+            await self._watcher.close()
+            self._watcher = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.refresh()
+            except Exception:  # keep serving the old snapshot
+                logger.exception("Catalog refresh failed")
+
+    # ------------------------------------------------------------------
+    # Snapshot management
+    # ------------------------------------------------------------------
+    async def data_version(self) -> int:
+        async with self._watcher.execute("PRAGMA data_version") as cur:
+            row = await cur.fetchone()
+        return row[0]
+
+    async def refresh(self, force: bool = False) -> bool:
+        """Rebuild the snapshot if the database changed; return True if rebuilt."""
+
+        async with self._lock:
+            version = await self.data_version()
+            current = self._snapshot
+            if not force and not self._stale and current is not None and current.data_version == version:
+                return False
+            # Clear the flag before loading: a write that lands during the
+            # load marks the catalog stale again and triggers another pass.
+            self._stale = False
+            start = time.perf_counter()
+            snapshot = await asyncio.to_thread(load_snapshot, self.db_path, version)
+            self.load_seconds = time.perf_counter() - start
+            self.footprint_bytes = await asyncio.to_thread(snapshot.footprint)
+            self._snapshot = snapshot
+            self.rebuilds += 1
+            logger.info(
+                "Catalog loaded: %d materials in %.1f ms, ~%.1f KiB",
+                snapshot.material_count,
+                self.load_seconds * 1000,
+                self.footprint_bytes / 1024,
+            )
+            return True
+
+    def mark_stale(self) -> None:
+        """Stop serving the current snapshot and rebuild as soon as possible."""
+
+        self._stale = True
+        self._wakeup.set()
+
+    def current(self) -> CatalogSnapshot | None:
+        """Return the snapshot to answer a read from, counting hits/misses."""
+
+        snapshot = self._snapshot
+        if snapshot is None or self._stale:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return snapshot
+
+    @property
+    def version(self) -> int:
+        """Monotonic counter of rebuilds (usable as a cache key)."""
+
+        return self.rebuilds
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "rebuilds": self.rebuilds,
+            "load_ms": round(self.load_seconds * 1000, 2),
+            "footprint_bytes": self.footprint_bytes,
+            "materials": self._snapshot.material_count if self._snapshot else 0,
+        }
+
+
+__all__ = ["Catalog", "CatalogSnapshot", "load_snapshot"]
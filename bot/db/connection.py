@@ -2,40 +2,287 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
+import logging
 import os
-from typing import Any
+from time import perf_counter
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterable
 
 import aiosqlite
 
-from ..models import Subject, Lecturer, Material
+from ..models import (
+    Subject,
+    Lecturer,
+    Material,
+    SectionSnapshot,
+    YearMenuSnapshot,
+    LecturerSnapshot,
+    SearchHit,
+    SubjectPath,
+)
+from .migrations import migrate
+from .query_stats import QueryStats
+from .write_queue import WriteQueue
+from .search import (
+    PREFIX_INDEX_MAX,
+    SCAN_LIMIT,
+    SEARCH_CANDIDATES,
+    build_match,
+    has_prefix,
+    query_words,
+    rank,
+)
 
+if TYPE_CHECKING:
+    from .catalog import Catalog
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = "database/archive.db"
 
+# Categories attached to a specific lecture; the year menu hides them and only
+# lists "general" categories such as exams or summaries.
+LECTURE_ATTACHMENT_CATEGORIES = (
+    "slides",
+    "audio",
+    "board_images",
+    "video",
+    "mind_map",
+    "transcript",
+    "related",
+)
+
+
+def _catalog_read(method):
+    """Answer a read method from the in-memory catalog when it is enabled.
+
+    The snapshot exposes a synchronous method with the same name and
+    signature; when no fresh snapshot is available, or the caller is inside
+    a transaction whose writes the snapshot cannot see, the query runs as
+    usual. Snapshot answers are timed like statements while query stats are
+    enabled.
+    """
+
+    name = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(self: "Database", *args, **kwargs):
+        if self.catalog is not None and not self._joins_transaction():
+            snapshot = self.catalog.current()
+            if snapshot is not None:
+                stats = self.query_stats
+                if stats is None:
+                    return getattr(snapshot, name)(*args, **kwargs)
+                start = perf_counter()
+                result = getattr(snapshot, name)(*args, **kwargs)
+                rows = len(result) if isinstance(result, (list, tuple)) else int(result is not None)
+                stats.record(self, name, None, args, perf_counter() - start, rows)
+                return result
+        return await method(self, *args, **kwargs)
+
+    return wrapper
+
 
 class Database:
     """Encapsulates access to the SQLite database used by the bot.
 
-    The class maintains a single connection that is reused across all calls. It
-    also acts as an asynchronous context manager to ensure the connection is
-    properly closed when the application finishes.
+    By default the class maintains a single connection that is reused across
+    all calls. When ``read_pool_size`` is greater than zero the database is
+    switched to WAL mode: the main connection becomes a dedicated writer and
+    ``read_pool_size`` read-only connections serve queries, so reads from
+    different users run in parallel with each other and with writes.
+
+    ``mmap_size`` and ``cache_size`` are applied as PRAGMAs on every
+    connection when given (``cache_size`` follows SQLite's convention where a
+    negative value is a size in KiB).
+
+    The class also acts as an asynchronous context manager to ensure the
+    connections are properly closed when the application finishes.
     """
 
-    def __init__(self, db_path: str = DB_PATH) -> None:
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        *,
+        read_pool_size: int = 0,
+        mmap_size: int | None = None,
+        cache_size: int | None = None,
+    ) -> None:
+        if read_pool_size < 0:
+            raise ValueError("read_pool_size must be >= 0")
+        if read_pool_size and db_path == ":memory:":
+            raise ValueError("A read pool requires a file-backed database")
         self.db_path = db_path
+        self.read_pool_size = read_pool_size
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
         self._conn: aiosqlite.Connection | None = None
+        self._readers: list[aiosqlite.Connection] = []
+        self._idle_readers: asyncio.Queue[aiosqlite.Connection] | None = None
+        self.catalog: Catalog | None = None
+        self.write_queue: WriteQueue | None = None
+        self.query_stats: QueryStats | None = None
+        # Incremented after every committed write made through this instance.
+        self.change_counter = 0
+        # Commits by other connections seen by watch_external_writes().
+        self.external_changes = 0
+        self._data_version: int | None = None
+        self._watch_task: asyncio.Task | None = None
+        # Nesting depth of transaction(); only the outermost block commits.
+        self._tx_depth = 0
+        # Task holding the writer through the write queue (see transaction()).
+        self._tx_owner: asyncio.Task | None = None
 
     async def connect(self) -> aiosqlite.Connection:
-        """Return a connection, creating it on first use."""
+        """Return the main (writer) connection, creating it on first use.
+
+        In pool mode the read-only connections are opened at the same time.
+        """
 
         if self._conn is None:
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-            self._conn = await aiosqlite.connect(self.db_path)
+            conn = await aiosqlite.connect(self.db_path)
+            if self.read_pool_size:
+                await conn.execute("PRAGMA journal_mode=WAL")
+                await conn.execute("PRAGMA synchronous=NORMAL")
+            await self._tune(conn)
+            self._conn = conn
+            if self.read_pool_size:
+                await self._open_readers()
         return self._conn
 
+    async def _tune(self, conn: aiosqlite.Connection) -> None:
+        if self.mmap_size is not None:
+            await conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        if self.cache_size is not None:
+            await conn.execute(f"PRAGMA cache_size={int(self.cache_size)}")
+
+    async def _open_readers(self) -> None:
+        uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        self._idle_readers = asyncio.Queue()
+        for _ in range(self.read_pool_size):
+            conn = await aiosqlite.connect(uri, uri=True)
+            await conn.execute("PRAGMA query_only=1")
+            await self._tune(conn)
+            self._readers.append(conn)
+            self._idle_readers.put_nowait(conn)
+
+    async def enable_catalog(self, *, poll_interval: float = 5.0) -> "Catalog":
+        """Load the in-memory catalog and serve read methods from it."""
+
+        from .catalog import Catalog
+
+        if self.catalog is None:
+            await self.connect()
+            catalog = Catalog(self.db_path, poll_interval=poll_interval)
+            await catalog.start()
+            self.catalog = catalog
+        return self.catalog
+
+    async def enable_write_queue(self, *, max_batch: int = 64, max_delay: float = 0.005) -> WriteQueue:
+        """Route writes through a :class:`WriteQueue` that group-commits them.
+
+        Single-statement writes (``insert_*``) are queued and committed in
+        batches; :meth:`transaction` blocks take the writer connection
+        exclusively between batches.
+        """
+
+        if self.write_queue is None:
+            conn = await self.connect()
+            queue = WriteQueue(conn, max_batch=max_batch, max_delay=max_delay, on_commit=self._changed)
+            queue.start()
+            self.write_queue = queue
+        return self.write_queue
+
+    def enable_query_stats(self, *, slow_ms: float = 100.0, explain: bool = True) -> QueryStats:
+        """Time every statement of this instance, and the catalog-snapshot reads.
+
+        Statements slower than ``slow_ms`` go to the slow-query log, with
+        their ``EXPLAIN QUERY PLAN`` when ``explain``.
+        """
+
+        if self.query_stats is None:
+            self.query_stats = QueryStats(slow_ms=slow_ms, explain=explain)
+        return self.query_stats
+
+    async def watch_external_writes(self, *, poll_interval: float = 5.0) -> None:
+        """Poll ``PRAGMA data_version`` so that commits by other processes
+        (``seed.py --sync``, ``import_manifest.py``, the sqlite3 shell) move
+        :attr:`change_version`.
+
+        Only needed without the catalog, whose own poller already does this.
+        """
+
+        if self._watch_task is None:
+            await self.check_external_writes()
+            self._watch_task = asyncio.create_task(self._watch(poll_interval))
+
+    async def _watch(self, poll_interval: float) -> None:
+        while True:
+            await asyncio.sleep(poll_interval)
+            try:
+                await self.check_external_writes()
+            except Exception:  # keep polling; a locked database is transient
+                logger.exception("data_version check failed")
+
+    async def check_external_writes(self) -> bool:
+        """Read ``PRAGMA data_version``; return True if another connection committed."""
+
+        conn = await self.connect()
+        async with conn.execute("PRAGMA data_version") as cur:
+            version = (await cur.fetchone())[0]
+        changed = self._data_version is not None and version != self._data_version
+        self._data_version = version
+        if changed:
+            self.external_changes += 1
+        return changed
+
+    @property
+    def change_version(self) -> tuple[int, int]:
+        """A value that moves whenever data served to reads may have changed.
+
+        It combines writes made through this instance with either catalog
+        rebuilds or, without the catalog, the commits of other connections
+        noticed by :meth:`watch_external_writes` (both follow
+        ``PRAGMA data_version``). Used to invalidate caches of rendered screens.
+        """
+
+        if self.catalog is not None:
+            return self.change_counter, self.catalog.version
+        return self.change_counter, self.external_changes
+
+    def _changed(self) -> None:
+        """Record a committed write (invalidates the catalog snapshot)."""
+
+        self.change_counter += 1
+        if self.catalog is not None:
+            self.catalog.mark_stale()
+
     async def close(self) -> None:
-        """Close the underlying connection if it exists."""
+        """Close the underlying connections if they exist."""
 
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+        if self.query_stats is not None:
+            await self.query_stats.drain()
+        if self.write_queue is not None:
+            await self.write_queue.stop()
+            self.write_queue = None
+        if self.catalog is not None:
+            await self.catalog.stop()
+            self.catalog = None
+        for conn in self._readers:
+            await conn.close()
+        self._readers.clear()
+        self._idle_readers = None
         if self._conn is not None:
             await self._conn.close()
             self._conn = None
@@ -47,67 +294,118 @@ class Database:
     async def __aexit__(self, exc_type, exc, tb) -> None:  # type: ignore[override]
         await self.close()
 
+    # ------------------------------------------------------------------
+    # Query helpers
+    # ------------------------------------------------------------------
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a connection for a read query.
+
+        Without a pool this is the shared connection. With a pool an idle
+        read-only connection is checked out for the duration of the query,
+        waiting if all of them are busy. Reads that belong to an open
+        :meth:`transaction` use the writer, so they see its uncommitted writes.
+        """
+
+        db = await self.connect()
+        if self._idle_readers is None or self._joins_transaction():
+            yield db
+            return
+        conn = await self._idle_readers.get()
+        try:
+            yield conn
+        finally:
+            self._idle_readers.put_nowait(conn)
+
+    async def _fetchall(self, method: str, sql: str, params: tuple = ()) -> list:
+        """Rows of a read query; ``method`` is the public method it is charged to in the stats."""
+
+        stats = self.query_stats
+        if stats is None:
+            async with self._reader() as db:
+                return list(await db.execute_fetchall(sql, params))
+        start = perf_counter()
+        try:
+            async with self._reader() as db:
+                rows = list(await db.execute_fetchall(sql, params))
+        except Exception:
+            stats.failed(self, method, sql, params, perf_counter() - start)
+            raise
+        stats.record(self, method, sql, params, perf_counter() - start, len(rows))
+        return rows
+
+    async def _fetchone(self, method: str, sql: str, params: tuple = ()):
+        stats = self.query_stats
+        if stats is None:
+            async with self._reader() as db:
+                async with db.execute(sql, params) as cur:
+                    return await cur.fetchone()
+        start = perf_counter()
+        try:
+            async with self._reader() as db:
+                async with db.execute(sql, params) as cur:
+                    row = await cur.fetchone()
+        except Exception:
+            stats.failed(self, method, sql, params, perf_counter() - start)
+            raise
+        stats.record(self, method, sql, params, perf_counter() - start, 0 if row is None else 1)
+        return row
+
     # ------------------------------------------------------------------
     # Schema initialisation
     # ------------------------------------------------------------------
-    async def init_db(self) -> None:
-        """Ensure database directory exists and run the schema file."""
+    async def init_db(self) -> list[int]:
+        """Ensure database directory exists and apply pending migrations.
+
+        Returns the schema versions applied by this call (empty when the
+        database is already up to date).
+        """
 
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         db = await self.connect()
-        with open("database/init.sql", "r", encoding="utf-8") as f:
-            await db.executescript(f.read())
-        await db.commit()
+        return await migrate(db)
 
     # ------------------------------------------------------------------
     # Basic reads (levels / terms / subjects)
     # ------------------------------------------------------------------
+    @_catalog_read
     async def get_levels(self):
-        db = await self.connect()
-        cur = await db.execute("SELECT id, name FROM levels ORDER BY id")
-        return await cur.fetchall()
+        return await self._fetchall("get_levels", "SELECT id, name FROM levels ORDER BY id")
 
+    @_catalog_read
     async def get_level_id_by_name(self, name: str) -> int | None:
-        db = await self.connect()
-        cur = await db.execute("SELECT id FROM levels WHERE name=?", (name,))
-        row = await cur.fetchone()
+        row = await self._fetchone("get_level_id_by_name", "SELECT id FROM levels WHERE name=?", (name,))
         return row[0] if row else None
 
+    @_catalog_read
     async def get_term_id_by_name(self, name: str) -> int | None:
-        db = await self.connect()
-        cur = await db.execute("SELECT id FROM terms WHERE name=?", (name,))
-        row = await cur.fetchone()
+        row = await self._fetchone("get_term_id_by_name", "SELECT id FROM terms WHERE name=?", (name,))
         return row[0] if row else None
 
+    @_catalog_read
     async def get_year_id_by_name(self, name: str) -> int | None:
-        db = await self.connect()
-        cur = await db.execute("SELECT id FROM years WHERE name=?", (name,))
-        row = await cur.fetchone()
+        row = await self._fetchone("get_year_id_by_name", "SELECT id FROM years WHERE name=?", (name,))
         return row[0] if row else None
 
+    @_catalog_read
     async def get_lecturer_id_by_name(self, name: str) -> int | None:
-        db = await self.connect()
-        cur = await db.execute("SELECT id FROM lecturers WHERE name=?", (name,))
-        row = await cur.fetchone()
+        row = await self._fetchone(
+            "get_lecturer_id_by_name", "SELECT id FROM lecturers WHERE name=?", (name,)
+        )
         return row[0] if row else None
 
     async def insert_level(self, name: str) -> None:
-        db = await self.connect()
-        await db.execute("INSERT OR IGNORE INTO levels (name) VALUES (?)", (name,))
-        await db.commit()
+        await self._write("insert_level", "INSERT OR IGNORE INTO levels (name) VALUES (?)", (name,))
 
     async def insert_term(self, name: str) -> None:
-        db = await self.connect()
-        await db.execute("INSERT OR IGNORE INTO terms (name) VALUES (?)", (name,))
-        await db.commit()
+        await self._write("insert_term", "INSERT OR IGNORE INTO terms (name) VALUES (?)", (name,))
 
     async def insert_subject(self, code: str, name: str, level_id: int, term_id: int) -> None:
-        db = await self.connect()
-        await db.execute(
+        await self._write(
+            "insert_subject",
             "INSERT INTO subjects (code, name, level_id, term_id) VALUES (?, ?, ?, ?)",
             (code, name, level_id, term_id),
         )
-        await db.commit()
 
     async def insert_material(
         self,
@@ -118,55 +416,360 @@ class Database:
         url: str | None = None,
         year_id: int | None = None,
         lecturer_id: int | None = None,
+        *,
+        archive_chat_id: int | None = None,
+        archive_message_id: int | None = None,
     ) -> None:
-        db = await self.connect()
-        await db.execute(
+        await self._write(
+            "insert_material",
             """
-            INSERT INTO materials (subject_id, section, category, title, url, year_id, lecturer_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO materials (subject_id, section, category, title, url, year_id, lecturer_id,
+                                   archive_chat_id, archive_message_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (subject_id, section, category, title, url, year_id, lecturer_id),
+            (subject_id, section, category, title, url, year_id, lecturer_id, archive_chat_id, archive_message_id),
         )
-        await db.commit()
 
     async def insert_year(self, name: str) -> None:
-        db = await self.connect()
-        await db.execute("INSERT OR IGNORE INTO years (name) VALUES (?)", (name,))
-        await db.commit()
+        await self._write("insert_year", "INSERT OR IGNORE INTO years (name) VALUES (?)", (name,))
 
     async def insert_lecturer(self, name: str, role: str = "lecturer") -> None:
-        db = await self.connect()
-        await db.execute(
+        await self._write(
+            "insert_lecturer",
             "INSERT OR IGNORE INTO lecturers (name, role) VALUES (?, ?)",
             (name, role),
         )
-        await db.commit()
 
     async def ensure_year_id(self, name: str) -> int:
-        _id = await self.get_year_id_by_name(name)
-        if _id is not None:
-            return _id
-        await self.insert_year(name)
-        _id = await self.get_year_id_by_name(name)
-        if _id is None:
-            raise RuntimeError(f"Failed to create year: {name}")
-        return _id
+        return (await self.upsert_years([name]))[name]
 
     async def ensure_lecturer_id(self, name: str, role: str = "lecturer") -> int:
-        _id = await self.get_lecturer_id_by_name(name)
-        if _id is not None:
-            return _id
-        await self.insert_lecturer(name, role)
-        _id = await self.get_lecturer_id_by_name(name)
-        if _id is None:
-            raise RuntimeError(f"Failed to create lecturer: {name}")
-        return _id
+        """Id of lecturer ``name``, inserted with ``role`` if missing (an existing role is kept)."""
+
+        method = "ensure_lecturer_id"
+        insert = "INSERT INTO lecturers (name, role) VALUES (?, ?) ON CONFLICT(name) DO NOTHING"
+        async with self.transaction() as db:
+            await self._tx_execute(method, db, insert, (name, role))
+            row = await self._tx_fetchone(method, db, "SELECT id FROM lecturers WHERE name=?", (name,))
+        return row[0]
+
+    # ------------------------------------------------------------------
+    # Bulk writes
+    # ------------------------------------------------------------------
+    async def _write(self, method: str, sql: str, params: tuple = ()) -> None:
+        """Run a single-statement write and commit it (through the write queue when enabled)."""
+
+        stats = self.query_stats
+        if stats is None:
+            return await self._commit_write(sql, params)
+        start = perf_counter()
+        try:
+            await self._commit_write(sql, params)
+        except Exception:
+            stats.failed(self, method, sql, params, perf_counter() - start)
+            raise
+        # timed as the caller sees it: queue wait and commit included
+        stats.record(self, method, sql, params, perf_counter() - start, 0)
+
+    async def _tx_execute(
+        self, method: str, db: aiosqlite.Connection, sql: str, params=(), *, many: bool = False
+    ) -> int:
+        """Run a statement (``executemany`` with ``many``) inside an open transaction; return its rowcount."""
+
+        stats = self.query_stats
+        start = perf_counter() if stats is not None else 0.0
+        try:
+            cursor = await (db.executemany(sql, params) if many else db.execute(sql, params))
+            changed = cursor.rowcount
+            await cursor.close()
+        except Exception:
+            if stats is not None:
+                stats.failed(self, method, sql, () if many else params, perf_counter() - start)
+            raise
+        if stats is not None:
+            stats.record(self, method, sql, () if many else params, perf_counter() - start, 0)
+        return changed
+
+    async def _tx_fetchone(self, method: str, db: aiosqlite.Connection, sql: str, params=()):
+        """First row of a statement run inside an open transaction (a lookup or ``RETURNING``)."""
+
+        stats = self.query_stats
+        start = perf_counter() if stats is not None else 0.0
+        try:
+            async with db.execute(sql, params) as cur:
+                row = await cur.fetchone()
+        except Exception:
+            if stats is not None:
+                stats.failed(self, method, sql, params, perf_counter() - start)
+            raise
+        if stats is not None:
+            stats.record(self, method, sql, params, perf_counter() - start, 0 if row is None else 1)
+        return row
+
+    async def _commit_write(self, sql: str, params: tuple) -> None:
+        db = await self.connect()
+        if self._joins_transaction():
+            # the open transaction() commits it
+            await db.execute(sql, params)
+        elif self.write_queue is not None:
+            await self.write_queue.execute(sql, params)
+        else:
+            await db.execute(sql, params)
+            await db.commit()
+            self._changed()
+
+    def _joins_transaction(self) -> bool:
+        """Whether a write made now belongs to the open transaction() block."""
+
+        if not self._tx_depth:
+            return False
+        return self.write_queue is None or self._tx_owner is asyncio.current_task()
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Group writes on the writer connection into a single transaction.
+
+        Blocks nest: only the outermost one commits (and invalidates cached
+        reads), and an exception anywhere inside rolls everything back. Other
+        writes made on this instance while the block is open join it.
+
+        With the write queue enabled the outermost block waits for the writer
+        to finish its current batch and holds the connection until it ends.
+        Only writes from the same task join it; other tasks' writes wait in
+        the queue.
+        """
+
+        if self.write_queue is not None and not self._joins_transaction():
+            async with self.write_queue.exclusive():
+                self._tx_owner = asyncio.current_task()
+                try:
+                    async with self._transaction() as db:
+                        yield db
+                finally:
+                    self._tx_owner = None
+            return
+        async with self._transaction() as db:
+            yield db
+
+    @asynccontextmanager
+    async def _transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        db = await self.connect()
+        self._tx_depth += 1
+        try:
+            yield db
+        except BaseException:
+            self._tx_depth -= 1
+            if not self._tx_depth:
+                await db.rollback()
+            raise
+        self._tx_depth -= 1
+        if not self._tx_depth:
+            await db.commit()
+            self._changed()
+
+    async def _upsert_ids(
+        self, method: str, sql: str, rows: list[tuple], lookup: str | None = None, key=None
+    ) -> list[int]:
+        """Run a single-row ``... RETURNING id`` upsert for each row.
+
+        ``executemany`` discards ``RETURNING`` rows, so rows are sent one by
+        one inside the caller's transaction. An upsert whose ``DO UPDATE``
+        is skipped by its ``WHERE`` (nothing changed) returns no row; its id
+        is then read with ``lookup`` using ``key(row)`` as parameters.
+        """
+
+        db = await self.connect()
+        ids = []
+        for row in rows:
+            found = await self._tx_fetchone(method, db, sql, row)
+            if found is None:
+                found = await self._tx_fetchone(method, db, lookup, key(row))
+            ids.append(found[0])
+        return ids
+
+    async def _upsert_names(self, method: str, table: str, names: Iterable[str]) -> dict[str, int]:
+        names = list(dict.fromkeys(names))
+        sql = (
+            f"INSERT INTO {table} (name) VALUES (?)"
+            " ON CONFLICT(name) DO UPDATE SET name = excluded.name RETURNING id"
+        )
+        async with self.transaction():
+            ids = await self._upsert_ids(method, sql, [(name,) for name in names])
+        return dict(zip(names, ids))
+
+    async def upsert_levels(self, names: Iterable[str]) -> dict[str, int]:
+        """Insert missing levels in one transaction; map every name to its id."""
+
+        return await self._upsert_names("upsert_levels", "levels", names)
+
+    async def upsert_terms(self, names: Iterable[str]) -> dict[str, int]:
+        """Insert missing terms in one transaction; map every name to its id."""
+
+        return await self._upsert_names("upsert_terms", "terms", names)
+
+    async def upsert_years(self, names: Iterable[str]) -> dict[str, int]:
+        """Insert missing years in one transaction; map every name to its id."""
+
+        return await self._upsert_names("upsert_years", "years", names)
+
+    async def upsert_lecturers(self, people: Iterable[tuple[str, str]]) -> dict[str, int]:
+        """Insert or update ``(name, role)`` pairs; map every name to its id.
+
+        Only ``role`` is ever rewritten: updating ``name`` would fire the
+        search-index trigger for all of the lecturer's materials.
+        """
+
+        people = list(dict(people).items())
+        sql = (
+            "INSERT INTO lecturers (name, role) VALUES (?, ?)"
+            " ON CONFLICT(name) DO UPDATE SET role = excluded.role RETURNING id"
+        )
+        async with self.transaction():
+            ids = await self._upsert_ids("upsert_lecturers", sql, people)
+        return {name: _id for (name, _role), _id in zip(people, ids)}
+
+    async def upsert_subjects(
+        self, rows: Iterable[tuple[str, str, int, int]]
+    ) -> dict[tuple[int, int, str], int]:
+        """Insert or rename ``(code, name, level_id, term_id)`` subjects.
+
+        Subjects are keyed by code within their level and term. Returns
+        ``{(level_id, term_id, code): id}``.
+        """
+
+        rows = list({(r[2], r[3], r[0]): tuple(r) for r in rows}.values())
+        sql = (
+            "INSERT INTO subjects (code, name, level_id, term_id) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT(level_id, term_id, code) DO UPDATE SET name = excluded.name"
+            " WHERE name IS NOT excluded.name RETURNING id"
+        )
+        lookup = "SELECT id FROM subjects WHERE level_id=? AND term_id=? AND code=?"
+        async with self.transaction():
+            ids = await self._upsert_ids("upsert_subjects", sql, rows, lookup, key=lambda r: (r[2], r[3], r[0]))
+        return {(r[2], r[3], r[0]): _id for r, _id in zip(rows, ids)}
+
+    async def upsert_materials(self, rows: Iterable[tuple]) -> int:
+        """Insert or update materials with ``executemany`` in one transaction.
+
+        Each row is ``(subject_id, section, category, title, url, year_id,
+        lecturer_id[, archive_chat_id, archive_message_id])``. A material that
+        already exists under the same natural key only gets its url and
+        archive reference updated, and only when they differ, so re-running
+        a load leaves unchanged rows (and their search index entries) alone.
+        Returns the number of rows inserted or updated.
+        """
+
+        padding = (None, None)
+        params = (tuple(r) + padding[: 9 - len(r)] for r in rows)
+        sql = """
+            INSERT INTO materials (subject_id, section, category, title, url, year_id, lecturer_id,
+                                   archive_chat_id, archive_message_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(subject_id, section, category, title, IFNULL(year_id, 0), IFNULL(lecturer_id, 0))
+            DO UPDATE SET url = excluded.url,
+                          archive_chat_id = excluded.archive_chat_id,
+                          archive_message_id = excluded.archive_message_id
+            WHERE url IS NOT excluded.url
+               OR archive_chat_id IS NOT excluded.archive_chat_id
+               OR archive_message_id IS NOT excluded.archive_message_id
+        """
+        async with self.transaction() as db:
+            # rowcount (sqlite3_changes) leaves out the search-index trigger writes
+            changed = await self._tx_execute("upsert_materials", db, sql, params, many=True)
+        return changed
+
+    async def delete_materials(self, ids: Iterable[int]) -> int:
+        """Delete materials by id in one transaction; return the number removed."""
+
+        async with self.transaction() as db:
+            return await self._tx_execute(
+                "delete_materials", db, "DELETE FROM materials WHERE id = ?", [(i,) for i in ids], many=True
+            )
+
+    async def delete_subjects(self, ids: Iterable[int]) -> int:
+        """Delete subjects and their materials in one transaction; return the subjects removed."""
+
+        params = [(i,) for i in ids]
+        method = "delete_subjects"
+        async with self.transaction() as db:
+            await self._tx_execute(method, db, "DELETE FROM materials WHERE subject_id = ?", params, many=True)
+            return await self._tx_execute(method, db, "DELETE FROM subjects WHERE id = ?", params, many=True)
+
+    async def get_import_checkpoint(self, source: str) -> tuple[str, int] | None:
+        """Return ``(fingerprint, rows_done)`` saved for an import of ``source``."""
+
+        row = await self._fetchone(
+            "get_import_checkpoint",
+            "SELECT fingerprint, rows_done FROM import_checkpoints WHERE source = ?", (source,)
+        )
+        return (row[0], row[1]) if row else None
 
+    async def save_import_checkpoint(self, source: str, fingerprint: str, rows_done: int) -> None:
+        """Record import progress; joins the caller's transaction if one is open."""
+
+        async with self.transaction() as db:
+            await self._tx_execute(
+                "save_import_checkpoint",
+                db,
+                """
+                INSERT INTO import_checkpoints (source, fingerprint, rows_done) VALUES (?, ?, ?)
+                ON CONFLICT(source) DO UPDATE SET fingerprint = excluded.fingerprint,
+                    rows_done = excluded.rows_done, updated_at = CURRENT_TIMESTAMP
+                """,
+                (source, fingerprint, rows_done),
+            )
+
+    async def clear_import_checkpoint(self, source: str) -> None:
+        async with self.transaction() as db:
+            await self._tx_execute(
+                "clear_import_checkpoint", db, "DELETE FROM import_checkpoints WHERE source = ?", (source,)
+            )
+
+    async def natural_keys(self, *, materials: bool = True) -> dict:
+        """Every row keyed the way the bulk upserts key it, for diffing a load.
+
+        Returns ``levels``/``terms``/``years`` as ``{name: id}``,
+        ``lecturers`` as ``{name: (id, role)}``, ``subjects`` as
+        ``{(level_id, term_id, code): (id, name)}`` and, unless
+        ``materials=False``, ``materials`` as ``{(subject_id, section,
+        category, title, year_id, lecturer_id): (id, url, archive_chat_id,
+        archive_message_id)}``.
+        """
+
+        keys: dict = {}
+        for table in ("levels", "terms", "years"):
+            rows = await self._fetchall("natural_keys", f"SELECT id, name FROM {table}")
+            keys[table] = {name: _id for _id, name in rows}
+        rows = await self._fetchall("natural_keys", "SELECT id, name, role FROM lecturers")
+        keys["lecturers"] = {name: (_id, role) for _id, name, role in rows}
+        keys["subjects"] = {
+            (level_id, term_id, code): (_id, name)
+            for _id, code, name, level_id, term_id in await self._fetchall(
+                "natural_keys",
+                "SELECT id, code, name, level_id, term_id FROM subjects"
+            )
+        }
+        if not materials:
+            return keys
+        keys["materials"] = {
+            tuple(row[1:7]): (row[0], *row[7:])
+            for row in await self._fetchall(
+                "natural_keys",
+                """
+                SELECT id, subject_id, section, category, title, year_id, lecturer_id,
+                       url, archive_chat_id, archive_message_id
+                FROM materials
+                """
+            )
+        }
+        return keys
+
+    @_catalog_read
     async def get_terms_by_level(self, level_id: int):
         """Return terms available for a given level."""
 
-        db = await self.connect()
-        cur = await db.execute(
+        return await self._fetchall(
+            "get_terms_by_level",
             """
             SELECT DISTINCT t.id, t.name
             FROM terms t
@@ -176,40 +779,88 @@ class Database:
             """,
             (level_id,),
         )
-        return await cur.fetchall()
 
+    @_catalog_read
     async def get_subjects_by_level_and_term(self, level_id: int, term_id: int) -> list[Subject]:
         """Return :class:`Subject` objects for a given level and term."""
 
-        db = await self.connect()
-        cur = await db.execute(
+        rows = await self._fetchall(
+            "get_subjects_by_level_and_term",
             "SELECT id, name FROM subjects WHERE level_id = ? AND term_id = ? ORDER BY id",
             (level_id, term_id),
         )
-        rows = await cur.fetchall()
         return [Subject(id=row[0], name=row[1]) for row in rows]
 
+    @_catalog_read
     async def get_subject_id_by_name(self, level_id: int, term_id: int, subject_name: str) -> int | None:
-        db = await self.connect()
-        cur = await db.execute(
+        row = await self._fetchone(
+            "get_subject_id_by_name",
             "SELECT id FROM subjects WHERE level_id=? AND term_id=? AND name=?",
             (level_id, term_id, subject_name),
         )
-        row = await cur.fetchone()
         return row[0] if row else None
 
+    @_catalog_read
+    async def get_subject_path(self, subject_id: int) -> SubjectPath | None:
+        """Return the subject with its level and term names (for jumping to it)."""
+
+        row = await self._fetchone(
+            "get_subject_path",
+            """
+            SELECT s.id, s.name, s.code, l.id, l.name, t.id, t.name
+            FROM subjects s
+            JOIN levels l ON l.id = s.level_id
+            JOIN terms t ON t.id = s.term_id
+            WHERE s.id=?
+            """,
+            (subject_id,),
+        )
+        return SubjectPath(*row) if row else None
+
+    @_catalog_read
+    async def get_subjects_for_lecturer(self, lecturer_id: int) -> list[Subject]:
+        """Subjects that have at least one material by the lecturer."""
+
+        rows = await self._fetchall(
+            "get_subjects_for_lecturer",
+            """
+            SELECT id, name FROM subjects
+            WHERE id IN (SELECT subject_id FROM materials WHERE lecturer_id=?)
+            ORDER BY id
+            """,
+            (lecturer_id,),
+        )
+        return [Subject(id=r[0], name=r[1]) for r in rows]
+
+    async def list_subjects_after(self, subject_id: int) -> list[tuple[int, str, str]]:
+        """``(id, code, name)`` of subjects with an id above ``subject_id``."""
+
+        return await self._fetchall(
+            "list_subjects_after",
+            "SELECT id, code, name FROM subjects WHERE id > ? ORDER BY id", (subject_id,)
+        )
+
+    async def list_lecturers_after(self, lecturer_id: int) -> list[tuple[int, str]]:
+        """``(id, name)`` of lecturers with an id above ``lecturer_id``."""
+
+        return await self._fetchall(
+            "list_lecturers_after",
+            "SELECT id, name FROM lecturers WHERE id > ? ORDER BY id", (lecturer_id,)
+        )
+
+    @_catalog_read
     async def count_subjects(self, level_id: int, term_id: int) -> int:
-        db = await self.connect()
-        cur = await db.execute(
+        row = await self._fetchone(
+            "count_subjects",
             "SELECT COUNT(*) FROM subjects WHERE level_id=? AND term_id=?",
             (level_id, term_id),
         )
-        row = await cur.fetchone()
         return row[0] if row else 0
 
+    @_catalog_read
     async def term_feature_flags(self, level_id: int, term_id: int) -> dict:
-        db = await self.connect()
-        cur = await db.execute(
+        rows = await self._fetchall(
+            "term_feature_flags",
             """
             SELECT section, COUNT(*) FROM materials m
             JOIN subjects s ON m.subject_id = s.id
@@ -218,20 +869,21 @@ class Database:
             """,
             (level_id, term_id),
         )
-        rows = await cur.fetchall()
         return {section: count > 0 for section, count in rows}
 
+    @_catalog_read
     async def get_available_sections_for_subject(self, subject_id: int) -> list[str]:
-        db = await self.connect()
-        cur = await db.execute(
+        rows = await self._fetchall(
+            "get_available_sections_for_subject",
             "SELECT DISTINCT section FROM materials WHERE subject_id=? ORDER BY section",
             (subject_id,),
         )
-        return [r[0] for r in await cur.fetchall()]
+        return [r[0] for r in rows]
 
+    @_catalog_read
     async def get_years_for_subject_section(self, subject_id: int, section: str):
-        db = await self.connect()
-        cur = await db.execute(
+        return await self._fetchall(
+            "get_years_for_subject_section",
             """
             SELECT DISTINCT y.id, y.name
             FROM materials m
@@ -241,11 +893,11 @@ class Database:
             """,
             (subject_id, section),
         )
-        return await cur.fetchall()
 
+    @_catalog_read
     async def get_lecturers_for_subject_section(self, subject_id: int, section: str) -> list[Lecturer]:
-        db = await self.connect()
-        cur = await db.execute(
+        rows = await self._fetchall(
+            "get_lecturers_for_subject_section",
             """
             SELECT DISTINCT l.id, l.name
             FROM materials m
@@ -255,12 +907,12 @@ class Database:
             """,
             (subject_id, section),
         )
-        rows = await cur.fetchall()
         return [Lecturer(id=row[0], name=row[1]) for row in rows]
 
+    @_catalog_read
     async def has_lecture_category(self, subject_id: int, section: str) -> bool:
-        db = await self.connect()
-        cur = await db.execute(
+        row = await self._fetchone(
+            "has_lecture_category",
             """
             SELECT 1 FROM materials
             WHERE subject_id=? AND section=? AND category='lecture'
@@ -268,63 +920,96 @@ class Database:
             """,
             (subject_id, section),
         )
-        return (await cur.fetchone()) is not None
+        return row is not None
 
+    @_catalog_read
     async def list_lecture_titles(self, subject_id: int, section: str) -> list[str]:
-        db = await self.connect()
-        cur = await db.execute(
+        rows = await self._fetchall(
+            "list_lecture_titles",
             """
-            SELECT DISTINCT title FROM materials
+            SELECT title FROM materials
             WHERE subject_id=? AND section=? AND title IS NOT NULL
-            ORDER BY id
+            GROUP BY title
+            ORDER BY MIN(id)
             """,
             (subject_id, section),
         )
-        return [r[0] for r in await cur.fetchall()]
+        return [r[0] for r in rows]
+
+    async def get_lecture_key(self, subject_id: int, section: str, title: str) -> int | None:
+        """Id of the first material of a lecture title, used to name it in share links.
+
+        Unlike the title's position in :meth:`list_lecture_titles`, the id
+        does not move when other titles are deleted.
+        """
+
+        row = await self._fetchone(
+            "get_lecture_key",
+            "SELECT MIN(id) FROM materials WHERE subject_id=? AND section=? AND title=?",
+            (subject_id, section, title),
+        )
+        return row[0] if row else None
+
+    async def get_lecture_title(self, subject_id: int, section: str, key: int) -> str | None:
+        """Title of the material ``key`` if it is still in this subject section."""
 
+        row = await self._fetchone(
+            "get_lecture_title",
+            "SELECT title FROM materials WHERE id=? AND subject_id=? AND section=? AND title IS NOT NULL",
+            (key, subject_id, section),
+        )
+        return row[0] if row else None
+
+    @_catalog_read
     async def list_lecture_titles_by_year(self, subject_id: int, section: str, year_id: int) -> list[str]:
-        db = await self.connect()
-        cur = await db.execute(
+        rows = await self._fetchall(
+            "list_lecture_titles_by_year",
             """
-            SELECT DISTINCT title FROM materials
+            SELECT title FROM materials
             WHERE subject_id=? AND section=? AND year_id=? AND title IS NOT NULL
-            ORDER BY id
+            GROUP BY title
+            ORDER BY MIN(id)
             """,
             (subject_id, section, year_id),
         )
-        return [r[0] for r in await cur.fetchall()]
+        return [r[0] for r in rows]
 
+    @_catalog_read
     async def list_lecture_titles_by_lecturer(self, subject_id: int, section: str, lecturer_id: int) -> list[str]:
-        db = await self.connect()
-        cur = await db.execute(
+        rows = await self._fetchall(
+            "list_lecture_titles_by_lecturer",
             """
-            SELECT DISTINCT title FROM materials
+            SELECT title FROM materials
             WHERE subject_id=? AND section=? AND lecturer_id=? AND title IS NOT NULL
-            ORDER BY id
+            GROUP BY title
+            ORDER BY MIN(id)
             """,
             (subject_id, section, lecturer_id),
         )
-        return [r[0] for r in await cur.fetchall()]
+        return [r[0] for r in rows]
 
+    @_catalog_read
     async def list_lecture_titles_by_lecturer_year(
         self, subject_id: int, section: str, lecturer_id: int, year_id: int
     ) -> list[str]:
-        db = await self.connect()
-        cur = await db.execute(
+        rows = await self._fetchall(
+            "list_lecture_titles_by_lecturer_year",
             """
-            SELECT DISTINCT title FROM materials
+            SELECT title FROM materials
             WHERE subject_id=? AND section=? AND lecturer_id=? AND year_id=? AND title IS NOT NULL
-            ORDER BY id
+            GROUP BY title
+            ORDER BY MIN(id)
             """,
             (subject_id, section, lecturer_id, year_id),
         )
-        return [r[0] for r in await cur.fetchall()]
+        return [r[0] for r in rows]
 
+    @_catalog_read
     async def get_years_for_subject_section_lecturer(
         self, subject_id: int, section: str, lecturer_id: int
     ):
-        db = await self.connect()
-        cur = await db.execute(
+        return await self._fetchall(
+            "get_years_for_subject_section_lecturer",
             """
             SELECT DISTINCT y.id, y.name
             FROM materials m
@@ -334,8 +1019,8 @@ class Database:
             """,
             (subject_id, section, lecturer_id),
         )
-        return await cur.fetchall()
 
+    @_catalog_read
     async def get_lecture_materials(
         self,
         subject_id: int,
@@ -346,7 +1031,7 @@ class Database:
         title: str | None = None,
     ) -> list[Material]:
         q = """
-        SELECT id, category, title, url, year_id, lecturer_id
+        SELECT id, category, title, url, year_id, lecturer_id, archive_chat_id, archive_message_id
         FROM materials
         WHERE subject_id=? AND section=? AND category='lecture'
         """
@@ -362,9 +1047,7 @@ class Database:
             params.append(title)
         q += " ORDER BY id"
 
-        db = await self.connect()
-        cur = await db.execute(q, tuple(params))
-        rows = await cur.fetchall()
+        rows = await self._fetchall("get_lecture_materials", q, tuple(params))
         return [
             Material(
                 id=row[0],
@@ -375,10 +1058,13 @@ class Database:
                 url=row[3],
                 year_id=row[4],
                 lecturer_id=row[5],
+                archive_chat_id=row[6],
+                archive_message_id=row[7],
             )
             for row in rows
         ]
 
+    @_catalog_read
     async def get_materials_by_category(
         self,
         subject_id: int,
@@ -390,7 +1076,7 @@ class Database:
         title: str | None = None,
     ) -> list[Material]:
         q = """
-        SELECT id, title, url
+        SELECT id, title, url, archive_chat_id, archive_message_id
         FROM materials
         WHERE subject_id=? AND section=? AND category=?
         """
@@ -406,9 +1092,7 @@ class Database:
             params.append(title)
         q += " ORDER BY id"
 
-        db = await self.connect()
-        cur = await db.execute(q, tuple(params))
-        rows = await cur.fetchall()
+        rows = await self._fetchall("get_materials_by_category", q, tuple(params))
         return [
             Material(
                 id=row[0],
@@ -419,10 +1103,13 @@ class Database:
                 url=row[2],
                 year_id=year_id,
                 lecturer_id=lecturer_id,
+                archive_chat_id=row[3],
+                archive_message_id=row[4],
             )
             for row in rows
         ]
 
+    @_catalog_read
     async def list_categories_for_subject_section_year(
         self,
         subject_id: int,
@@ -430,15 +1117,7 @@ class Database:
         year_id: int,
         lecturer_id: int | None = None,
     ) -> list[str]:
-        lecture_attachment_cats = (
-            "slides",
-            "audio",
-            "board_images",
-            "video",
-            "mind_map",
-            "transcript",
-            "related",
-        )
+        lecture_attachment_cats = LECTURE_ATTACHMENT_CATEGORIES
         placeholders = ",".join("?" * len(lecture_attachment_cats))
         q = f"""
         SELECT DISTINCT category
@@ -452,10 +1131,10 @@ class Database:
             q += " AND lecturer_id=?"
             params.append(lecturer_id)
 
-        db = await self.connect()
-        cur = await db.execute(q, tuple(params))
-        return [r[0] for r in await cur.fetchall()]
+        rows = await self._fetchall("list_categories_for_subject_section_year", q, tuple(params))
+        return [r[0] for r in rows]
 
+    @_catalog_read
     async def list_categories_for_lecture(
         self,
         subject_id: int,
@@ -477,10 +1156,209 @@ class Database:
             q += " AND lecturer_id=?"
             params.append(lecturer_id)
 
-        db = await self.connect()
-        cur = await db.execute(q, tuple(params))
-        return [r[0] for r in await cur.fetchall()]
+        rows = await self._fetchall("list_categories_for_lecture", q, tuple(params))
+        return [r[0] for r in rows]
 
+    # ------------------------------------------------------------------
+    # Screen snapshots (one query per screen)
+    # ------------------------------------------------------------------
+    @_catalog_read
+    async def get_section_snapshot(self, subject_id: int, section: str) -> SectionSnapshot:
+        """Return years, lecturers and categories of a subject section at once."""
 
-__all__ = ["Database", "DB_PATH"]
+        rows = await self._fetchall(
+            "get_section_snapshot",
+            """
+            WITH m AS (
+                SELECT year_id, lecturer_id, category FROM materials
+                WHERE subject_id=? AND section=?
+            )
+            SELECT 'y', y.id, y.name FROM years y
+            WHERE y.id IN (SELECT year_id FROM m WHERE year_id IS NOT NULL)
+            UNION ALL
+            SELECT 'l', l.id, l.name FROM lecturers l
+            WHERE l.id IN (SELECT lecturer_id FROM m WHERE lecturer_id IS NOT NULL)
+            UNION ALL
+            SELECT DISTINCT 'c', NULL, category FROM m
+            ORDER BY 1, 2
+            """,
+            (subject_id, section),
+        )
+        snap = SectionSnapshot()
+        for kind, _id, name in rows:
+            if kind == "y":
+                snap.years.append((_id, name))
+            elif kind == "l":
+                snap.lecturers.append(Lecturer(id=_id, name=name))
+            else:
+                snap.categories.add(name)
+        return snap
+
+    @_catalog_read
+    async def get_year_menu_snapshot(
+        self,
+        subject_id: int,
+        section: str,
+        year_id: int,
+        lecturer_id: int | None = None,
+    ) -> YearMenuSnapshot:
+        """Return lecture existence and general categories for a year menu.
+
+        Equivalent to ``list_lecture_titles_by_year`` (or ``..._by_lecturer_year``)
+        plus ``list_categories_for_subject_section_year`` in a single query.
+        """
 
+        q = """
+        SELECT DISTINCT category FROM materials
+        WHERE subject_id=? AND section=? AND year_id=?
+        """
+        params: list[Any] = [subject_id, section, year_id]
+        if lecturer_id is not None:
+            q += " AND lecturer_id=?"
+            params.append(lecturer_id)
+
+        rows = await self._fetchall("get_year_menu_snapshot", q, tuple(params))
+        return YearMenuSnapshot(
+            lectures_exist=bool(rows),
+            categories=[
+                r[0] for r in rows
+                if r[0] != "lecture" and r[0] not in LECTURE_ATTACHMENT_CATEGORIES
+            ],
+        )
+
+    @_catalog_read
+    async def get_lecturer_snapshot(
+        self, subject_id: int, section: str, lecturer_id: int
+    ) -> LecturerSnapshot:
+        """Return the lecturer's years and whether they have any lectures."""
+
+        rows = await self._fetchall(
+            "get_lecturer_snapshot",
+            """
+            WITH m AS (
+                SELECT year_id FROM materials
+                WHERE subject_id=? AND section=? AND lecturer_id=?
+            )
+            SELECT y.id, y.name FROM years y
+            WHERE y.id IN (SELECT year_id FROM m WHERE year_id IS NOT NULL)
+            UNION ALL
+            SELECT NULL, NULL WHERE EXISTS (SELECT 1 FROM m)
+            ORDER BY 1
+            """,
+            (subject_id, section, lecturer_id),
+        )
+        return LecturerSnapshot(
+            years=[(r[0], r[1]) for r in rows if r[0] is not None],
+            lectures_exist=bool(rows),
+        )
+
+    # ------------------------------------------------------------------
+    # Full-text search
+    # ------------------------------------------------------------------
+    async def search_materials(
+        self,
+        query: str,
+        *,
+        level_id: int | None = None,
+        term_id: int | None = None,
+        limit: int = 10,
+        offset: int = 0,
+    ) -> list[SearchHit]:
+        """Ranked search over titles, subject names/codes and lecturer names.
+
+        Every word of ``query`` must match one of the indexed columns; results
+        can be narrowed to a level and/or term. See :mod:`bot.db.search` for
+        how candidates are read and ranked.
+        """
+
+        words = query_words(query)
+        if not words or offset >= SEARCH_CANDIDATES:
+            return []
+        candidates = await self._search_candidates("search_materials", words, level_id, term_id, offset + limit)
+        ids = rank(words, candidates)[offset : offset + limit]
+        if not ids:
+            return []
+        rows = await self._fetchall(
+            "search_materials",
+            f"""
+            SELECT m.id, m.subject_id, s.name, m.section, m.category, m.title, m.url
+            FROM materials m
+            JOIN subjects s ON s.id = m.subject_id
+            WHERE m.id IN ({",".join("?" * len(ids))})
+            """,
+            tuple(ids),
+        )
+        order = {material_id: i for i, material_id in enumerate(ids)}
+        return sorted((SearchHit(*r) for r in rows), key=lambda hit: order[hit.material_id])
+
+    async def _search_candidates(
+        self, method: str, words: list[str], level_id: int | None, term_id: int | None, needed: int
+    ) -> list:
+        """Index rows to rank: exact words first, the last word as a prefix if needed."""
+
+        candidates = await self._search_rows(method, build_match(words, level_id, term_id))
+        last = words[-1]
+        if len(candidates) >= needed or len(last) < 2:
+            # single letters are never expanded: they would match most of the index
+            return candidates
+        if len(last) > PREFIX_INDEX_MAX:
+            scanned = await self._scan_prefix(method, words, level_id, term_id)
+            if scanned is not None:
+                return scanned
+        return await self._search_rows(method, build_match(words, level_id, term_id, prefix=len(last)))
+
+    async def _scan_prefix(
+        self, method: str, words: list[str], level_id: int | None, term_id: int | None
+    ) -> list | None:
+        """Match the indexed short prefix, keeping rows that have the full one.
+
+        At most ``SCAN_LIMIT`` index rows are read. Returns ``None`` when they
+        yield fewer than ``SEARCH_CANDIDATES`` rows, i.e. the full prefix is
+        rare (or the index small) and a plain prefix query is cheap. Titles
+        and lecturer names are compared as stored: query words are already
+        lower-case and the Latin text that needs folding is the subject code.
+        """
+
+        last = words[-1]
+        rows = await self._fetchall(
+            method,
+            """
+            SELECT rowid, title, subject, lecturer FROM (
+                SELECT rowid, title, subject, lecturer FROM search_index
+                WHERE search_index MATCH ?
+                ORDER BY rowid DESC
+                LIMIT ?
+            )
+            WHERE instr(title, ?) OR instr(lower(subject), ?) OR instr(lecturer, ?)
+            LIMIT ?
+            """,
+            (
+                build_match(words, level_id, term_id, prefix=PREFIX_INDEX_MAX),
+                SCAN_LIMIT,
+                last,
+                last,
+                last,
+                SEARCH_CANDIDATES,
+            ),
+        )
+        if len(rows) < SEARCH_CANDIDATES:
+            return None
+        # instr() also accepts matches inside a word; keep word prefixes only
+        return [r for r in rows if has_prefix(last, r[1:])]
+
+    async def _search_rows(self, method: str, match: str) -> list:
+        """Newest ``SEARCH_CANDIDATES`` index rows matching ``match``."""
+
+        return await self._fetchall(
+            method,
+            """
+            SELECT rowid, title, subject, lecturer FROM search_index
+            WHERE search_index MATCH ?
+            ORDER BY rowid DESC
+            LIMIT ?
+            """,
+            (match, SEARCH_CANDIDATES),
+        )
+
+
+__all__ = ["Database", "DB_PATH"]
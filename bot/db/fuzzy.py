@@ -0,0 +1,151 @@
+"""In-memory trigram index for typo-tolerant lookup of subjects and lecturers.
+
+Free text typed by a student ("جبر", "B0303213", "د احمد") is compared with
+subject names, subject codes and lecturer names through the character
+trigrams they share. Text goes through :func:`bot.normalize.normalize_arabic`
+first, and words carrying the definite article are also indexed without it,
+so "جبر" finds "الجبر الخطي".
+
+The index is built from the database on first use and then refreshed
+incrementally: :meth:`FuzzyIndex.refresh` only loads rows whose id is above
+the highest id seen so far, which covers the bot's own inserts. Renames and
+deletions come from other processes (``seed.py --sync``, the sqlite3 shell),
+so ``refresh`` rebuilds the whole index instead when the second component
+of ``Database.change_version`` moved. That component follows commits by other
+connections (and catalog rebuilds, when the catalog is enabled).
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+from collections import Counter
+from itertools import chain
+from typing import TYPE_CHECKING, Iterable
+
+from ..models import FuzzyMatch
+from ..normalize import normalize_arabic
+
+if TYPE_CHECKING:
+    from .connection import Database
+
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def trigrams(text: str) -> frozenset[str]:
+    """Padded character trigrams of every word of ``text`` (normalised)."""
+
+    grams: set[str] = set()
+    for word in _WORD_RE.findall(normalize_arabic(text).lower()):
+        variants = (word, word[2:]) if word.startswith("ال") and len(word) > 3 else (word,)
+        for variant in variants:
+            padded = f"  {variant} "
+            grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class FuzzyIndex:
+    """Trigram postings over subjects (name + code) and lecturers (name).
+
+    Scores are the share of the query's trigrams found in an entry, so a
+    short partial query fully contained in a long name scores 1.0; among
+    equal scores, entries closer in length to the query come first.
+    """
+
+    def __init__(self) -> None:
+        self.clear()
+        # change_version[1] the index was built at; None before the first build
+        self._built_at = None
+
+    def clear(self) -> None:
+        # entry number -> (kind, id, label, trigram count); None once removed
+        self._entries: list[tuple[str, int, str, int] | None] = []
+        self._by_key: dict[tuple[str, int], int] = {}
+        self._postings: dict[str, list[int]] = {}
+        self._last_id = {"subject": 0, "lecturer": 0}
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+    def add(self, kind: str, _id: int, label: str, text: str | None = None) -> None:
+        """Index ``text`` (``label`` by default) for the entry ``(kind, _id)``."""
+
+        self.remove(kind, _id)
+        grams = trigrams(text if text is not None else label)
+        if not grams:
+            return
+        number = len(self._entries)
+        self._entries.append((kind, _id, label, len(grams)))
+        self._by_key[(kind, _id)] = number
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(number)
+        if _id > self._last_id.get(kind, 0):
+            self._last_id[kind] = _id
+
+    def remove(self, kind: str, _id: int) -> None:
+        number = self._by_key.pop((kind, _id), None)
+        if number is not None:
+            # postings keep the number; search() skips removed entries
+            self._entries[number] = None
+
+    def add_subjects(self, rows: Iterable[tuple[int, str, str]]) -> None:
+        for _id, code, name in rows:
+            self.add("subject", _id, name, f"{name} {code}")
+
+    def add_lecturers(self, rows: Iterable[tuple[int, str]]) -> None:
+        for _id, name in rows:
+            self.add("lecturer", _id, name)
+
+    async def refresh(self, db: "Database") -> int:
+        """Index subjects/lecturers added since the last refresh; return how many.
+
+        Rebuilds from scratch if another process wrote to the database since.
+        """
+
+        built_at = db.change_version[1]
+        if built_at != self._built_at:
+            self.clear()
+            self._built_at = built_at
+        subjects = await db.list_subjects_after(self._last_id["subject"])
+        lecturers = await db.list_lecturers_after(self._last_id["lecturer"])
+        self.add_subjects(subjects)
+        self.add_lecturers(lecturers)
+        return len(subjects) + len(lecturers)
+
+    async def rebuild(self, db: "Database") -> int:
+        """Drop everything and index the database from scratch."""
+
+        self.clear()
+        return await self.refresh(db)
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+    def search(self, query: str, limit: int = 5, min_score: float = 0.5) -> list[FuzzyMatch]:
+        """Best entries for ``query``, highest score first."""
+
+        grams = trigrams(query)
+        if not grams:
+            return []
+        size = len(grams)
+        floor = min_score * size
+        shared = Counter(chain.from_iterable(self._postings.get(g, ()) for g in grams))
+
+        ranked = []
+        for number, count in shared.items():
+            entry = self._entries[number]
+            if entry is None or count < floor:
+                continue
+            ranked.append((count / size, count / entry[3], number))
+        matches = []
+        for score, _closeness, number in heapq.nlargest(limit, ranked):
+            kind, _id, label, _count = self._entries[number]
+            matches.append(FuzzyMatch(kind=kind, id=_id, label=label, score=score))
+        return matches
+
+
+__all__ = ["FuzzyIndex", "trigrams"]
@@ -0,0 +1,245 @@
+"""Schema migrations keyed on SQLite's ``PRAGMA user_version``.
+
+Each migration has a strictly increasing ``version``. :func:`migrate` reads the
+current ``user_version`` of the database, applies only the migrations above it
+(each one inside its own transaction together with the version bump) and
+leaves already-applied steps untouched, so calling it on every start is cheap.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Sequence
+
+import aiosqlite
+
+from ..normalize import sql_normalize
+
+
+SCHEMA_PATH = "database/init.sql"
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A single schema step.
+
+    ``sql`` is either a script or a callable returning one, which lets the
+    baseline migration read ``init.sql`` lazily.
+    """
+
+    version: int
+    name: str
+    sql: str | Callable[[], str]
+
+    def script(self) -> str:
+        return self.sql() if callable(self.sql) else self.sql
+
+
+def _baseline_schema() -> str:
+    return Path(SCHEMA_PATH).read_text(encoding="utf-8")
+
+
+def _search_index_schema() -> str:
+    """FTS5 index over materials, kept in sync by triggers.
+
+    Normalisation happens inside SQL (see :func:`bot.normalize.sql_normalize`)
+    rather than through a registered Python function, so rows written by any
+    SQLite client - the seed scripts, the sqlite3 shell - are indexed too.
+    The ``search_source`` view is the single place that decides what a row
+    looks like in the index; the ``scope`` column carries ``lvN``, ``tmN``
+    and ``lvNtmN`` tokens for filtering by level and term. The prefix
+    lengths must stay in step with ``PREFIX_INDEX_MAX`` in
+    :mod:`bot.db.search`.
+    """
+
+    title = sql_normalize("m.title")
+    subject = sql_normalize("s.name")
+    lecturer = sql_normalize("COALESCE(l.name, '')")
+    columns = "rowid, title, subject, lecturer, scope"
+    reindex_subject = (
+        "DELETE FROM search_index WHERE rowid IN (SELECT id FROM materials WHERE subject_id = NEW.id);\n"
+        f"    INSERT INTO search_index ({columns}) SELECT * FROM search_source\n"
+        "        WHERE id IN (SELECT id FROM materials WHERE subject_id = NEW.id);"
+    )
+    reindex_lecturer = (
+        "DELETE FROM search_index WHERE rowid IN (SELECT id FROM materials WHERE lecturer_id = NEW.id);\n"
+        f"    INSERT INTO search_index ({columns}) SELECT * FROM search_source\n"
+        "        WHERE id IN (SELECT id FROM materials WHERE lecturer_id = NEW.id);"
+    )
+    return f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        title, subject, lecturer, scope,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    );
+
+    CREATE VIEW IF NOT EXISTS search_source AS
+    SELECT m.id AS id,
+           {title} AS title,
+           {subject} || ' ' || s.code AS subject,
+           {lecturer} AS lecturer,
+           'lv' || s.level_id || ' tm' || s.term_id || ' lv' || s.level_id || 'tm' || s.term_id AS scope
+    FROM materials m
+    JOIN subjects s ON s.id = m.subject_id
+    LEFT JOIN lecturers l ON l.id = m.lecturer_id;
+
+    CREATE TRIGGER IF NOT EXISTS materials_search_ai AFTER INSERT ON materials BEGIN
+        INSERT INTO search_index ({columns}) SELECT * FROM search_source WHERE id = NEW.id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS materials_search_ad AFTER DELETE ON materials BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS materials_search_au AFTER UPDATE ON materials BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id;
+        INSERT INTO search_index ({columns}) SELECT * FROM search_source WHERE id = NEW.id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS subjects_search_au
+        AFTER UPDATE OF name, code, level_id, term_id ON subjects BEGIN
+        {reindex_subject}
+    END;
+    CREATE TRIGGER IF NOT EXISTS lecturers_search_au AFTER UPDATE OF name ON lecturers BEGIN
+        {reindex_lecturer}
+    END;
+
+    DELETE FROM search_index;
+    INSERT INTO search_index ({columns}) SELECT * FROM search_source;
+    INSERT INTO search_index (search_index) VALUES ('optimize');
+    """
+
+
+def _natural_keys_schema() -> str:
+    """Unique natural keys so bulk loads can upsert instead of duplicating.
+
+    A subject is identified by its code within a level and term; a material
+    by its subject, section, category, title, year and lecturer. NULL years
+    and lecturers compare equal through ``IFNULL`` (a plain unique index
+    treats NULLs as distinct). Rows that already repeat a key are merged
+    first: materials move to the first copy of a subject, and later copies
+    of a material are dropped.
+    """
+
+    same_subject = "d.level_id = s.level_id AND d.term_id = s.term_id AND d.code = s.code"
+    same_material = (
+        "d.subject_id = m.subject_id AND d.section = m.section AND d.category = m.category"
+        " AND d.title = m.title AND IFNULL(d.year_id, 0) = IFNULL(m.year_id, 0)"
+        " AND IFNULL(d.lecturer_id, 0) = IFNULL(m.lecturer_id, 0)"
+    )
+    return f"""
+    UPDATE materials SET subject_id = (
+        SELECT MIN(d.id) FROM subjects s JOIN subjects d ON {same_subject}
+        WHERE s.id = materials.subject_id
+    )
+    WHERE subject_id IN (
+        SELECT s.id FROM subjects s WHERE EXISTS (SELECT 1 FROM subjects d WHERE {same_subject} AND d.id < s.id)
+    );
+    DELETE FROM subjects WHERE id IN (
+        SELECT s.id FROM subjects s WHERE EXISTS (SELECT 1 FROM subjects d WHERE {same_subject} AND d.id < s.id)
+    );
+    DELETE FROM materials WHERE id IN (
+        SELECT m.id FROM materials m WHERE EXISTS (SELECT 1 FROM materials d WHERE {same_material} AND d.id < m.id)
+    );
+
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_subjects_natural
+        ON subjects (level_id, term_id, code);
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_materials_natural
+        ON materials (subject_id, section, category, title, IFNULL(year_id, 0), IFNULL(lecturer_id, 0));
+    """
+
+
+MIGRATIONS: list[Migration] = [
+    # Tables use CREATE TABLE IF NOT EXISTS, so databases created before
+    # versioning existed (user_version = 0) adopt the baseline safely.
+    Migration(1, "baseline schema", _baseline_schema),
+    # Covering indexes for the navigation queries. Every screen filters
+    # materials by (subject_id, section) first and then by one of category,
+    # year, lecturer or title, and only reads the remaining columns, so each
+    # access path gets an index that answers the query without touching the
+    # table rows.
+    Migration(
+        2,
+        "covering indexes on materials",
+        """
+        CREATE INDEX IF NOT EXISTS idx_materials_category
+            ON materials (subject_id, section, category, year_id, lecturer_id, title);
+        CREATE INDEX IF NOT EXISTS idx_materials_year
+            ON materials (subject_id, section, year_id, lecturer_id, category, title);
+        CREATE INDEX IF NOT EXISTS idx_materials_lecturer
+            ON materials (subject_id, section, lecturer_id, year_id, title);
+        CREATE INDEX IF NOT EXISTS idx_materials_title
+            ON materials (subject_id, section, title, category, year_id, lecturer_id);
+        """,
+    ),
+    Migration(
+        3,
+        "subjects lookup index",
+        """
+        CREATE INDEX IF NOT EXISTS idx_subjects_level_term
+            ON subjects (level_id, term_id, name);
+        """,
+    ),
+    Migration(4, "full-text search index", _search_index_schema),
+    # Optional reference to a copy of the file in the archive channel. When
+    # set, the bot sends the file with copyMessages instead of a URL, so the
+    # student never leaves Telegram. A NULL chat id means ARCHIVE_CHANNEL_ID.
+    Migration(
+        5,
+        "archive channel message references",
+        """
+        ALTER TABLE materials ADD COLUMN archive_chat_id INTEGER;
+        ALTER TABLE materials ADD COLUMN archive_message_id INTEGER;
+        """,
+    ),
+    Migration(6, "natural keys for upserts", _natural_keys_schema),
+    # Progress of streaming manifest imports (scripts/import_manifest.py).
+    # The row count is written in the same transaction as each chunk, so a
+    # resumed import never skips or repeats a committed chunk.
+    Migration(
+        7,
+        "import checkpoints",
+        """
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            source TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            rows_done INTEGER NOT NULL,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+    ),
+]
+
+
+async def get_version(conn: aiosqlite.Connection) -> int:
+    async with conn.execute("PRAGMA user_version") as cur:
+        row = await cur.fetchone()
+    return row[0] if row else 0
+
+
+async def migrate(
+    conn: aiosqlite.Connection, migrations: Sequence[Migration] = MIGRATIONS
+) -> list[int]:
+    """Apply pending migrations and return the versions that were applied."""
+
+    current = await get_version(conn)
+    applied: list[int] = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version <= current:
+            continue
+        script = (
+            "BEGIN;\n"
+            f"{migration.script()}\n"
+            f"PRAGMA user_version = {int(migration.version)};\n"
+            "COMMIT;"
+        )
+        try:
+            await conn.executescript(script)
+        except Exception:
+            if conn.in_transaction:
+                await conn.rollback()
+            raise
+        current = migration.version
+        applied.append(migration.version)
+    return applied
+
+
+__all__ = ["Migration", "MIGRATIONS", "SCHEMA_PATH", "get_version", "migrate"]
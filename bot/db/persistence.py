@@ -0,0 +1,264 @@
+"""SQLite-backed persistence for per-user navigation state.
+
+PTB's ``PicklePersistence`` rewrites one file holding every user on each
+save. :class:`SQLitePersistence` stores one compact JSON row per user in a
+separate SQLite file instead:
+
+* **Writes are batched.** The application marks users dirty as they
+  interact and hands the dirty ones over every ``update_interval`` seconds.
+  Rows are encoded as they arrive, and the whole round is written in a
+  single transaction.
+* **Reads are lazy.** Nothing is loaded at startup. A user's row is read the
+  first time one of their updates is processed after a restart
+  (:meth:`refresh_user_data`).
+* **Idle users can be spilled.** :meth:`spill` queues a user's data and
+  forgets it was loaded, so the application can drop it from memory and the
+  next update reads it back (see ``bot.eviction``). A user who comes back
+  before the drop reaches the persistence has their new data written when
+  it does, since the application skips updates for dropped users.
+
+Only ``user_data`` is stored. Conversation states are derived from the nav
+stack (see ``bot.conversation.get_state``), so they do not need saving.
+
+The state lives in its own database file on purpose: writes to the archive
+database would bump its ``PRAGMA data_version`` and rebuild the catalog.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any
+
+import aiosqlite
+from telegram.ext import BasePersistence, PersistenceInput
+
+logger = logging.getLogger(__name__)
+
+STATE_DB_PATH = "database/state.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_state (
+    user_id    INTEGER PRIMARY KEY,
+    data       TEXT NOT NULL,
+    updated_at INTEGER NOT NULL
+)
+"""
+
+
+def encode_user_data(data: dict) -> str:
+    """Compact JSON for a user's data; values JSON cannot hold are dropped."""
+
+    def default(value: Any):
+        if isinstance(value, (set, frozenset)):
+            return list(value)
+        # NavState and similar compact objects know their plain-dict form
+        to_dict = getattr(value, "to_dict", None)
+        if to_dict is not None:
+            return to_dict()
+        raise TypeError
+
+    try:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=default)
+    except (TypeError, ValueError):
+        pass
+    encoded = {}
+    for key, value in data.items():
+        try:
+            json.dumps(value, default=default)
+        except (TypeError, ValueError):
+            logger.debug("Not persisting user_data[%r]: not JSON serialisable", key)
+            continue
+        encoded[key] = value
+    return json.dumps(encoded, ensure_ascii=False, separators=(",", ":"), default=default)
+
+
+class SQLitePersistence(BasePersistence[dict, dict, dict]):
+    """Per-user rows in SQLite, loaded lazily and written in batches."""
+
+    def __init__(self, db_path: str = STATE_DB_PATH, *, update_interval: float = 10.0) -> None:
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.db_path = db_path
+        self._conn: aiosqlite.Connection | None = None
+        # user_id -> encoded row, or None to delete it
+        self._pending: dict[int, str | None] = {}
+        self._loaded: set[int] = set()
+        # users spilled by eviction: the application's drop that follows must keep their row
+        self._spilled: set[int] = set()
+        # spilled users back before that drop: their live data, written in its place
+        self._returned: dict[int, dict] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self.loads = 0
+        self.spills = 0
+        self.batches = 0
+        self.rows_written = 0
+
+    async def _connect(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.db_path):
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = await aiosqlite.connect(self.db_path)
+            await conn.execute("PRAGMA journal_mode=WAL")
+            await conn.execute("PRAGMA synchronous=NORMAL")
+            await conn.execute(_SCHEMA)
+            await conn.commit()
+            self._conn = conn
+        return self._conn
+
+    # ------------------------------------------------------------------
+    # user_data
+    # ------------------------------------------------------------------
+    async def get_user_data(self) -> dict[int, dict]:
+        # Loaded per user on first contact, see refresh_user_data.
+        return {}
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        if user_id in self._loaded:
+            return
+        self._loaded.add(user_id)
+        if user_id in self._spilled:
+            # The application drops this user's pending update along with the
+            # eviction's drop, so write whatever they change now in its place.
+            self._returned[user_id] = user_data
+        if user_id in self._pending:
+            # spilled (or updated) and not written yet
+            row = None if self._pending[user_id] is None else (self._pending[user_id],)
+        else:
+            conn = await self._connect()
+            async with conn.execute("SELECT data FROM user_state WHERE user_id=?", (user_id,)) as cur:
+                row = await cur.fetchone()
+        if row is not None and not user_data:
+            user_data.update(json.loads(row[0]))
+            self.loads += 1
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        self._loaded.add(user_id)
+        self._pending[user_id] = encode_user_data(data)
+        self._schedule_flush()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        if user_id in self._spilled:
+            # evicted, not deleted: keep the spilled row, or the newer data of a returning user
+            self._spilled.discard(user_id)
+            if user_id in self._returned:
+                await self.update_user_data(user_id, self._returned.pop(user_id))
+            return
+        self._loaded.add(user_id)
+        self._pending[user_id] = None
+        self._schedule_flush()
+
+    def spill(self, user_id: int, data: dict) -> None:
+        """Queue ``data`` for writing and reload it on the user's next update.
+
+        Called right before ``Application.drop_user_data``; the drop that the
+        application forwards afterwards is ignored for this user.
+        """
+
+        self._pending[user_id] = encode_user_data(data)
+        self._loaded.discard(user_id)
+        self._spilled.add(user_id)
+        self._returned.pop(user_id, None)
+        self.spills += 1
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        # The application hands over all dirty users of a round concurrently;
+        # a task started by the first one runs once they are all queued.
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._write_pending())
+
+    async def _write_pending(self) -> None:
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            now = int(time.time())
+            upserts = [(uid, data, now) for uid, data in batch.items() if data is not None]
+            deletes = [(uid,) for uid, data in batch.items() if data is None]
+            conn = await self._connect()
+            try:
+                if upserts:
+                    await conn.executemany(
+                        "INSERT INTO user_state (user_id, data, updated_at) VALUES (?, ?, ?)"
+                        " ON CONFLICT(user_id) DO UPDATE SET data=excluded.data, updated_at=excluded.updated_at",
+                        upserts,
+                    )
+                if deletes:
+                    await conn.executemany("DELETE FROM user_state WHERE user_id=?", deletes)
+                await conn.commit()
+            except Exception:
+                # keep the rows for the next round unless they were updated meanwhile
+                for uid, data in batch.items():
+                    self._pending.setdefault(uid, data)
+                raise
+            self.batches += 1
+            self.rows_written += len(batch)
+
+    async def flush(self) -> None:
+        """Write everything pending and close the connection (called at shutdown)."""
+
+        if self._flush_task is not None:
+            try:
+                await self._flush_task
+            except Exception:
+                logger.exception("Writing nav state failed; retrying")
+        await self._write_pending()
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    def stats(self) -> dict:
+        return {
+            "loaded_users": len(self._loaded),
+            "loads": self.loads,
+            "spills": self.spills,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+        }
+
+    # ------------------------------------------------------------------
+    # Not stored
+    # ------------------------------------------------------------------
+    async def get_chat_data(self) -> dict[int, dict]:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        return {}
+
+    async def update_conversation(self, name: str, key, new_state) -> None:
+        pass
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+
+__all__ = ["STATE_DB_PATH", "SQLitePersistence", "encode_user_data"]
@@ -0,0 +1,242 @@
+"""Per-method query latency statistics and a slow-query log for :class:`Database`.
+
+With :meth:`Database.enable_query_stats`, every statement of that instance is
+timed: the SQL paths (``_fetchall``, ``_fetchone``, ``_write``), the
+statements the bulk upserts and deletes run inside :meth:`Database.transaction`
+(``_tx_execute``, ``_tx_fetchone``), and the reads answered by the catalog
+snapshot. Each one is charged to the public ``Database`` method that issued
+it, whose name the method passes down itself: statement and error counts,
+rows returned, and a :class:`LatencyHistogram`. A ``Database`` without stats
+pays one attribute check per statement.
+
+Recording a statement appends its time and row count to a buffer for its
+method; the buffer is binned into the method's histogram in groups of
+``_FOLD_EVERY`` (sorted once, then one bisection per bucket) and whenever
+figures are read. That keeps the per-statement cost to two clock reads and
+an append. ``scripts/bench_query_stats.py``
+measures the overhead.
+
+A statement slower than ``slow_ms`` is logged on the ``bot.db.slow_queries``
+logger together with its ``EXPLAIN QUERY PLAN``. The plan is read in a
+background task once the statement has returned and is cached per SQL text,
+so a slow screen is not made slower by the log.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from bisect import bisect_left
+from collections import defaultdict, deque
+
+slow_logger = logging.getLogger("bot.db.slow_queries")
+
+# Buckets split every doubling from 2**-17 s (~7.6 µs) to 2**7 s into four
+# equal parts, so quantiles are exact to within 12.5%.
+_MIN_EXP = -16
+_MAX_EXP = 7
+_BUCKETS = (_MAX_EXP - _MIN_EXP + 1) * 4
+
+# statements buffered per method before they are sorted into its histogram
+_FOLD_EVERY = 1024
+
+
+def _upper_bound(bucket: int) -> float:
+    exp, part = divmod(bucket, 4)
+    return (0.5 + (part + 1) / 8) * 2.0 ** (exp + _MIN_EXP)
+
+
+_BOUNDS = [_upper_bound(i) for i in range(_BUCKETS)]
+
+
+class LatencyHistogram:
+    """Fixed log-linear buckets, filled a group of values at a time."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record_many(self, seconds: list[float]) -> None:
+        """Record a group of values: sorted once, then one bisection per bucket."""
+
+        seconds = sorted(seconds)
+        if not seconds:
+            return
+        counts = self.counts
+        below = 0
+        for i, bound in enumerate(_BOUNDS[:-1]):
+            upto = bisect_left(seconds, bound, below)
+            counts[i] += upto - below
+            below = upto
+        counts[-1] += len(seconds) - below
+        self.count += len(seconds)
+        self.total += sum(seconds)
+        if seconds[-1] > self.max:
+            self.max = seconds[-1]
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (capped at the maximum)."""
+
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(_BOUNDS[i], self.max)
+        return self.max
+
+
+class MethodStats:
+    __slots__ = ("errors", "rows", "latency")
+
+    def __init__(self) -> None:
+        self.errors = 0
+        self.rows = 0
+        self.latency = LatencyHistogram()
+
+
+def _format_plan(rows: list) -> str:
+    """Indent ``EXPLAIN QUERY PLAN`` rows ``(id, parent, notused, detail)`` as a tree."""
+
+    depth = {0: 0}
+    lines = []
+    for _id, parent, _unused, detail in rows:
+        depth[_id] = depth.get(parent, 0) + 1
+        lines.append("  " * depth[_id] + detail)
+    return "\n".join(lines)
+
+
+class QueryStats:
+    """Statement counts, rows and latency histograms per ``Database`` method."""
+
+    def __init__(self, *, slow_ms: float = 100.0, explain: bool = True, keep_slow: int = 50) -> None:
+        self.slow_seconds = slow_ms / 1000
+        self.explain = explain
+        self._methods: dict[str, MethodStats] = {}
+        # method -> [seconds, rows, seconds, rows, ...] not yet in its histogram
+        self._pending: defaultdict[str, list] = defaultdict(list)
+        # the most recent slow statements, newest last
+        self.slow: deque[dict] = deque(maxlen=keep_slow)
+        self._plans: dict[str, str] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def record(self, db, method: str, sql: str | None, params, seconds: float, rows: int) -> None:
+        """Called by ``Database`` after every statement while stats are enabled.
+
+        ``sql`` is ``None`` for reads answered by the catalog snapshot.
+        """
+
+        pending = self._pending[method]
+        pending += (seconds, rows)
+        if len(pending) >= 2 * _FOLD_EVERY:
+            self._fold(method)
+        if seconds >= self.slow_seconds:
+            self._log_slow(db, method, sql, params, seconds, rows)
+
+    def failed(self, db, method: str, sql: str | None, params, seconds: float) -> None:
+        """Like :meth:`record`, for a statement that raised."""
+
+        self._entry(method).errors += 1
+        self.record(db, method, sql, params, seconds, 0)
+
+    def _entry(self, method: str) -> MethodStats:
+        entry = self._methods.get(method)
+        if entry is None:
+            entry = self._methods[method] = MethodStats()
+        return entry
+
+    def _fold(self, method: str) -> None:
+        pending = self._pending.pop(method)
+        stats = self._entry(method)
+        stats.rows += sum(pending[1::2])
+        stats.latency.record_many(pending[0::2])
+
+    @property
+    def methods(self) -> dict[str, MethodStats]:
+        for method in list(self._pending):
+            self._fold(method)
+        return self._methods
+
+    # ------------------------------------------------------------------
+    # Slow-query log
+    # ------------------------------------------------------------------
+    def _log_slow(self, db, method: str, sql: str | None, params, seconds: float, rows: int) -> None:
+        entry = {
+            "method": method,
+            "ms": round(seconds * 1000, 2),
+            "rows": rows,
+            "sql": " ".join(sql.split()) if sql is not None else "(catalog snapshot)",
+            "params": repr(tuple(params)),
+            "plan": None,
+        }
+        self.slow.append(entry)
+        if not self.explain or sql is None:
+            self._emit(entry)
+            return
+        task = asyncio.get_running_loop().create_task(self._explain_and_emit(db, entry, sql, params))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain_and_emit(self, db, entry: dict, sql: str, params) -> None:
+        plan = self._plans.get(sql)
+        if plan is None:
+            try:
+                # straight on a connection, so the EXPLAIN is not timed itself
+                async with db._reader() as conn:
+                    plan = _format_plan(await conn.execute_fetchall("EXPLAIN QUERY PLAN " + sql, params))
+            except Exception as exc:  # the plan is best effort
+                plan = f"(EXPLAIN failed: {exc})"
+            self._plans[sql] = plan
+        entry["plan"] = plan
+        self._emit(entry)
+
+    @staticmethod
+    def _emit(entry: dict) -> None:
+        message = "Slow query in %s: %.1f ms, %d rows\n  %s\n  params: %s"
+        params = [entry["method"], entry["ms"], entry["rows"], entry["sql"], entry["params"]]
+        if entry["plan"]:
+            message += "\n%s"
+            params.append(entry["plan"])
+        slow_logger.warning(message, *params)
+
+    async def drain(self) -> None:
+        """Wait for pending slow-query log entries (their plans are still being read)."""
+
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def stats(self, top: int | None = None) -> dict:
+        """Per-method figures, slowest total time first."""
+
+        ms = lambda s: round(s * 1000, 3)
+        ranked = sorted(
+            ((name, m) for name, m in self.methods.items() if m.latency.count),
+            key=lambda item: item[1].latency.total,
+            reverse=True,
+        )
+        return {
+            name: {
+                "statements": m.latency.count,
+                "errors": m.errors,
+                "rows": m.rows,
+                "total_ms": ms(m.latency.total),
+                "mean_ms": ms(m.latency.total / m.latency.count),
+                "p50_ms": ms(m.latency.quantile(0.50)),
+                "p95_ms": ms(m.latency.quantile(0.95)),
+                "p99_ms": ms(m.latency.quantile(0.99)),
+                "max_ms": ms(m.latency.max),
+            }
+            for name, m in ranked[:top]
+        }
+
+
+__all__ = ["LatencyHistogram", "QueryStats"]
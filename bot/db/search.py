@@ -0,0 +1,124 @@
+"""Query building and ranking for the ``search_index`` FTS5 table.
+
+FTS5's ``bm25()`` has to visit every row matching each phrase to compute
+term frequencies across the index, so a common word ("محاضرة") costs
+hundreds of milliseconds on a large archive. Instead the index is read in
+rowid order, which FTS5 can stop early, and only the newest
+:data:`SEARCH_CANDIDATES` matches are ranked here with a small column-weighted
+score. Broad queries therefore rank the most recently added materials; narrow
+queries (the usual case) rank every match.
+
+Words are matched exactly first, which FTS5 streams cheaply. Only when that
+cannot fill the requested page (a partially typed word, a different suffix)
+is the last word treated as a prefix. A plain prefix query makes FTS5 merge
+the doclists of every term it expands to, which is slow for common prefixes,
+so prefixes longer than the index's prefix lengths are first matched through
+the indexed short prefix and filtered, within a bounded number of rows; the plain
+prefix query is the last resort and is cheap precisely when the prefix is
+rare enough for that scan to come up short.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable, Sequence
+
+from ..normalize import normalize_arabic
+
+# Upper bound on matches read from the index per query.
+SEARCH_CANDIDATES = 200
+
+# Longest prefix covered by the index's ``prefix`` option (see migration 4),
+# and the row budget when scanning through it.
+PREFIX_INDEX_MAX = 3
+SCAN_LIMIT = 4000
+
+# Column weights: a hit in the title matters more than the subject name,
+# which matters more than the lecturer.
+_WEIGHTS = (10.0, 4.0, 2.0)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def query_words(query: str) -> list[str]:
+    """Split a user query into normalised, lower-cased words."""
+
+    return _WORD_RE.findall(normalize_arabic(query).lower())
+
+
+def build_match(
+    words: Sequence[str],
+    level_id: int | None,
+    term_id: int | None,
+    *,
+    prefix: int = 0,
+) -> str | None:
+    """Build an FTS5 MATCH string for ``words`` within an optional scope.
+
+    All words must match. With ``prefix`` the last word is matched as a
+    prefix of its first ``prefix`` characters.
+    """
+
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    if prefix:
+        terms[-1] = f'"{words[-1][:prefix]}"*'
+    expr = f"{{title subject lecturer}} : ({' AND '.join(terms)})"
+    if level_id is not None and term_id is not None:
+        expr += f' AND scope : "lv{int(level_id)}tm{int(term_id)}"'
+    elif level_id is not None:
+        expr += f' AND scope : "lv{int(level_id)}"'
+    elif term_id is not None:
+        expr += f' AND scope : "tm{int(term_id)}"'
+    return expr
+
+
+def has_prefix(word: str, columns: Sequence[str]) -> bool:
+    """True if any word of ``columns`` starts with ``word``."""
+
+    for text in columns:
+        text = (text or "").lower()
+        if word in text and any(t.startswith(word) for t in _WORD_RE.findall(text)):
+            return True
+    return False
+
+
+def score(words: Sequence[str], columns: Sequence[str]) -> float:
+    """Weighted score of one candidate row: exact word hits count double."""
+
+    total = 0.0
+    for weight, text in zip(_WEIGHTS, columns):
+        text = (text or "").lower()
+        tokens = None
+        for word in words:
+            if word not in text:
+                continue
+            if tokens is None:
+                tokens = _WORD_RE.findall(text)
+            if word in tokens:
+                total += 2 * weight
+            elif any(t.startswith(word) for t in tokens):
+                total += weight
+    # among equal hits, prefer short titles (closer to the query)
+    return total - 0.01 * len(columns[0] or "")
+
+
+def rank(words: Sequence[str], rows: Iterable[tuple]) -> list[int]:
+    """Order ``(rowid, title, subject, lecturer)`` rows, best first."""
+
+    scored = [(score(words, row[1:]), row[0]) for row in rows]
+    scored.sort(key=lambda item: (-item[0], -item[1]))
+    return [rowid for _score, rowid in scored]
+
+
+__all__ = [
+    "PREFIX_INDEX_MAX",
+    "SCAN_LIMIT",
+    "SEARCH_CANDIDATES",
+    "build_match",
+    "has_prefix",
+    "query_words",
+    "rank",
+    "score",
+]
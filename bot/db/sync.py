@@ -0,0 +1,259 @@
+"""Incremental sync of seed data (the ``scripts/seed_data.yml`` format) into the database.
+
+:func:`plan_sync` reads the natural keys of every row once and diffs them
+against the data. The diff is computed in terms of names and codes rather
+than ids, so a dry run can describe rows that do not exist yet. Rows are
+keyed as follows:
+
+* levels, terms and years by name;
+* lecturers by name, with the role as their only value;
+* subjects by level, term and code;
+* materials by subject, section, category, title, year and lecturer.
+
+:func:`apply_sync` then writes only the inserts, updates and deletes in one
+short transaction, so a small content edit holds the write lock for
+milliseconds instead of the length of a full reload.
+
+Deletes only happen with ``prune=True``, which treats the file as the
+complete archive: subjects and materials it does not list are removed (a
+subject that the file still lists materials for is kept). Without it a
+partial file can add and update rows but never wipe any. Levels, terms,
+years and lecturers are never deleted.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+SubjectKey = tuple[str, str, str]  # (level name, term name, code)
+# (subject key, section, category, title, year name, lecturer name)
+MaterialKey = tuple[SubjectKey, str, str, str, "str | None", "str | None"]
+# (url, archive_chat_id, archive_message_id)
+MaterialValue = tuple[Any, Any, Any]
+
+
+@dataclass
+class SyncPlan:
+    """The changes needed to bring the database in line with the data."""
+
+    levels: list[str] = field(default_factory=list)
+    terms: list[str] = field(default_factory=list)
+    years: list[str] = field(default_factory=list)
+    # new lecturers, or existing ones whose role changed: (name, role)
+    lecturers: list[tuple[str, str]] = field(default_factory=list)
+    subject_inserts: list[tuple[SubjectKey, str]] = field(default_factory=list)
+    # (key, old name, new name)
+    subject_updates: list[tuple[SubjectKey, str, str]] = field(default_factory=list)
+    # (key, id, name)
+    subject_deletes: list[tuple[SubjectKey, int, str]] = field(default_factory=list)
+    material_inserts: list[tuple[MaterialKey, MaterialValue]] = field(default_factory=list)
+    # (key, old value, new value)
+    material_updates: list[tuple[MaterialKey, MaterialValue, MaterialValue]] = field(default_factory=list)
+    # (key, id)
+    material_deletes: list[tuple[MaterialKey, int]] = field(default_factory=list)
+    # material entries naming a subject that exists neither in the file nor in the database
+    skipped: list[str] = field(default_factory=list)
+    # ids of the rows that already exist, by natural key (filled by plan_sync)
+    ids: dict = field(default_factory=dict, repr=False)
+
+    def counts(self) -> dict[str, int]:
+        return {
+            "levels": len(self.levels),
+            "terms": len(self.terms),
+            "years": len(self.years),
+            "lecturers": len(self.lecturers),
+            "subjects_inserted": len(self.subject_inserts),
+            "subjects_updated": len(self.subject_updates),
+            "subjects_deleted": len(self.subject_deletes),
+            "materials_inserted": len(self.material_inserts),
+            "materials_updated": len(self.material_updates),
+            "materials_deleted": len(self.material_deletes),
+        }
+
+    def is_empty(self) -> bool:
+        return not any(self.counts().values())
+
+    def report(self) -> list[str]:
+        """One line per change: ``+`` insert, ``~`` update, ``-`` delete, ``!`` skipped."""
+
+        def material(key: MaterialKey) -> str:
+            (_level, _term, code), section, category, title, year, lecturer = key
+            extra = " ".join(str(v) for v in (year, lecturer) if v)
+            return f"{code} {section}/{category} «{title}»" + (f" [{extra}]" if extra else "")
+
+        lines = [f"+ level     {name}" for name in self.levels]
+        lines += [f"+ term      {name}" for name in self.terms]
+        lines += [f"+ year      {name}" for name in self.years]
+        lines += [f"+ lecturer  {name} ({role})" for name, role in self.lecturers]
+        lines += [f"+ subject   {code} {name} [{lv} / {tm}]" for (lv, tm, code), name in self.subject_inserts]
+        lines += [f"~ subject   {key[2]} name: {old} -> {new}" for key, old, new in self.subject_updates]
+        lines += [f"- subject   {key[2]} {name} (and its materials)" for key, _id, name in self.subject_deletes]
+        lines += [f"+ material  {material(key)}" for key, _value in self.material_inserts]
+        for key, old, new in self.material_updates:
+            changes = ", ".join(
+                f"{label}: {a} -> {b}"
+                for label, a, b in zip(("url", "archive_chat_id", "archive_message_id"), old, new)
+                if a != b
+            )
+            lines.append(f"~ material  {material(key)} {changes}")
+        lines += [f"- material  {material(key)}" for key, _id in self.material_deletes]
+        lines += [f"! skipped   {entry}" for entry in self.skipped]
+        return lines
+
+
+def _desired(data: dict, subject_codes: dict[tuple[str, str, str], SubjectKey]):
+    """Flatten ``data`` into name-keyed rows. ``subject_codes`` maps existing
+    (level, term, subject name) to subject keys, for materials of subjects the
+    file does not list in its structure."""
+
+    levels, terms = {}, {}
+    subjects: dict[SubjectKey, str] = {}
+    by_name = dict(subject_codes)
+    for level in data.get("structure", {}).get("levels", []):
+        levels[level["name"]] = None
+        for term in level.get("terms", []):
+            terms[term["name"]] = None
+            for s in term.get("subjects", []):
+                if s["code"].strip() == "---":
+                    continue
+                key = (level["name"], term["name"], s["code"])
+                subjects[key] = s["name"]
+                by_name[(level["name"], term["name"], s["name"])] = key
+    year_names = data.get("years", {})
+    people = data.get("lecturers", {})
+    lecturers = {info["name"]: info["role"] for info in people.values()}
+
+    materials: dict[MaterialKey, MaterialValue] = {}
+    covered: set[SubjectKey] = set()
+    skipped = []
+    for entry in data.get("materials", []):
+        subject = by_name.get((entry["level"], entry["term"], entry["subject"]))
+        if subject is None:
+            skipped.append(f"{entry['subject']} ({entry['level']}/{entry['term']}): unknown subject")
+            continue
+        covered.add(subject)
+        for item in entry.get("items", []):
+            person = people.get(item.get("person"))
+            key = (
+                subject,
+                item["section"],
+                item["kind"],
+                item["title"],
+                year_names.get(item.get("year")),
+                person["name"] if person else None,
+            )
+            materials[key] = (item.get("url"), item.get("archive_chat_id"), item.get("archive_message_id"))
+    return list(levels), list(terms), list(year_names.values()), lecturers, subjects, materials, covered, skipped
+
+
+async def plan_sync(db, data: dict, *, prune: bool = False) -> SyncPlan:
+    """Diff ``data`` against the database without writing anything."""
+
+    current = await db.natural_keys()
+    level_names = {_id: name for name, _id in current["levels"].items()}
+    term_names = {_id: name for name, _id in current["terms"].items()}
+    year_names = {_id: name for name, _id in current["years"].items()}
+    lecturer_names = {_id: name for name, (_id, _role) in current["lecturers"].items()}
+
+    subjects_now: dict[SubjectKey, tuple[int, str]] = {}
+    subject_keys: dict[int, SubjectKey] = {}
+    subject_codes: dict[tuple[str, str, str], SubjectKey] = {}
+    for (level_id, term_id, code), (_id, name) in current["subjects"].items():
+        key = (level_names.get(level_id, ""), term_names.get(term_id, ""), code)
+        subjects_now[key] = (_id, name)
+        subject_keys[_id] = key
+        subject_codes[(key[0], key[1], name)] = key
+
+    materials_now: dict[MaterialKey, tuple] = {}
+    for (subject_id, section, category, title, year_id, lecturer_id), row in current["materials"].items():
+        subject = subject_keys.get(subject_id)
+        if subject is None:
+            continue  # orphaned row: not part of any subject the data can describe
+        key = (subject, section, category, title, year_names.get(year_id), lecturer_names.get(lecturer_id))
+        materials_now[key] = row
+
+    levels, terms, years, lecturers, subjects, materials, covered, skipped = _desired(data, subject_codes)
+    plan = SyncPlan(skipped=skipped)
+    plan.ids = {
+        "levels": dict(current["levels"]),
+        "terms": dict(current["terms"]),
+        "years": dict(current["years"]),
+        "lecturers": {name: _id for name, (_id, _role) in current["lecturers"].items()},
+        "subjects": {key: _id for key, (_id, _name) in subjects_now.items()},
+    }
+    plan.levels = [name for name in levels if name not in current["levels"]]
+    plan.terms = [name for name in terms if name not in current["terms"]]
+    plan.years = [name for name in years if name not in current["years"]]
+    plan.lecturers = [
+        (name, role) for name, role in lecturers.items()
+        if name not in current["lecturers"] or current["lecturers"][name][1] != role
+    ]
+
+    for key, name in subjects.items():
+        existing = subjects_now.get(key)
+        if existing is None:
+            plan.subject_inserts.append((key, name))
+        elif existing[1] != name:
+            plan.subject_updates.append((key, existing[1], name))
+    for key, value in materials.items():
+        existing = materials_now.get(key)
+        if existing is None:
+            plan.material_inserts.append((key, value))
+        elif tuple(existing[1:]) != value:
+            plan.material_updates.append((key, tuple(existing[1:]), value))
+
+    if prune:
+        plan.subject_deletes = [
+            (key, _id, name) for key, (_id, name) in subjects_now.items()
+            if key not in subjects and key not in covered
+        ]
+        # materials of deleted subjects go with them
+        deleted = {key for key, _id, _name in plan.subject_deletes}
+        plan.material_deletes = [
+            (key, row[0]) for key, row in materials_now.items()
+            if key[0] not in deleted and key not in materials
+        ]
+    return plan
+
+
+async def apply_sync(db, plan: SyncPlan) -> dict[str, int]:
+    """Write ``plan`` in a single transaction; return the change counts."""
+
+    ids = plan.ids
+    async with db.transaction():
+        levels = {**ids["levels"], **await db.upsert_levels(plan.levels)}
+        terms = {**ids["terms"], **await db.upsert_terms(plan.terms)}
+        years = {**ids["years"], **await db.upsert_years(plan.years)}
+        lecturers = {**ids["lecturers"], **await db.upsert_lecturers(plan.lecturers)}
+
+        rows = [
+            (code, name, levels[level], terms[term])
+            for (level, term, code), name in plan.subject_inserts
+        ] + [
+            (code, new, levels[level], terms[term])
+            for (level, term, code), _old, new in plan.subject_updates
+        ]
+        by_ids = await db.upsert_subjects(rows)
+        subject_ids = dict(ids["subjects"])
+        for (level, term, code) in [key for key, _name in plan.subject_inserts]:
+            subject_ids[(level, term, code)] = by_ids[(levels[level], terms[term], code)]
+
+        def material_row(key: MaterialKey, value: MaterialValue) -> tuple:
+            subject, section, category, title, year, lecturer = key
+            return (
+                subject_ids[subject], section, category, title, value[0],
+                years[year] if year else None, lecturers[lecturer] if lecturer else None,
+                value[1], value[2],
+            )
+
+        await db.upsert_materials(
+            [material_row(key, value) for key, value in plan.material_inserts]
+            + [material_row(key, new) for key, _old, new in plan.material_updates]
+        )
+        await db.delete_materials(_id for _key, _id in plan.material_deletes)
+        await db.delete_subjects(_id for _key, _id, _name in plan.subject_deletes)
+    return plan.counts()
+
+
+__all__ = ["SyncPlan", "apply_sync", "plan_sync"]
@@ -0,0 +1,315 @@
+"""Group commit for the writer connection.
+
+Committing every small write on its own costs a journal sync per write and
+holds the write lock for each one. :class:`WriteQueue` funnels all writes on
+one connection through a single writer task instead:
+
+* Callers submit an operation (:meth:`WriteQueue.execute`,
+  :meth:`WriteQueue.executemany` or any coroutine function via
+  :meth:`WriteQueue.run`) and await its result. The result only arrives
+  after the transaction holding the operation has committed.
+* The writer opens a transaction for the first queued operation and keeps
+  running further ones as they arrive, until ``max_batch`` operations are in
+  it or ``max_delay`` seconds have passed since the first one. It then
+  commits once for the whole batch.
+* A failing write is rolled back alone and its error goes to its caller;
+  the rest of the batch still commits. SQLite already undoes a failed
+  single statement (:meth:`WriteQueue.execute`), so only multi-statement
+  operations run inside a ``SAVEPOINT``, one at a time. Consecutive single
+  statements are started together instead: each awaited call is a round
+  trip to aiosqlite's thread, which costs more than the commit itself on a
+  fast disk.
+
+Callers that need several statements and reads in one transaction (the bulk
+upserts of :class:`~bot.db.connection.Database`) take the connection with
+:meth:`WriteQueue.exclusive`. The writer commits its open batch, hands the
+connection over and waits until the block ends.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+Operation = Callable[[aiosqlite.Connection], Awaitable[Any]]
+
+
+class _Write:
+    __slots__ = ("operation", "future", "enqueued", "atomic")
+
+    def __init__(self, operation: Operation, future: asyncio.Future, enqueued: float, atomic: bool) -> None:
+        self.operation = operation
+        self.future = future
+        self.enqueued = enqueued
+        # a single statement: SQLite rolls it back by itself when it fails
+        self.atomic = atomic
+
+
+class _Exclusive:
+    __slots__ = ("granted", "released")
+
+    def __init__(self, granted: asyncio.Future) -> None:
+        self.granted = granted
+        self.released = asyncio.Event()
+
+
+class WriteQueue:
+    """One writer task that runs queued writes and commits them in batches."""
+
+    def __init__(
+        self,
+        conn: aiosqlite.Connection,
+        *,
+        max_batch: int = 64,
+        max_delay: float = 0.005,
+        on_commit: Callable[[], None] | None = None,
+    ) -> None:
+        if max_batch < 1 or max_delay < 0:
+            raise ValueError("max_batch must be >= 1 and max_delay >= 0")
+        self.conn = conn
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.on_commit = on_commit
+        self._pending: deque[_Write | _Exclusive] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        # Metrics
+        self.ops = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.commit_seconds = 0.0
+        self.max_commit_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.exclusive_grants = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Commit everything already queued, then stop the writer."""
+
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
+
+    # ------------------------------------------------------------------
+    # Submitting writes
+    # ------------------------------------------------------------------
+    def submit(self, operation: Operation, *, atomic: bool = False) -> asyncio.Future:
+        """Queue ``operation``; the future resolves once it is committed.
+
+        Pass ``atomic=True`` only for operations that run a single statement.
+        """
+
+        if self._task is None or self._closing:
+            raise RuntimeError("WriteQueue is not running")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(_Write(operation, future, loop.time(), atomic))
+        self._wakeup.set()
+        return future
+
+    async def run(self, operation: Operation) -> Any:
+        return await self.submit(operation)
+
+    async def execute(self, sql: str, params: Iterable[Any] = ()) -> int:
+        """Run one statement; return its row count once committed."""
+
+        params = tuple(params)
+
+        async def operation(conn: aiosqlite.Connection) -> int:
+            cursor = await conn.execute(sql, params)
+            return cursor.rowcount
+
+        return await self.submit(operation, atomic=True)
+
+    async def executemany(self, sql: str, rows: Iterable[Iterable[Any]]) -> int:
+        rows = [tuple(r) for r in rows]
+
+        async def operation(conn: aiosqlite.Connection) -> int:
+            cursor = await conn.executemany(sql, rows)
+            count = cursor.rowcount
+            await cursor.close()
+            return count
+
+        return await self.submit(operation)
+
+    @asynccontextmanager
+    async def exclusive(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Hold the connection between batches; the caller commits itself."""
+
+        if self._task is None or self._closing:
+            raise RuntimeError("WriteQueue is not running")
+        turn = _Exclusive(asyncio.get_running_loop().create_future())
+        self._pending.append(turn)
+        self._wakeup.set()
+        try:
+            await turn.granted
+            yield self.conn
+        finally:
+            turn.released.set()
+
+    # ------------------------------------------------------------------
+    # Writer
+    # ------------------------------------------------------------------
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            head = self._pending[0]
+            if isinstance(head, _Exclusive):
+                self._pending.popleft()
+                await self._hand_over(head)
+                continue
+            await self._batch(loop)
+
+    async def _hand_over(self, turn: _Exclusive) -> None:
+        if turn.granted.cancelled():
+            return
+        self.exclusive_grants += 1
+        turn.granted.set_result(None)
+        await turn.released.wait()
+
+    async def _batch(self, loop: asyncio.AbstractEventLoop) -> None:
+        conn = self.conn
+        # every write taken from the queue for this transaction, with its result
+        taken: list[_Write] = []
+        batch: list[tuple[_Write, Any]] = []
+        deadline = self._pending[0].enqueued + self.max_delay
+        await conn.execute("BEGIN")
+        try:
+            while len(taken) < self.max_batch:
+                if not self._pending:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0 or self._closing:
+                        break
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    continue
+                head = self._pending[0]
+                if isinstance(head, _Exclusive):
+                    break
+                if head.atomic:
+                    await self._run_statements(taken, batch)
+                    continue
+                write = self._pending.popleft()
+                if write.future.cancelled():
+                    continue
+                taken.append(write)
+                await conn.execute("SAVEPOINT write_queue_op")
+                try:
+                    result = await write.operation(conn)
+                except Exception as exc:
+                    await conn.execute("ROLLBACK TO write_queue_op")
+                    await conn.execute("RELEASE write_queue_op")
+                    self._fail(write, exc)
+                    continue
+                await conn.execute("RELEASE write_queue_op")
+                batch.append((write, result))
+            started = loop.time()
+            await conn.commit()
+        except BaseException as exc:
+            if conn.in_transaction:
+                await conn.rollback()
+            logger.exception("Write batch of %d operations rolled back", len(taken))
+            error = exc if isinstance(exc, Exception) else RuntimeError("write cancelled")
+            for write in taken:
+                if not write.future.done():
+                    write.future.set_exception(error)
+            if not isinstance(exc, Exception):
+                raise
+            return
+
+        now = loop.time()
+        commit = now - started
+        self.batches += 1
+        self.ops += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self.commit_seconds += commit
+        self.max_commit_seconds = max(self.max_commit_seconds, commit)
+        if batch and self.on_commit is not None:
+            self.on_commit()
+        for write, result in batch:
+            waited = now - write.enqueued
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            if not write.future.done():
+                write.future.set_result(result)
+
+    async def _run_statements(self, taken: list[_Write], batch: list[tuple[_Write, Any]]) -> None:
+        """Run the single-statement writes at the head of the queue together.
+
+        aiosqlite executes calls in the order they are made, so starting them
+        all before awaiting any keeps queue order while paying one round trip
+        to its thread for the group instead of one per statement.
+        """
+
+        writes = []
+        while self._pending and len(taken) + len(writes) < self.max_batch:
+            head = self._pending[0]
+            if isinstance(head, _Exclusive) or not head.atomic:
+                break
+            self._pending.popleft()
+            if not head.future.cancelled():
+                writes.append(head)
+        taken.extend(writes)
+        results = await asyncio.gather(*(w.operation(self.conn) for w in writes), return_exceptions=True)
+        if not self.conn.in_transaction:
+            # errors such as SQLITE_FULL roll back the whole transaction
+            raise next((r for r in results if isinstance(r, BaseException)), RuntimeError("transaction rolled back"))
+        for write, result in zip(writes, results):
+            if isinstance(result, BaseException):
+                self._fail(write, result)
+            else:
+                batch.append((write, result))
+
+    def _fail(self, write: _Write, exc: BaseException) -> None:
+        self.failed += 1
+        if not write.future.done():
+            write.future.set_exception(exc)
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._pending),
+            "ops": self.ops,
+            "failed": self.failed,
+            "batches": self.batches,
+            "mean_batch": round(self.ops / self.batches, 1) if self.batches else 0,
+            "max_batch": self.max_batch_seen,
+            "mean_commit_ms": round(self.commit_seconds / self.batches * 1000, 2) if self.batches else 0,
+            "max_commit_ms": round(self.max_commit_seconds * 1000, 2),
+            "mean_latency_ms": round(self.wait_seconds / self.ops * 1000, 2) if self.ops else 0,
+            "max_latency_ms": round(self.max_wait_seconds * 1000, 2),
+            "exclusive_grants": self.exclusive_grants,
+        }
+
+
+__all__ = ["WriteQueue"]
@@ -0,0 +1,90 @@
+"""Compact share codes for navigation paths (``/start <payload>`` deep links).
+
+A payload is a ``-`` separated list of tagged base36 numbers::
+
+    s<subject>[-c<section>[-l<lecturer>][-y<year>][-m<lecture>]]
+
+``c`` is the position of the section in :data:`SECTION_CODES` and ``m`` the
+id of the first material of the lecture title (``Database.get_lecture_key``).
+Ids are never reused, so a link keeps naming the same lecture when other
+titles are added or deleted; if that material is gone the link stops at the
+screen above the lecture instead of opening another one. Level and term are
+not encoded: they follow from the subject.
+
+Telegram limits start parameters to 64 characters from ``[A-Za-z0-9_-]``;
+a full path with six-digit ids is about 25 characters.
+"""
+
+from __future__ import annotations
+
+import re
+
+from .models import DeepLink
+
+# Order is part of the format: append new sections, never reorder.
+SECTION_CODES = ("theory", "discussion", "lab", "syllabus", "apps")
+
+MAX_PAYLOAD = 64
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+_TOKEN_RE = re.compile(r"([sclym])([0-9a-z]{1,12})")
+
+
+def to_base36(number: int) -> str:
+    if number < 0:
+        raise ValueError("negative ids cannot be encoded")
+    digits = []
+    while True:
+        number, rem = divmod(number, 36)
+        digits.append(_DIGITS[rem])
+        if not number:
+            return "".join(reversed(digits))
+
+
+def encode_link(link: DeepLink) -> str:
+    """Encode ``link`` as a start payload."""
+
+    parts = [f"s{to_base36(link.subject_id)}"]
+    if link.section is not None:
+        parts.append(f"c{to_base36(SECTION_CODES.index(link.section))}")
+        if link.lecturer_id is not None:
+            parts.append(f"l{to_base36(link.lecturer_id)}")
+        if link.year_id is not None:
+            parts.append(f"y{to_base36(link.year_id)}")
+        if link.lecture is not None:
+            parts.append(f"m{to_base36(link.lecture)}")
+    return "-".join(parts)
+
+
+def decode_link(payload: str) -> DeepLink | None:
+    """Parse a start payload; ``None`` if it is not a well-formed share code."""
+
+    payload = (payload or "").strip().lower()
+    if not payload or len(payload) > MAX_PAYLOAD:
+        return None
+    values: dict[str, int] = {}
+    for part in payload.split("-"):
+        match = _TOKEN_RE.fullmatch(part)
+        if match is None or match[1] in values:
+            return None
+        values[match[1]] = int(match[2], 36)
+
+    if "s" not in values:
+        return None
+    if "c" not in values:
+        # the deeper filters only make sense inside a section
+        if len(values) > 1:
+            return None
+        return DeepLink(subject_id=values["s"])
+    if values["c"] >= len(SECTION_CODES):
+        return None
+    return DeepLink(
+        subject_id=values["s"],
+        section=SECTION_CODES[values["c"]],
+        lecturer_id=values.get("l"),
+        year_id=values.get("y"),
+        lecture=values.get("m"),
+    )
+
+
+__all__ = ["MAX_PAYLOAD", "SECTION_CODES", "decode_link", "encode_link", "to_base36"]
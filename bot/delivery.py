@@ -0,0 +1,173 @@
+# delivery.py
+# إرسال المواد بأقل عدد من الرسائل بدل رسالة لكل ملف:
+# - الروابط تُجمع في رسائل HTML (العنوان رابط للملف) لا تتجاوز حد Telegram (4096 حرفًا)،
+#   فتصنيف فيه 40 امتحانًا يصبح رسالة أو اثنتين بدل 40 استدعاء (وتجنّب RetryAfter).
+# - تصنيفات الصور والمستندات: الملفات التي يستطيع Telegram جلبها من الرابط مباشرة (صور، PDF/ZIP)
+#   تُرسل كمجموعات وسائط (حتى 10 في الاستدعاء). إن رفض Telegram المجموعة تُرسل كروابط.
+# - المواد المؤرشفة (رسالة في قناة الأرشيف) تُنسخ كما هي بـ copyMessages: حتى 100 ملف في الاستدعاء،
+#   بلا إعادة رفع ولا تنزيل من خارج Telegram. ما لا مرجع له يُرسل كما سبق.
+# - الرد يمر عبر update.message فيعمل في وضعي Reply والأزرار المضمّنة؛ في الوضع المضمّن
+#   تُرسل شاشة التنقل التالية بعد الملفات في رسالة جديدة أسفلها.
+
+from html import escape
+
+from telegram import InputMediaDocument, InputMediaPhoto, LinkPreviewOptions
+from telegram.constants import MessageLimit, ParseMode
+from telegram.error import BadRequest
+
+from .config import ARCHIVE_CHANNEL_ID
+from .inline import InlineMessage
+
+MESSAGE_LIMIT = MessageLimit.MAX_TEXT_LENGTH      # 4096
+CAPTION_LIMIT = MessageLimit.CAPTION_LENGTH       # 1024
+MEDIA_GROUP_LIMIT = 10
+COPY_LIMIT = 100                                  # copyMessages: 1-100 رسالة
+
+# تصنيفات تُرسل ملفاتها كوسائط إن أمكن
+IMAGE_CATEGORIES = {"board_images", "mind_map"}
+DOCUMENT_CATEGORIES = {"lecture", "slides", "exam", "booklet", "summary", "notes", "transcript"}
+
+# ما يجلبه Telegram من رابط HTTP (sendPhoto / sendDocument)
+_PHOTO_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+_DOCUMENT_EXTENSIONS = (".pdf", ".zip")
+
+NO_PREVIEW = LinkPreviewOptions(is_disabled=True)
+
+
+def _length(text: str) -> int:
+    """الطول كما يحسبه Telegram (وحدات UTF-16)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def format_entry(mat, limit: int = MESSAGE_LIMIT) -> str:
+    """سطر HTML لمادة واحدة: العنوان رابطًا للملف، لا يتجاوز limit."""
+    if not mat.url:
+        head, tail = "📄 ", " (لا يوجد رابط)"
+    else:
+        head, tail = f'📄 <a href="{escape(mat.url, quote=True)}">', "</a>"
+    title = escape(mat.title)
+    room = limit - _length(head) - _length(tail)
+    if _length(title) > room:
+        # عنوان ضخم: نقتطع النص الخام ثم نرمّزه، فلا يُقطع كيان HTML ويبقى الرابط.
+        # الحرف يصير 6 وحدات على الأكثر بعد الترميز (&quot;) فلا نقتطع أكثر من اللازم.
+        raw = mat.title
+        while raw and _length(title) > room:
+            raw = raw[: len(raw) - max(1, (_length(title) - room) // 6)]
+            title = escape(raw) + "…"
+    return f"{head}{title}{tail}"
+
+
+def pack_entries(entries, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """يجمع الأسطر (كل منها لا يتجاوز limit، انظر format_entry) في أقل عدد من الرسائل."""
+    messages: list[str] = []
+    current: list[str] = []
+    size = 0
+    for entry in entries:
+        n = _length(entry)
+        if current and size + 1 + n > limit:
+            messages.append("\n".join(current))
+            current, size = [], 0
+        size += n + (1 if current else 0)
+        current.append(entry)
+    if current:
+        messages.append("\n".join(current))
+    return messages
+
+
+def archive_ref(mat, default_chat_id: int | None = ARCHIVE_CHANNEL_ID) -> tuple[int, int] | None:
+    """(المحادثة، الرسالة) للملف في قناة الأرشيف، أو None إن لم يكن مؤرشفًا."""
+    if not mat.archive_message_id:
+        return None
+    chat_id = mat.archive_chat_id or default_chat_id
+    return (chat_id, mat.archive_message_id) if chat_id else None
+
+
+def plan_copies(mats, default_chat_id: int | None = ARCHIVE_CHANNEL_ID):
+    """يقسم المواد: (دفعات نسخ [(from_chat_id, [المواد])]، المواد بلا مرجع).
+
+    copyMessages يقبل رسائل محادثة واحدة بترتيب تصاعدي، فتُرتّب كل قناة حسب رقم الرسالة
+    (وهو ترتيب رفعها للأرشيف) وتُقسّم إلى دفعات من 100.
+    """
+    by_chat: dict[int, dict[int, object]] = {}
+    rest = []
+    for mat in mats:
+        ref = archive_ref(mat, default_chat_id)
+        if ref is None:
+            rest.append(mat)
+        else:
+            by_chat.setdefault(ref[0], {}).setdefault(ref[1], mat)
+    batches = []
+    for chat_id, messages in by_chat.items():
+        ordered = [messages[mid] for mid in sorted(messages)]
+        for i in range(0, len(ordered), COPY_LIMIT):
+            batches.append((chat_id, ordered[i:i + COPY_LIMIT]))
+    return batches, rest
+
+
+def _media_kind(mat) -> str | None:
+    url = (mat.url or "").lower().split("?", 1)[0]
+    if mat.category in IMAGE_CATEGORIES and url.endswith(_PHOTO_EXTENSIONS):
+        return "photo"
+    if mat.category in DOCUMENT_CATEGORIES and url.endswith(_DOCUMENT_EXTENSIONS):
+        return "document"
+    return None
+
+
+def plan_delivery(mats):
+    """يقسم المواد: (مجموعات صور، مجموعات مستندات، مواد تُرسل كروابط) بالترتيب الأصلي."""
+    photos, documents, links = [], [], []
+    for mat in mats:
+        kind = _media_kind(mat)
+        (photos if kind == "photo" else documents if kind == "document" else links).append(mat)
+    groups = {"photo": [], "document": []}
+    for kind, items in (("photo", photos), ("document", documents)):
+        for i in range(0, len(items), MEDIA_GROUP_LIMIT):
+            chunk = items[i:i + MEDIA_GROUP_LIMIT]
+            # مجموعة الوسائط تحتاج عنصرين على الأقل؛ الملف المنفرد يُرسل كرابط
+            if len(chunk) >= 2:
+                groups[kind].append(chunk)
+            else:
+                links.extend(chunk)
+    if len(links) != len(mats):
+        order = {id(m): i for i, m in enumerate(mats)}
+        links.sort(key=lambda m: order[id(m)])
+    return groups["photo"], groups["document"], links
+
+
+def _input_media(kind: str, mat):
+    caption = escape(mat.title)[:CAPTION_LIMIT]
+    cls = InputMediaPhoto if kind == "photo" else InputMediaDocument
+    return cls(mat.url, caption=caption, parse_mode=ParseMode.HTML)
+
+
+async def send_materials(update, context, mats) -> int:
+    """يرسل المواد للمحادثة بأقل عدد من الاستدعاءات؛ يرجع عدد الاستدعاءات."""
+    message = update.message
+    batches, mats = plan_copies(mats)
+    calls = 0
+    for from_chat_id, group in batches:
+        calls += 1
+        try:
+            await context.bot.copy_messages(
+                update.effective_chat.id, from_chat_id, [mat.archive_message_id for mat in group]
+            )
+        except BadRequest:
+            # القناة غير متاحة للبوت أو حُذفت رسائلها: نرسلها بالروابط
+            mats.extend(group)
+            continue
+        if isinstance(message, InlineMessage):
+            # النسخ لا يمر عبر الرسالة: الشاشة التالية تُرسل أسفل الملفات لا في رسالة التنقل القديمة
+            message.detach()
+    photo_groups, document_groups, links = plan_delivery(mats)
+    for kind, groups in (("photo", photo_groups), ("document", document_groups)):
+        for group in groups:
+            calls += 1
+            try:
+                await message.reply_media_group([_input_media(kind, mat) for mat in group])
+            except BadRequest:
+                # رابط لا يستطيع Telegram جلبه (حجم/نوع/خادم): نرسلها روابط
+                links.extend(group)
+    for text in pack_entries(format_entry(mat) for mat in links):
+        calls += 1
+        await message.reply_text(text, parse_mode=ParseMode.HTML, link_preview_options=NO_PREVIEW)
+    return calls
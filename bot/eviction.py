@@ -0,0 +1,132 @@
+# eviction.py
+# إخراج المستخدمين الخاملين من الذاكرة:
+# - بدون ذلك يبقى user_data (حالة التنقل) ومفتاح المحادثة في ConversationHandler لكل من ضغط /start يومًا.
+# - نسجّل آخر نشاط لكل مستخدم (معالج في المجموعة -1 يعمل قبل بقية المعالجات) بترتيب LRU.
+# - كل interval ثانية: نُخرج من تجاوز خموله ttl، ثم الأقدم نشاطًا حتى لا يزيد المقيمون عن max_users.
+# - مع الحفظ (SQLitePersistence) تُكتب الحالة قبل الإخراج وتُستعاد تلقائيًا عند أول رسالة تالية
+#   (refresh_user_data)؛ وبدونه يبدأ المستخدم من القائمة الرئيسية.
+# - مفتاح المحادثة يُحذف ببساطة: الحالة تُشتق من مكدس التنقل، والرسائل نقاط دخول (انظر main.py).
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# لا يُخرج مستخدم نشط خلال هذه الثواني (قد يكون تحديثه قيد المعالجة)
+MIN_IDLE_SECONDS = 5.0
+
+
+class IdleEvictor:
+    """يتتبع نشاط المستخدمين ويُخرج الخاملين (TTL) والزائدين عن الحد (LRU)."""
+
+    def __init__(
+        self,
+        application,
+        *,
+        ttl: float = 1800.0,
+        max_users: int = 0,
+        interval: float = 60.0,
+        conversations=(),
+        clock=time.monotonic,
+    ) -> None:
+        if ttl < 0 or max_users < 0 or interval <= 0:
+            raise ValueError("ttl/max_users must be >= 0 and interval > 0")
+        self.application = application
+        self.ttl = ttl
+        self.max_users = max_users
+        self.interval = interval
+        self.conversations = list(conversations)
+        self._clock = clock
+        # user_id -> (آخر نشاط، chat_id) — الأقدم أولًا
+        self._seen: "OrderedDict[int, tuple[float, int | None]]" = OrderedDict()
+        self._task: asyncio.Task | None = None
+        self.sweeps = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+
+    # ------------------------------------------------------------------
+    # تسجيل النشاط
+    # ------------------------------------------------------------------
+    async def touch(self, update, context=None) -> None:
+        """معالج TypeHandler(Update) في المجموعة -1: يحدّث آخر نشاط للمستخدم."""
+        user = getattr(update, "effective_user", None)
+        if user is None:
+            return
+        chat = getattr(update, "effective_chat", None)
+        self._seen[user.id] = (self._clock(), chat.id if chat else None)
+        self._seen.move_to_end(user.id)
+
+    # ------------------------------------------------------------------
+    # الإخراج
+    # ------------------------------------------------------------------
+    def sweep(self, now: float | None = None) -> int:
+        """يُخرج الخاملين والزائدين عن الحد؛ يرجع عددهم. متزامن عمدًا (لا تداخل مع التحديثات)."""
+        now = self._clock() if now is None else now
+        victims: list[int] = []
+        idle = 0
+        for user_id, (seen, _chat) in self._seen.items():
+            if now - seen < MIN_IDLE_SECONDS:
+                break
+            if self.ttl and now - seen >= self.ttl:
+                idle += 1
+            elif not self.max_users or len(self._seen) - len(victims) <= self.max_users:
+                break
+            victims.append(user_id)
+        for user_id in victims:
+            self._evict(user_id)
+        self.sweeps += 1
+        self.evicted_idle += idle
+        self.evicted_lru += len(victims) - idle
+        if victims:
+            logger.info("Evicted %d idle users (%d resident)", len(victims), len(self.application.user_data))
+        return len(victims)
+
+    def _evict(self, user_id: int) -> None:
+        _seen, chat_id = self._seen.pop(user_id)
+        app = self.application
+        data = app.user_data.get(user_id)
+        spill = getattr(app.persistence, "spill", None)
+        if data and spill is not None:
+            spill(user_id, data)
+        app.drop_user_data(user_id)
+        # ConversationHandler لا يوفّر واجهة عامة لحذف مفتاح محادثة
+        key = (chat_id, user_id)
+        for conv in self.conversations:
+            conv._conversations.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # التشغيل في الخلفية
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        if self._task is None and (self.ttl or self.max_users):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Idle-user sweep failed")
+
+    def stats(self) -> dict:
+        return {
+            "resident_users": len(self.application.user_data),
+            "tracked_users": len(self._seen),
+            "conversations": sum(len(conv._conversations) for conv in self.conversations),
+            "sweeps": self.sweeps,
+            "evictions": self.evicted_idle + self.evicted_lru,
+            "evicted_idle": self.evicted_idle,
+            "evicted_lru": self.evicted_lru,
+        }
@@ -11,6 +11,7 @@ from .lecturer_list import render_lecturer_list
 from .lecture_list import render_lecture_list
 from .year_category_menu import render_year_category_menu
 from .lecture_category_menu import render_lecture_category_menu
+from .search import render_search, handle_search_start, handle_search_query
 
 from .back_to_levels import handle_back_to_levels
 from .back_to_subjects import handle_back_to_subjects
@@ -28,14 +29,18 @@ from .lecturer_list_actions import handle_lecturer_list_actions
 from .year_category_menu_actions import handle_year_category_menu_actions
 from .lecture_title_choice import handle_lecture_title_choice
 from .lecture_category_choice import handle_lecture_category_choice
+from .fuzzy_jump import handle_fuzzy_jump, jump_to_subject
+from .deep_link import open_deep_link, handle_share
+from .inline_query import handle_inline_query
 
 __all__ = [
     'render_level', 'render_term_list', 'render_term', 'render_subject', 'render_subject_list',
     'render_section', 'render_year', 'render_lecturer', 'render_year_list', 'render_lecturer_list',
-    'render_lecture_list', 'render_year_category_menu', 'render_lecture_category_menu',
+    'render_lecture_list', 'render_year_category_menu', 'render_lecture_category_menu', 'render_search',
     'handle_back_to_levels', 'handle_back_to_subjects', 'handle_levels_menu', 'handle_back_main_menu',
     'handle_smart_back', 'handle_choose_level', 'handle_choose_term', 'handle_term_menu_options',
     'handle_choose_subject', 'handle_choose_section', 'handle_section_filters', 'handle_choose_year_or_lecturer',
     'handle_lecturer_list_actions', 'handle_year_category_menu_actions', 'handle_lecture_title_choice',
-    'handle_lecture_category_choice'
+    'handle_lecture_category_choice', 'handle_search_start', 'handle_search_query',
+    'handle_fuzzy_jump', 'jump_to_subject', 'open_deep_link', 'handle_share', 'handle_inline_query'
 ]
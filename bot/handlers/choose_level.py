@@ -1,16 +1,18 @@
-from ..helpers import nav_set_level, nav_push_view, get_db
-from ..keyboards import generate_levels_keyboard, generate_terms_keyboard
+from ..helpers import nav_set_level, nav_push_view, nav_resolve_button, get_db
+from ..screens import levels_screen, terms_screen, send_screen
 
 async def handle_choose_level(update, context, text):
-    db = get_db(context)
-    levels = await db.get_levels()
-    levels_map = {name: _id for _id, name in levels}
-    if text in levels_map:
-        level_id = levels_map[text]
-        nav_set_level(context.user_data, text, level_id)
-        terms = await db.get_terms_by_level(level_id)
-        if not terms:
-            return await update.message.reply_text("لا توجد أترام لهذا المستوى حتى الآن.", reply_markup=generate_levels_keyboard(levels))
-        nav_push_view(context.user_data, "term_list")
-        return await update.message.reply_text("اختر الترم:", reply_markup=generate_terms_keyboard(terms))
-    return None
+    hit = nav_resolve_button(context.user_data, text)
+    if hit and hit[0] == "level":
+        level_id = hit[1]
+    else:
+        levels = await get_db(context).get_levels()
+        level_id = {name: _id for _id, name in levels}.get(text)
+        if level_id is None:
+            return None
+    nav_set_level(context.user_data, text, level_id)
+    screen = await terms_screen(context, level_id)
+    if not screen.buttons[1]:
+        return await send_screen(update, context, await levels_screen(context), "لا توجد أترام لهذا المستوى حتى الآن.")
+    nav_push_view(context.user_data, "term_list")
+    return await send_screen(update, context, screen)
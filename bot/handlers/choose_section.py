@@ -1,18 +1,11 @@
-from ..helpers import nav_set_section, get_db
-from ..keyboards import generate_section_filters_keyboard_dynamic, LABEL_TO_SECTION
+from ..helpers import nav_set_section, nav_get
+from ..keyboards import LABEL_TO_SECTION
+from ..screens import section_filters_screen, send_screen
 
 async def handle_choose_section(update, context, text):
     if text not in LABEL_TO_SECTION:
         return None
     section_code = LABEL_TO_SECTION[text]
     nav_set_section(context.user_data, text, section_code)
-    nav = context.user_data.get("nav", {})
-    subject_id = nav.get("data", {}).get("subject_id")
-    db = get_db(context)
-    years = await db.get_years_for_subject_section(subject_id, section_code)
-    lecturers = await db.get_lecturers_for_subject_section(subject_id, section_code)
-    lectures_exist = await db.has_lecture_category(subject_id, section_code)
-    return await update.message.reply_text(
-        "اختر طريقة التصفية:",
-        reply_markup=generate_section_filters_keyboard_dynamic(bool(years), bool(lecturers), lectures_exist),
-    )
+    subject_id = nav_get(context.user_data, "subject_id")
+    return await send_screen(update, context, await section_filters_screen(context, subject_id, section_code))
@@ -1,16 +1,17 @@
-from ..helpers import nav_get_ids, nav_set_term, get_db
-from ..keyboards import generate_terms_keyboard, generate_term_menu_keyboard_dynamic
+from ..helpers import nav_get_ids, nav_set_term, nav_resolve_button, get_db
+from ..screens import term_menu_screen, send_screen
 
 async def handle_choose_term(update, context, text):
     level_id, _ = nav_get_ids(context.user_data)
     if not level_id:
         return None
-    db = get_db(context)
-    terms = await db.get_terms_by_level(level_id)
-    terms_map = {name: _id for _id, name in terms}
-    if text in terms_map:
-        term_id = terms_map[text]
-        nav_set_term(context.user_data, text, term_id)
-        flags = await db.term_feature_flags(level_id, term_id)
-        return await update.message.reply_text("اختر:", reply_markup=generate_term_menu_keyboard_dynamic(flags))
-    return None
+    hit = nav_resolve_button(context.user_data, text)
+    if hit and hit[0] == "term":
+        term_id = hit[1]
+    else:
+        terms = await get_db(context).get_terms_by_level(level_id)
+        term_id = {name: _id for _id, name in terms}.get(text)
+        if term_id is None:
+            return None
+    nav_set_term(context.user_data, text, term_id)
+    return await send_screen(update, context, await term_menu_screen(context, level_id, term_id))
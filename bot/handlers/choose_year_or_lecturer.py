@@ -2,57 +2,56 @@ from ..keyboards import (
     generate_year_category_menu_keyboard,
     generate_lecturer_filter_keyboard,
 )
-from ..helpers import nav_set_year, nav_set_lecturer, nav_push_view, get_db
+from ..helpers import nav_set_year, nav_set_lecturer, nav_push_view, nav_resolve_button, get_db, nav_get, nav_label
+
+async def _open_year(update, context, db, text, year_id, subject_id, section_code, lecturer_id):
+    nav_set_year(context.user_data, text, year_id)
+    snap = await db.get_year_menu_snapshot(subject_id, section_code, year_id, lecturer_id=lecturer_id)
+    nav_push_view(context.user_data, "year_category_menu")
+    if lecturer_id:
+        lecturer_label = nav_label(context.user_data, "lecturer")
+        msg = f"المحاضر: {lecturer_label}\nالسنة: {text}\nاختر نوع المحتوى:"
+    else:
+        msg = f"السنة: {text}\nاختر نوع المحتوى:"
+    return await update.message.reply_text(
+        msg,
+        reply_markup=generate_year_category_menu_keyboard(snap.categories, snap.lectures_exist),
+    )
+
+async def _open_lecturer(update, context, db, text, lecturer_id, subject_id, section_code):
+    nav_set_lecturer(context.user_data, text, lecturer_id)
+    snap = await db.get_lecturer_snapshot(subject_id, section_code, lecturer_id)
+    return await update.message.reply_text(
+        f"المحاضر: {text}\nاختر خيارًا:",
+        reply_markup=generate_lecturer_filter_keyboard(bool(snap.years), snap.lectures_exist),
+    )
 
 async def handle_choose_year_or_lecturer(update, context, text):
     db = get_db(context)
-    nav = context.user_data.get("nav", {})
-    subject_id = nav.get("data", {}).get("subject_id")
-    section_code = nav.get("data", {}).get("section")
-    lecturer_id = nav.get("data", {}).get("lecturer_id")
+    subject_id = nav_get(context.user_data, "subject_id")
+    section_code = nav_get(context.user_data, "section")
+    lecturer_id = nav_get(context.user_data, "lecturer_id")
 
     if not (subject_id and section_code):
         return None
 
+    # الضغط على زر من آخر قائمة معروضة: لا حاجة لأي استعلام للتحقق
+    hit = nav_resolve_button(context.user_data, text)
+    if hit and hit[0] == "year":
+        return await _open_year(update, context, db, text, hit[1], subject_id, section_code, lecturer_id)
+    if hit and hit[0] == "lecturer":
+        return await _open_lecturer(update, context, db, text, hit[1], subject_id, section_code)
+
     if lecturer_id:
         years = await db.get_years_for_subject_section_lecturer(subject_id, section_code, lecturer_id)
-        years_map = {name: _id for _id, name in years}
-        if text in years_map:
-            year_id = years_map[text]
-            nav_set_year(context.user_data, text, year_id)
-            titles = await db.list_lecture_titles_by_lecturer_year(subject_id, section_code, lecturer_id, year_id)
-            lectures_exist = bool(titles)
-            cats = await db.list_categories_for_subject_section_year(subject_id, section_code, year_id, lecturer_id=lecturer_id)
-            nav_push_view(context.user_data, "year_category_menu")
-            lecturer_label = next((lbl for t, lbl in nav.get('stack', []) if t=='lecturer'), '')
-            return await update.message.reply_text(
-                f"المحاضر: {lecturer_label}\nالسنة: {text}\nاختر نوع المحتوى:",
-                reply_markup=generate_year_category_menu_keyboard(cats, lectures_exist),
-            )
     else:
         years = await db.get_years_for_subject_section(subject_id, section_code)
-        years_map = {name: _id for _id, name in years}
-        if text in years_map:
-            year_id = years_map[text]
-            nav_set_year(context.user_data, text, year_id)
-            titles = await db.list_lecture_titles_by_year(subject_id, section_code, year_id)
-            lectures_exist = bool(titles)
-            cats = await db.list_categories_for_subject_section_year(subject_id, section_code, year_id)
-            nav_push_view(context.user_data, "year_category_menu")
-            return await update.message.reply_text(
-                f"السنة: {text}\nاختر نوع المحتوى:",
-                reply_markup=generate_year_category_menu_keyboard(cats, lectures_exist),
-            )
+    years_map = {name: _id for _id, name in years}
+    if text in years_map:
+        return await _open_year(update, context, db, text, years_map[text], subject_id, section_code, lecturer_id)
 
     lecturers = await db.get_lecturers_for_subject_section(subject_id, section_code)
     lect_map = {lec.name: lec.id for lec in lecturers}
     if text in lect_map:
-        lecturer_id = lect_map[text]
-        nav_set_lecturer(context.user_data, text, lecturer_id)
-        years = await db.get_years_for_subject_section_lecturer(subject_id, section_code, lecturer_id)
-        lectures_exist = await db.list_lecture_titles_by_lecturer(subject_id, section_code, lecturer_id)
-        return await update.message.reply_text(
-            f"المحاضر: {text}\nاختر خيارًا:",
-            reply_markup=generate_lecturer_filter_keyboard(bool(years), bool(lectures_exist)),
-        )
+        return await _open_lecturer(update, context, db, text, lect_map[text], subject_id, section_code)
     return None
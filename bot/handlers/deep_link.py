@@ -0,0 +1,104 @@
+# deep_link.py
+# روابط مباشرة: /start <payload> يفتح مادة/قسمًا/محاضرة في تحديث واحد بدل ~7 ضغطات.
+# - صيغة الرمز في bot/deeplink.py (معرّفات مختصرة بالأساس 36).
+# - نبني مكدس التنقل كما لو ضغط المستخدم الأزرار بالترتيب (بما فيها شاشات القوائم)
+#   حتى يعمل زر "🔙 العودة" من الشاشة الهدف كالمعتاد.
+# - أي جزء غير صالح (حُذف أو تغيّر) نتوقف عند آخر جزء صالح قبله.
+# - /share يعطي رابط الشاشة الحالية لمشاركته.
+
+from ..deeplink import SECTION_CODES, decode_link, encode_link
+from ..models import DeepLink
+from ..helpers import (
+    get_db,
+    nav_get,
+    nav_go_subject,
+    nav_set_section,
+    nav_set_lecturer,
+    nav_set_year,
+    nav_set_lecture,
+    nav_push_view,
+)
+from ..keyboards import SECTION_LABELS
+
+
+async def _restore_path(context, link: DeepLink) -> bool:
+    """يبني المسار في user_data؛ يرجع False إن لم تعد المادة موجودة."""
+    db = get_db(context)
+    path = await db.get_subject_path(link.subject_id)
+    if path is None:
+        return False
+    user_data = context.user_data
+    nav_go_subject(user_data, path)
+
+    subject_id, section = path.subject_id, link.section
+    if section is None or section not in await db.get_available_sections_for_subject(subject_id):
+        return True
+    nav_set_section(user_data, SECTION_LABELS[section], section)
+
+    lecturer_id = None
+    if link.lecturer_id is not None:
+        lecturers = await db.get_lecturers_for_subject_section(subject_id, section)
+        lecturer = next((lec for lec in lecturers if lec.id == link.lecturer_id), None)
+        if lecturer is None:
+            return True
+        nav_push_view(user_data, "lecturer_list")
+        nav_set_lecturer(user_data, lecturer.name, lecturer.id)
+        lecturer_id = lecturer.id
+
+    if link.year_id is not None:
+        if lecturer_id:
+            years = await db.get_years_for_subject_section_lecturer(subject_id, section, lecturer_id)
+        else:
+            years = await db.get_years_for_subject_section(subject_id, section)
+        year_name = dict(years).get(link.year_id)
+        if year_name is None:
+            return True
+        nav_push_view(user_data, "year_list")
+        nav_set_year(user_data, year_name, link.year_id)
+        nav_push_view(user_data, "year_category_menu")
+
+    if link.lecture is not None:
+        title = await db.get_lecture_title(subject_id, section, link.lecture)
+        if title is None:
+            return True
+        nav_push_view(user_data, "lecture_list")
+        nav_set_lecture(user_data, title)
+        nav_push_view(user_data, "lecture_category_menu")
+    return True
+
+
+async def open_deep_link(update, context, payload: str):
+    """يفتح الشاشة التي يشير إليها payload ويعرضها؛ None إن كان الرمز غير صالح."""
+    from ..router import render_state
+    link = decode_link(payload)
+    if link is None or not await _restore_path(context, link):
+        return None
+    return await render_state(update, context)
+
+
+async def current_link(context) -> DeepLink | None:
+    """يحوّل مسار التنقل الحالي إلى DeepLink (None إن لم تُختر مادة بعد)."""
+    user_data = context.user_data
+    subject_id = nav_get(user_data, "subject_id")
+    if not subject_id:
+        return None
+    link = DeepLink(subject_id=subject_id)
+    section = nav_get(user_data, "section")
+    if section not in SECTION_CODES:
+        return link
+    link.section = section
+    link.lecturer_id = nav_get(user_data, "lecturer_id")
+    link.year_id = nav_get(user_data, "year_id")
+    title = nav_get(user_data, "lecture_title")
+    if title:
+        link.lecture = await get_db(context).get_lecture_key(subject_id, section, title)
+    return link
+
+
+async def handle_share(update, context):
+    """/share: رابط مباشر للشاشة الحالية."""
+    link = await current_link(context)
+    if link is None:
+        return await update.message.reply_text("افتح مادة أولًا ثم أرسل /share لمشاركة رابطها.")
+    url = f"https://t.me/{context.bot.username}?start={encode_link(link)}"
+    return await update.message.reply_text(f"🔗 رابط مباشر لهذه الصفحة:\n{url}")
@@ -0,0 +1,82 @@
+# fuzzy_jump.py
+# مطابقة تقريبية للنص الحر عندما لا يطابق أي زر:
+# - نبحث في فهرس الثلاثيات (FuzzyIndex) عن مادة (اسم/رمز) أو محاضر.
+# - تطابق واضح لمادة → ننتقل مباشرة لشاشة المادة (نبني المسار مستوى → ترم → مادة).
+# - تطابق واضح لمحاضر → ننتقل لمادته إن كانت واحدة، وإلا نعرض مواده كاقتراحات.
+# - غير ذلك نعرض أفضل المرشحين كأزرار "هل تقصد".
+
+from ..normalize import normalize_arabic
+from ..helpers import (
+    get_db,
+    get_fuzzy_index,
+    nav_go_subject,
+)
+from ..keyboards import generate_suggestions_keyboard
+
+# أقل درجة للانتقال المباشر، وأقل فارق عن المرشح الثاني
+JUMP_SCORE = 0.75
+JUMP_MARGIN = 0.1
+
+
+def _same_text(a: str, b: str) -> bool:
+    return normalize_arabic(a).strip().lower() == normalize_arabic(b).strip().lower()
+
+
+async def jump_to_subject(update, context, subject_id: int):
+    """يبني مسار التنقل حتى المادة ثم يعرض شاشتها."""
+    from ..main import render_state
+    path = await get_db(context).get_subject_path(subject_id)
+    if path is None:
+        return None
+    nav_go_subject(context.user_data, path)
+    return await render_state(update, context)
+
+
+async def _suggest(update, context, heading: str, items):
+    """items: [(kind, id, label), ...] تُعرض كأزرار."""
+    db = get_db(context)
+    labels = [label for _kind, _id, label in items]
+    # أسماء مكررة (نفس الاسم في أكثر من ترم): نميّزها بالرمز
+    for i, (kind, _id, label) in enumerate(items):
+        if kind == "subject" and labels.count(label) > 1:
+            path = await db.get_subject_path(_id)
+            if path is not None:
+                labels[i] = f"{path.subject_name} ({path.code})"
+    return await update.message.reply_text(heading, reply_markup=generate_suggestions_keyboard(labels))
+
+
+async def handle_fuzzy_jump(update, context, text):
+    text = (text or "").strip()
+    if len(text) < 2 or text.startswith("/"):
+        return None
+    db = get_db(context)
+    index = get_fuzzy_index(context)
+    await index.refresh(db)
+    matches = index.search(text, limit=6)
+    if not matches:
+        return None
+
+    exact = [m for m in matches if _same_text(m.label, text)]
+    best = matches[0]
+    if len(exact) == 1:
+        target = exact[0]
+    elif best.score >= JUMP_SCORE and (len(matches) == 1 or best.score - matches[1].score >= JUMP_MARGIN):
+        target = best
+    else:
+        return await _suggest(update, context, "🤔 هل تقصد:", [(m.kind, m.id, m.label) for m in matches])
+
+    if target.kind == "subject":
+        result = await jump_to_subject(update, context, target.id)
+        if result is None:
+            # حُذفت المادة ولم يُعد بناء الفهرس بعد
+            index.remove("subject", target.id)
+        return result
+
+    subjects = await db.get_subjects_for_lecturer(target.id)
+    if len(subjects) == 1:
+        return await jump_to_subject(update, context, subjects[0].id)
+    if not subjects:
+        return await update.message.reply_text(f"لا توجد مواد مسجلة للمحاضر: {target.label}")
+    return await _suggest(
+        update, context, f"👤 مواد {target.label}:", [("subject", s.id, s.name) for s in subjects]
+    )
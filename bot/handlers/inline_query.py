@@ -0,0 +1,93 @@
+# inline_query.py
+# البحث المضمّن: "@bot دوائر" في أي محادثة (مجموعة الدفعة مثلًا) يعرض المواد المطابقة لمشاركتها
+# دون إعادة توجيه. يتطلب تفعيل الوضع المضمّن للبوت من BotFather (/setinline).
+# - نفس البحث النصي (search_materials): عناوين المواد وأسماء المواد ورموزها وأسماء المحاضرين.
+# - الصفحات عبر offset: كل إجابة PAGE_SIZE نتيجة و next_offset للصفحة التالية.
+# - ذاكرة نتائج (QueryCache) بمفتاح الاستعلام المطبّع + الصفحة: كل حرف يكتبه الطالب استعلام جديد،
+#   والبادئات الشائعة ("د"، "دو"، "دوا"...) تتكرر بين الطلاب فتُجاب من الذاكرة.
+#   نفس المدة تُرسل كـ cache_time فيخزّن Telegram النتائج أيضًا ولا تصل الاستعلامات المكررة للبوت.
+
+from html import escape
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, InlineQueryResultArticle, InlineQueryResultDocument
+from telegram import InputTextMessageContent
+from telegram.constants import ParseMode
+
+from ..db.search import query_words
+from ..deeplink import encode_link
+from ..delivery import NO_PREVIEW, format_entry
+from ..helpers import get_db, get_inline_cache
+from ..keyboards import CATEGORY_TO_LABEL
+from ..models import DeepLink
+
+PAGE_SIZE = 20  # Telegram يقبل حتى 50 نتيجة في الإجابة
+
+# ما يقبله InlineQueryResultDocument كرابط (PDF و ZIP فقط)
+_DOCUMENT_TYPES = {".pdf": "application/pdf", ".zip": "application/zip"}
+
+
+def _mime_type(url: str | None) -> str | None:
+    path = (url or "").lower().split("?", 1)[0]
+    for extension, mime in _DOCUMENT_TYPES.items():
+        if path.endswith(extension):
+            return mime
+    return None
+
+
+def build_result(hit, bot_username: str | None):
+    """نتيجة مضمّنة لمادة: مستند إن كان رابطها PDF/ZIP، وإلا رسالة برابطها."""
+    category = CATEGORY_TO_LABEL.get(hit.category, hit.category)
+    description = f"{hit.subject_name} — {category}"
+    markup = None
+    if bot_username:
+        payload = encode_link(DeepLink(subject_id=hit.subject_id, section=hit.section))
+        markup = InlineKeyboardMarkup(
+            [[InlineKeyboardButton("📚 فتح المادة في البوت", url=f"https://t.me/{bot_username}?start={payload}")]]
+        )
+    mime = _mime_type(hit.url)
+    if mime:
+        return InlineQueryResultDocument(
+            id=str(hit.material_id),
+            document_url=hit.url,
+            title=hit.title,
+            mime_type=mime,
+            caption=f"📄 {escape(hit.title)}\n📚 {escape(description)}",
+            parse_mode=ParseMode.HTML,
+            description=description,
+            reply_markup=markup,
+        )
+    text = f"{format_entry(hit)}\n📚 {escape(description)}"
+    return InlineQueryResultArticle(
+        id=str(hit.material_id),
+        title=hit.title,
+        description=description,
+        input_message_content=InputTextMessageContent(
+            text, parse_mode=ParseMode.HTML, link_preview_options=NO_PREVIEW
+        ),
+        reply_markup=markup,
+    )
+
+
+async def handle_inline_query(update, context):
+    inline_query = update.inline_query
+    cache = get_inline_cache(context)
+    words = query_words(inline_query.query)
+    if not words:
+        return await inline_query.answer([], cache_time=int(cache.ttl))
+    try:
+        offset = max(int(inline_query.offset or 0), 0)
+    except ValueError:
+        offset = 0
+
+    db = get_db(context)
+    version = db.change_version
+    key = (" ".join(words), offset)
+    page = cache.get(key, version)
+    if page is None:
+        hits = await db.search_materials(" ".join(words), limit=PAGE_SIZE + 1, offset=offset)
+        results = tuple(build_result(hit, context.bot.username) for hit in hits[:PAGE_SIZE])
+        next_offset = str(offset + PAGE_SIZE) if len(hits) > PAGE_SIZE else ""
+        page = (results, next_offset)
+        cache.put(key, page, version)
+    results, next_offset = page
+    return await inline_query.answer(results, cache_time=int(cache.ttl), next_offset=next_offset)
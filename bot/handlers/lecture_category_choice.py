@@ -1,23 +1,23 @@
 from ..keyboards import generate_lecture_category_menu_keyboard, generate_lecture_titles_keyboard, LABEL_TO_CATEGORY
-from ..helpers import nav_back_one, get_db
+from ..delivery import send_materials
+from ..helpers import nav_back_one, nav_set_buttons, get_db, nav_get, nav_top
 
 async def handle_lecture_category_choice(update, context, text):
     if text not in LABEL_TO_CATEGORY:
         return None
-    nav = context.user_data.get("nav", {})
-    stack = nav.get("stack", [])
-    current = stack[-1][0] if stack else None
+    current = nav_top(context.user_data)
     if current != "lecture_category_menu":
         return None
-    subject_id    = nav.get("data", {}).get("subject_id")
-    section_code  = nav.get("data", {}).get("section")
-    year_id       = nav.get("data", {}).get("year_id")
-    lecturer_id   = nav.get("data", {}).get("lecturer_id")
-    lecture_title = nav.get("data", {}).get("lecture_title")
+    subject_id    = nav_get(context.user_data, "subject_id")
+    section_code  = nav_get(context.user_data, "section")
+    year_id       = nav_get(context.user_data, "year_id")
+    lecturer_id   = nav_get(context.user_data, "lecturer_id")
+    lecture_title = nav_get(context.user_data, "lecture_title")
     category      = LABEL_TO_CATEGORY[text]
     db = get_db(context)
     if not lecture_title:
         titles = await db.list_lecture_titles(subject_id, section_code)
+        nav_set_buttons(context.user_data, "lecture", ((t, t) for t in titles))
         return await update.message.reply_text("اختر محاضرة أولًا:", reply_markup=generate_lecture_titles_keyboard(titles))
     mats = await db.get_materials_by_category(
         subject_id, section_code, category,
@@ -26,7 +26,6 @@ async def handle_lecture_category_choice(update, context, text):
     if not mats:
         cats = await db.list_categories_for_lecture(subject_id, section_code, lecture_title, year_id=year_id, lecturer_id=lecturer_id)
         return await update.message.reply_text("لا توجد ملفات لهذا النوع.", reply_markup=generate_lecture_category_menu_keyboard(cats))
-    for mat in mats:
-        await update.message.reply_text(f"📄 {mat.title}\n{mat.url or '(لا يوجد رابط)'}")
+    await send_materials(update, context, mats)
     cats = await db.list_categories_for_lecture(subject_id, section_code, lecture_title, year_id=year_id, lecturer_id=lecturer_id)
     return await update.message.reply_text("اختر نوعًا آخر:", reply_markup=generate_lecture_category_menu_keyboard(cats))
@@ -1,13 +1,12 @@
 from ..keyboards import generate_lecture_category_menu_keyboard
-from ..helpers import get_db
+from ..helpers import get_db, nav_get
 
 async def render_lecture_category_menu(update, context):
-    nav = context.user_data.get("nav", {})
-    subject_id = nav.get("data", {}).get("subject_id")
-    section_code = nav.get("data", {}).get("section")
-    year_id = nav.get("data", {}).get("year_id")
-    lecturer_id = nav.get("data", {}).get("lecturer_id")
-    lecture_title = nav.get("data", {}).get("lecture_title", "")
+    subject_id = nav_get(context.user_data, "subject_id")
+    section_code = nav_get(context.user_data, "section")
+    year_id = nav_get(context.user_data, "year_id")
+    lecturer_id = nav_get(context.user_data, "lecturer_id")
+    lecture_title = nav_get(context.user_data, "lecture_title", "")
     db = get_db(context)
     cats = await db.list_categories_for_lecture(subject_id, section_code, lecture_title, year_id=year_id, lecturer_id=lecturer_id)
     msg = f"المحاضرة: {lecture_title}\nاختر نوع الملف:" if cats else "لا توجد أنواع ملفات لهذه المحاضرة."
@@ -1,16 +1,14 @@
 from ..keyboards import generate_lecturer_filter_keyboard
-from ..helpers import get_db
+from ..helpers import get_db, nav_get, nav_label
 
 async def render_lecturer(update, context):
-    nav = context.user_data.get("nav", {})
-    subject_id = nav.get("data", {}).get("subject_id")
-    section_code = nav.get("data", {}).get("section")
-    lecturer_label = nav.get("stack", [])[-1][1] if nav.get("stack") else ""
-    lecturer_id = nav.get("data", {}).get("lecturer_id")
+    subject_id = nav_get(context.user_data, "subject_id")
+    section_code = nav_get(context.user_data, "section")
+    lecturer_label = nav_label(context.user_data)
+    lecturer_id = nav_get(context.user_data, "lecturer_id")
     db = get_db(context)
-    years = await db.get_years_for_subject_section_lecturer(subject_id, section_code, lecturer_id)
-    lectures_exist = await db.has_lecture_category(subject_id, section_code) or False
+    snap = await db.get_lecturer_snapshot(subject_id, section_code, lecturer_id)
     return await update.message.reply_text(
         f"المحاضر: {lecturer_label}\nاختر خيارًا:",
-        reply_markup=generate_lecturer_filter_keyboard(bool(years), lectures_exist),
+        reply_markup=generate_lecturer_filter_keyboard(bool(snap.years), snap.lectures_exist),
     )
@@ -1,10 +1,10 @@
 from ..keyboards import generate_lecturers_keyboard
-from ..helpers import get_db
+from ..helpers import nav_set_buttons, get_db, nav_get
 
 async def render_lecturer_list(update, context):
-    nav = context.user_data.get("nav", {})
-    subject_id = nav.get("data", {}).get("subject_id")
-    section_code = nav.get("data", {}).get("section")
+    subject_id = nav_get(context.user_data, "subject_id")
+    section_code = nav_get(context.user_data, "section")
     db = get_db(context)
     lecturers = await db.get_lecturers_for_subject_section(subject_id, section_code)
+    nav_set_buttons(context.user_data, "lecturer", ((lec.id, lec.name) for lec in lecturers))
     return await update.message.reply_text("اختر المحاضر:", reply_markup=generate_lecturers_keyboard(lecturers))
@@ -1,4 +1,4 @@
-from ..helpers import nav_push_view, get_db
+from ..helpers import nav_push_view, nav_set_buttons, get_db, nav_get, nav_label
 from ..keyboards import (
     generate_years_keyboard,
     generate_lecturer_filter_keyboard,
@@ -12,23 +12,22 @@ async def handle_lecturer_list_actions(update, context, text):
     if text not in {CHOOSE_YEAR_FOR_LECTURER, LIST_LECTURES_FOR_LECTURER}:
         return None
     db = get_db(context)
-    nav = context.user_data.get("nav", {})
-    subject_id = nav.get("data", {}).get("subject_id")
-    section_code = nav.get("data", {}).get("section")
-    lecturer_id = nav.get("data", {}).get("lecturer_id")
-    lecturer_label = next((lbl for t, lbl in nav.get("stack", []) if t == "lecturer"), "")
+    subject_id = nav_get(context.user_data, "subject_id")
+    section_code = nav_get(context.user_data, "section")
+    lecturer_id = nav_get(context.user_data, "lecturer_id")
+    lecturer_label = nav_label(context.user_data, "lecturer")
     if not (subject_id and section_code and lecturer_id):
         return await update.message.reply_text("ابدأ باختيار المادة → القسم → المحاضر.", reply_markup=main_menu)
     if text == CHOOSE_YEAR_FOR_LECTURER:
         years = await db.get_years_for_subject_section_lecturer(subject_id, section_code, lecturer_id)
         if not years:
-            years_exist = False
-            lectures_exist = await db.list_lecture_titles_by_lecturer(subject_id, section_code, lecturer_id)
+            snap = await db.get_lecturer_snapshot(subject_id, section_code, lecturer_id)
             return await update.message.reply_text(
                 "لا توجد سنوات مرتبطة بمحاضرات هذا المحاضر.",
-                reply_markup=generate_lecturer_filter_keyboard(years_exist, bool(lectures_exist)),
+                reply_markup=generate_lecturer_filter_keyboard(False, snap.lectures_exist),
             )
         nav_push_view(context.user_data, "year_list")
+        nav_set_buttons(context.user_data, "year", years)
         return await update.message.reply_text(
             f"المحاضر: {lecturer_label}\nاختر السنة:",
             reply_markup=generate_years_keyboard(years),
@@ -42,6 +41,7 @@ async def handle_lecturer_list_actions(update, context, text):
                 reply_markup=generate_lecturer_filter_keyboard(bool(years), False),
             )
         nav_push_view(context.user_data, "lecture_list")
+        nav_set_buttons(context.user_data, "lecture", ((t, t) for t in titles))
         return await update.message.reply_text(
             f"المحاضر: {lecturer_label}\nاختر محاضرة:",
             reply_markup=generate_lecture_titles_keyboard(titles),
@@ -0,0 +1,69 @@
+# search.py
+# البحث النصي في المواد (فهرس FTS5 في قاعدة البيانات):
+# - زر "🔍 بحث" أو "🔎 البحث المتقدم" يفتح شاشة "search" ويطلب كلمة البحث.
+# - أي نص يُكتب في هذه الشاشة يُعامل كاستعلام جديد، وأزرار التالي/السابق تقلب الصفحات.
+# - النتائج مقيدة بالمستوى/الترم الحاليين إن كانا محددين في مسار التنقل.
+
+from ..helpers import nav_get, nav_get_ids, nav_push_view, nav_set_value, nav_top, get_db
+from ..keyboards import (
+    generate_search_results_keyboard,
+    CATEGORY_TO_LABEL,
+    SEARCH_NEXT,
+    SEARCH_PREV,
+)
+
+PAGE_SIZE = 8
+
+
+async def handle_search_start(update, context):
+    nav_push_view(context.user_data, "search")
+    return await render_search(update, context)
+
+
+async def handle_search_query(update, context, text):
+    if nav_top(context.user_data) != "search":
+        return None
+    user_data = context.user_data
+    if text in (SEARCH_NEXT, SEARCH_PREV) and nav_get(user_data, "search_query"):
+        page = nav_get(user_data, "search_page", 0) + (1 if text == SEARCH_NEXT else -1)
+        nav_set_value(user_data, "search_page", max(page, 0))
+    else:
+        nav_set_value(user_data, "search_query", text.strip())
+        nav_set_value(user_data, "search_page", 0)
+    return await render_search(update, context)
+
+
+async def render_search(update, context):
+    query = nav_get(context.user_data, "search_query")
+    level_id, term_id = nav_get_ids(context.user_data)
+    scope = " (ضمن الترم الحالي)" if level_id and term_id else ""
+    if not query:
+        return await update.message.reply_text(
+            f"🔍 اكتب كلمة البحث{scope}: عنوان محاضرة، اسم مادة أو رمزها، أو اسم محاضر.",
+            reply_markup=generate_search_results_keyboard(False, False),
+        )
+
+    page = nav_get(context.user_data, "search_page", 0)
+    db = get_db(context)
+    hits = await db.search_materials(
+        query,
+        level_id=level_id,
+        term_id=term_id,
+        limit=PAGE_SIZE + 1,
+        offset=page * PAGE_SIZE,
+    )
+    has_next = len(hits) > PAGE_SIZE
+    hits = hits[:PAGE_SIZE]
+    keyboard = generate_search_results_keyboard(page > 0, has_next)
+    if not hits:
+        return await update.message.reply_text(
+            f"لا توجد نتائج لـ «{query}»{scope}. جرّب كلمة أخرى.", reply_markup=keyboard
+        )
+
+    lines = [f"🔍 نتائج «{query}»{scope} — صفحة {page + 1}:"]
+    for i, hit in enumerate(hits, start=page * PAGE_SIZE + 1):
+        category = CATEGORY_TO_LABEL.get(hit.category, hit.category)
+        lines.append(f"\n{i}. {hit.title} — {hit.subject_name}\n{category}")
+        if hit.url:
+            lines.append(hit.url)
+    return await update.message.reply_text("\n".join(lines), reply_markup=keyboard)
@@ -1,4 +1,4 @@
-from ..helpers import nav_push_view, get_db
+from ..helpers import nav_push_view, nav_set_buttons, get_db, nav_get
 from ..keyboards import (
     FILTER_BY_YEAR,
     FILTER_BY_LECTURER,
@@ -14,9 +14,8 @@ async def handle_section_filters(update, context, text):
     if text not in {FILTER_BY_YEAR, FILTER_BY_LECTURER, LIST_LECTURES}:
         return None
     db = get_db(context)
-    nav = context.user_data.get("nav", {})
-    subject_id = nav.get("data", {}).get("subject_id")
-    section_code = nav.get("data", {}).get("section")
+    subject_id = nav_get(context.user_data, "subject_id")
+    section_code = nav_get(context.user_data, "section")
     if not (subject_id and section_code):
         return await update.message.reply_text("ابدأ باختيار المادة ثم القسم.", reply_markup=main_menu)
     if text == FILTER_BY_YEAR:
@@ -24,16 +23,19 @@ async def handle_section_filters(update, context, text):
         if not years:
             return await update.message.reply_text("لا توجد سنوات لهذا القسم.", reply_markup=generate_subject_sections_keyboard_dynamic([]))
         nav_push_view(context.user_data, "year_list")
+        nav_set_buttons(context.user_data, "year", years)
         return await update.message.reply_text("اختر السنة:", reply_markup=generate_years_keyboard(years))
     if text == FILTER_BY_LECTURER:
         lecturers = await db.get_lecturers_for_subject_section(subject_id, section_code)
         if not lecturers:
             return await update.message.reply_text("لا يوجد محاضرون مرتبطون بهذا القسم.", reply_markup=generate_subject_sections_keyboard_dynamic([]))
         nav_push_view(context.user_data, "lecturer_list")
+        nav_set_buttons(context.user_data, "lecturer", ((lec.id, lec.name) for lec in lecturers))
         return await update.message.reply_text("اختر المحاضر:", reply_markup=generate_lecturers_keyboard(lecturers))
     if text == LIST_LECTURES:
         titles = await db.list_lecture_titles(subject_id, section_code)
         if not titles:
             return await update.message.reply_text("لا توجد محاضرات متاحة.", reply_markup=generate_subject_sections_keyboard_dynamic([]))
         nav_push_view(context.user_data, "lecture_list")
+        nav_set_buttons(context.user_data, "lecture", ((t, t) for t in titles))
         return await update.message.reply_text("اختر محاضرة:", reply_markup=generate_lecture_titles_keyboard(titles))
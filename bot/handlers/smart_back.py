@@ -1,11 +1,9 @@
-from ..helpers import nav_back_one
+from ..helpers import nav_back_one, nav_top
 
 async def handle_smart_back(update, context):
     from ..main import render_state
-    nav = context.user_data.get("nav", {})
-    stack = nav.get("stack", [])
-    if stack:
-        top = stack[-1][0]
+    top = nav_top(context.user_data)
+    if top:
         if top == "year_category_menu":
             nav_back_one(context.user_data)
             nav_back_one(context.user_data)
@@ -1,11 +1,7 @@
-from ..keyboards import generate_subject_sections_keyboard_dynamic
-from ..helpers import get_db
+from ..helpers import nav_get, nav_label
+from ..screens import subject_sections_screen, send_screen
 
 async def render_subject(update, context):
-    nav = context.user_data.get("nav", {})
-    subject_label = nav.get("stack", [])[-1][1] if nav.get("stack") else ""
-    subject_id = nav.get("data", {}).get("subject_id")
-    db = get_db(context)
-    sections = await db.get_available_sections_for_subject(subject_id) if subject_id else []
-    msg = f"المادة: {subject_label}\nاختر القسم:" if sections else "لا توجد أقسام متاحة لهذه المادة حتى الآن."
-    return await update.message.reply_text(msg, reply_markup=generate_subject_sections_keyboard_dynamic(sections))
+    subject_label = nav_label(context.user_data)
+    subject_id = nav_get(context.user_data, "subject_id")
+    return await send_screen(update, context, await subject_sections_screen(context, subject_id, subject_label))
@@ -1,9 +1,6 @@
-from ..helpers import nav_get_ids, get_db
-from ..keyboards import generate_subjects_keyboard
+from ..helpers import nav_get_ids
+from ..screens import subjects_screen, send_screen
 
 async def render_subject_list(update, context):
     level_id, term_id = nav_get_ids(context.user_data)
-    db = get_db(context)
-    subjects = await db.get_subjects_by_level_and_term(level_id, term_id)
-    msg = "اختر المادة:" if subjects else "لا توجد مواد لهذا الترم."
-    return await update.message.reply_text(msg, reply_markup=generate_subjects_keyboard(subjects))
+    return await send_screen(update, context, await subjects_screen(context, level_id, term_id))
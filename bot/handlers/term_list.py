@@ -1,12 +1,8 @@
-from ..helpers import nav_get_ids, nav_get_labels, get_db
-from ..keyboards import generate_terms_keyboard
+from ..helpers import nav_get_ids, nav_get_labels
+from ..screens import terms_screen, send_screen
 
 async def render_term_list(update, context):
     level_id, _ = nav_get_ids(context.user_data)
     level_label, _ = nav_get_labels(context.user_data)
-    db = get_db(context)
-    terms = await db.get_terms_by_level(level_id)
-    return await update.message.reply_text(
-        f"المستوى: {level_label}\nاختر الترم:",
-        reply_markup=generate_terms_keyboard(terms),
-    )
+    screen = await terms_screen(context, level_id, f"المستوى: {level_label}\nاختر الترم:")
+    return await send_screen(update, context, screen)
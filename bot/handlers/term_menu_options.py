@@ -1,7 +1,7 @@
-from ..helpers import nav_get_ids, nav_push_view, get_db
+from .search import handle_search_start
+from ..helpers import nav_get_ids, nav_push_view
+from ..screens import subjects_screen, term_menu_screen, send_screen
 from ..keyboards import (
-    generate_subjects_keyboard,
-    generate_term_menu_keyboard_dynamic,
     main_menu,
     TERM_MENU_SHOW_SUBJECTS,
     TERM_MENU_PLAN,
@@ -17,21 +17,16 @@ async def handle_term_menu_options(update, context, text):
         return await update.message.reply_text("ابدأ باختيار المستوى ثم الترم.", reply_markup=main_menu)
     if text == TERM_MENU_SHOW_SUBJECTS:
         nav_push_view(context.user_data, "subject_list")
-        db = get_db(context)
-        subjects = await db.get_subjects_by_level_and_term(level_id, term_id)
-        if not subjects:
-            flags = await db.term_feature_flags(level_id, term_id)
-            return await update.message.reply_text("لا توجد مواد لهذا الترم.", reply_markup=generate_term_menu_keyboard_dynamic(flags))
-        return await update.message.reply_text("اختر المادة:", reply_markup=generate_subjects_keyboard(subjects))
+        screen = await subjects_screen(context, level_id, term_id)
+        if not screen.buttons[1]:
+            menu = await term_menu_screen(context, level_id, term_id)
+            return await send_screen(update, context, menu, "لا توجد مواد لهذا الترم.")
+        return await send_screen(update, context, screen)
     if text == TERM_MENU_PLAN:
-        db = get_db(context)
-        flags = await db.term_feature_flags(level_id, term_id)
-        return await update.message.reply_text("الخطة الدراسية (قريبًا).", reply_markup=generate_term_menu_keyboard_dynamic(flags))
+        menu = await term_menu_screen(context, level_id, term_id)
+        return await send_screen(update, context, menu, "الخطة الدراسية (قريبًا).")
     if text == TERM_MENU_LINKS:
-        db = get_db(context)
-        flags = await db.term_feature_flags(level_id, term_id)
-        return await update.message.reply_text("روابط المجموعات والقنوات (قريبًا).", reply_markup=generate_term_menu_keyboard_dynamic(flags))
+        menu = await term_menu_screen(context, level_id, term_id)
+        return await send_screen(update, context, menu, "روابط المجموعات والقنوات (قريبًا).")
     if text == TERM_MENU_ADV_SEARCH:
-        db = get_db(context)
-        flags = await db.term_feature_flags(level_id, term_id)
-        return await update.message.reply_text("البحث المتقدم (قريبًا).", reply_markup=generate_term_menu_keyboard_dynamic(flags))
+        return await handle_search_start(update, context)
@@ -1,13 +1,13 @@
 from ..keyboards import generate_lecture_titles_keyboard
-from ..helpers import get_db
+from ..helpers import nav_set_buttons, get_db, nav_get, nav_label
 
 async def render_year(update, context):
-    nav = context.user_data.get("nav", {})
-    subject_id = nav.get("data", {}).get("subject_id")
-    section_code = nav.get("data", {}).get("section")
-    year_label = nav.get("stack", [])[-1][1] if nav.get("stack") else ""
-    year_id = nav.get("data", {}).get("year_id")
+    subject_id = nav_get(context.user_data, "subject_id")
+    section_code = nav_get(context.user_data, "section")
+    year_label = nav_label(context.user_data)
+    year_id = nav_get(context.user_data, "year_id")
     db = get_db(context)
     titles = await db.list_lecture_titles_by_year(subject_id, section_code, year_id)
     msg = f"السنة: {year_label}\nاختر محاضرة:" if titles else "لا توجد محاضرات لهذه السنة."
+    nav_set_buttons(context.user_data, "lecture", ((t, t) for t in titles))
     return await update.message.reply_text(msg, reply_markup=generate_lecture_titles_keyboard(titles))
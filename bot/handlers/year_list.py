@@ -1,11 +1,10 @@
 from ..keyboards import generate_years_keyboard
-from ..helpers import get_db
+from ..helpers import nav_set_buttons, get_db, nav_get
 
 async def render_year_list(update, context):
-    nav = context.user_data.get("nav", {})
-    subject_id = nav.get("data", {}).get("subject_id")
-    section_code = nav.get("data", {}).get("section")
-    lecturer_id = nav.get("data", {}).get("lecturer_id")
+    subject_id = nav_get(context.user_data, "subject_id")
+    section_code = nav_get(context.user_data, "section")
+    lecturer_id = nav_get(context.user_data, "lecturer_id")
     db = get_db(context)
     if lecturer_id:
         years = await db.get_years_for_subject_section_lecturer(subject_id, section_code, lecturer_id)
@@ -13,4 +12,5 @@ async def render_year_list(update, context):
     else:
         years = await db.get_years_for_subject_section(subject_id, section_code)
         msg = "اختر السنة:"
+    nav_set_buttons(context.user_data, "year", years)
     return await update.message.reply_text(msg, reply_markup=generate_years_keyboard(years))
@@ -1,9 +1,14 @@
 # helpers.py
 # إدارة حالة التنقل للمستخدم (Navigation State) داخل bot.py
-# - نخزّن الحالة في context.user_data["nav"] بالشكل:
-#   {"stack": [(node_type, label), ...], "data": {...}}
-# - stack: يمثل مسار الشاشات (level -> term -> subject -> ...)
-# - data: يحمل المعرّفات/القيم (level_id, term_id, subject_id, ...)
+# - نخزّن الحالة في context.user_data["nav"] ككائن NavState (انظر nav_state.py):
+# - stack: يمثل مسار الشاشات (level -> term -> subject -> ...) كأرقام أنواع عقد
+# - data: يحمل المعرّفات/القيم (level_id, term_id, subject_id, ...)؛ التسميات من جدول مشترك
+# - buttons: فهرس الأزرار الديناميكية المعروضة حاليًا (انظر nav_set_buttons)
+# - خارج هذا الملف تُقرأ الحالة عبر nav_get / nav_label / nav_stack فقط.
+
+import sys
+
+from .nav_state import LABELS, NODE_CODES, NODE_FIELD, NODE_TYPES, NavState
 
 NAV_KEY = "nav"
 
@@ -13,31 +18,50 @@ def get_db(context):
 
     return context.application.bot_data["db"]
 
+
+def get_fuzzy_index(context):
+    """Retrieve the shared :class:`FuzzyIndex`, creating an empty one on first use."""
+
+    from .db.fuzzy import FuzzyIndex
+
+    return context.application.bot_data.setdefault("fuzzy", FuzzyIndex())
+
+
+def get_render_cache(context):
+    """Retrieve the shared :class:`RenderCache`, creating a default one on first use."""
+
+    from .render_cache import RenderCache
+
+    return context.application.bot_data.setdefault("render_cache", RenderCache())
+
+
+def get_inline_cache(context):
+    """Retrieve the shared inline-search :class:`QueryCache`, creating a default one on first use."""
+
+    from .render_cache import QueryCache
+
+    return context.application.bot_data.setdefault("inline_cache", QueryCache())
+
 # ---------------------------------------------------------------------------
 # أدوات داخلية
 # ---------------------------------------------------------------------------
-def _get_nav(user_data: dict) -> dict:
-    """يضمن وجود هيكل nav الأساسي داخل user_data."""
+def _get_nav(user_data: dict) -> NavState:
+    """يضمن وجود NavState داخل user_data (ويحوّل الشكل القديم/المستعاد من الحفظ)."""
     nav = user_data.get(NAV_KEY)
-    if not isinstance(nav, dict) or "stack" not in nav or "data" not in nav:
-        nav = {"stack": [], "data": {}}
+    if type(nav) is not NavState:
+        nav = NavState.from_dict(nav) if isinstance(nav, dict) else NavState()
         user_data[NAV_KEY] = nav
     return nav
 
-def _upsert_stack(nav: dict, node_type: str, label: str) -> None:
-    """يضيف/يحدّث عقدة في stack بحسب نوعها."""
-    for i, (t, _) in enumerate(nav["stack"]):
-        if t == node_type:
-            nav["stack"][i] = (node_type, label)
-            return
-    nav["stack"].append((node_type, label))
-
-def _truncate_after(nav: dict, node_type: str) -> None:
-    """يحذف كل ما بعد node_type في stack (لضمان تماسك المسار)."""
-    for i, (t, _) in enumerate(nav["stack"]):
-        if t == node_type:
-            del nav["stack"][i + 1 :]
-            return
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+def _set_node(nav: NavState, node_type: str, label: str, value) -> None:
+    """يضع معرّف العقدة ويسجّل تسميتها في الجدول المشترك ثم يمسح ما بعدها."""
+    nav.set(NODE_FIELD[node_type], value)
+    LABELS.put(NODE_CODES[node_type], value, label)
+    nav.upsert(node_type)
+    nav.truncate_after(node_type)
 
 # ---------------------------------------------------------------------------
 # مفاتيح البيانات المرتبطة بكل نوع عقدة (لتنظيف data عند الرجوع)
@@ -64,6 +88,9 @@ TYPE_TO_KEYS = {
     "lecture_list": [],
     "year_category_menu": [],
     "lecture_category_menu": [],
+
+    # شاشة البحث: نص الاستعلام ورقم الصفحة الحالية
+    "search": ["search_query", "search_page"],
 }
 
 
@@ -72,9 +99,7 @@ TYPE_TO_KEYS = {
 # ---------------------------------------------------------------------------
 def nav_reset(user_data: dict) -> None:
     """يمسح كل المسار والبيانات (عودة للجذر)."""
-    nav = _get_nav(user_data)
-    nav["stack"].clear()
-    nav["data"].clear()
+    _get_nav(user_data).reset()
 
 def nav_back_to_levels(user_data: dict) -> None:
     """رجوع للجذر (قائمة المستويات)."""
@@ -83,83 +108,117 @@ def nav_back_to_levels(user_data: dict) -> None:
 def nav_get_ids(user_data: dict):
     """يرجع (level_id, term_id) إن وُجدا، وإلا (None, None)."""
     nav = _get_nav(user_data)
-    return nav["data"].get("level_id"), nav["data"].get("term_id")
+    return nav.level_id, nav.term_id
 
 def nav_get_labels(user_data: dict):
     """يرجع (level_label, term_label) من stack لعرضها للمستخدم."""
     nav = _get_nav(user_data)
-    level_label = term_label = None
-    for t, lbl in nav.get("stack", []):
-        if t == "level":
-            level_label = lbl
-        elif t == "term":
-            term_label = lbl
+    level_label = nav.label("level") if nav.nodes.find(NODE_CODES["level"]) >= 0 else None
+    term_label = nav.label("term") if nav.nodes.find(NODE_CODES["term"]) >= 0 else None
     return level_label, term_label
 
+def nav_top(user_data: dict) -> str | None:
+    """يرجع نوع العقدة في أعلى المكدس (الشاشة الحالية) أو None إن كان فارغًا."""
+    return _get_nav(user_data).top()
+
+def nav_stack(user_data: dict) -> list[tuple[str, str]]:
+    """المسار بالشكل [(node_type, label), ...] (التسميات تُستعاد من الجدول المشترك)."""
+    return _get_nav(user_data).stack()
+
+def nav_label(user_data: dict, node_type: str | None = None) -> str:
+    """تسمية عقدة من المسار (الشاشة الحالية افتراضيًا)، أو "" إن لم توجد."""
+    return _get_nav(user_data).label(node_type)
+
+def nav_get(user_data: dict, key: str, default=None):
+    """قيمة من بيانات التنقل (subject_id, section, year_id, ...)."""
+    return _get_nav(user_data).get(key, default)
+
+def nav_set_value(user_data: dict, key: str, value) -> None:
+    """يضع قيمة في بيانات التنقل دون تغيير المسار (مثل search_page)."""
+    _get_nav(user_data).set(key, value)
+
 def nav_back_one(user_data: dict) -> None:
     """يرجع خطوة واحدة في المسار ويمسح مفاتيحها من data."""
     nav = _get_nav(user_data)
-    if not nav["stack"]:
-        return
-    node_type, _ = nav["stack"].pop()
+    node_type = nav.pop()
     for k in TYPE_TO_KEYS.get(node_type, []):
-        nav["data"].pop(k, None)
+        nav.discard(k)
 
 def nav_push_view(user_data: dict, node_type: str, label: str = "") -> None:
     """
     يدفع شاشة/عقدة واجهة بدون مفاتيح إضافية (مثل: term_list, subject_list, ...).
     """
     nav = _get_nav(user_data)
-    _upsert_stack(nav, node_type, label)
-    _truncate_after(nav, node_type)
+    nav.upsert(node_type, label)
+    nav.truncate_after(node_type)
+
+# ---------------------------------------------------------------------------
+# فهرس الأزرار: يُحفظ عند عرض لوحة ديناميكية ليُحل الضغط التالي بلا استعلام
+# ---------------------------------------------------------------------------
+def nav_set_buttons(user_data: dict, node_type: str, pairs) -> None:
+    """
+    يحفظ أزرار الشاشة الحالية بالشكل (screen, node_type, ((id, label), ...)).
+    pairs: [(id, label), ...] — في المحاضرات يكون id هو العنوان نفسه.
+    الصف (tuple) يُحفظ كما هو، فأزرار ذاكرة الشاشات مشتركة بين المستخدمين؛
+    وغيره يُنسخ مع توحيد النصوص (intern) حتى لا يحمل كل مستخدم نسخته منها.
+    يُستدعى بعد nav_push_view حتى يرتبط الفهرس بالشاشة المعروضة فعلًا.
+    """
+    nav = _get_nav(user_data)
+    screen = nav.nodes[-1] if nav.nodes else None
+    if type(pairs) is not tuple:
+        pairs = tuple((_intern(_id), _intern(label)) for _id, label in pairs)
+    nav.buttons = (screen, NODE_CODES[node_type], pairs)
+
+def nav_buttons(user_data: dict):
+    """يرجع (node_type, ((id, label), ...)) لأزرار الشاشة الحالية، أو None إن كانت لشاشة أخرى."""
+    nav = _get_nav(user_data)
+    if nav.buttons is None:
+        return None
+    screen, code, pairs = nav.buttons
+    if screen != (nav.nodes[-1] if nav.nodes else None):
+        return None
+    return NODE_TYPES[code], pairs
+
+def nav_resolve_button(user_data: dict, text: str):
+    """
+    يرجع (node_type, id) إن كان النص زرًا من آخر لوحة عُرضت على نفس الشاشة،
+    وإلا None (فيرجع المعالج للاستعلام من القاعدة).
+    """
+    indexed = nav_buttons(user_data)
+    if indexed is None:
+        return None
+    node_type, pairs = indexed
+    for _id, label in pairs:
+        if label == text:
+            return node_type, _id
+    return None
 
 # ---------------------------------------------------------------------------
 # محددات المستوى/الترم/المادة/القسم/… (تضع القيمة وتمسح ما بعدها)
 # ---------------------------------------------------------------------------
 def nav_set_level(user_data: dict, label: str, level_id: int | str) -> None:
-    nav = _get_nav(user_data)
-    _upsert_stack(nav, "level", label)
-    nav["data"]["level_id"] = level_id
-    _truncate_after(nav, "level")
+    _set_node(_get_nav(user_data), "level", label, level_id)
 
 def nav_set_term(user_data: dict, label: str, term_id: int | str) -> None:
-    nav = _get_nav(user_data)
-    _upsert_stack(nav, "term", label)
-    nav["data"]["term_id"] = term_id
-    _truncate_after(nav, "term")
+    _set_node(_get_nav(user_data), "term", label, term_id)
 
 def nav_set_subject(user_data: dict, label: str, subject_id: int) -> None:
-    nav = _get_nav(user_data)
-    _upsert_stack(nav, "subject", label)
-    nav["data"]["subject_id"] = subject_id
-    _truncate_after(nav, "subject")
+    _set_node(_get_nav(user_data), "subject", label, subject_id)
 
 def nav_set_section(user_data: dict, label: str, section: str) -> None:
-    nav = _get_nav(user_data)
-    _upsert_stack(nav, "section", label)
-    nav["data"]["section"] = section
-    _truncate_after(nav, "section")
+    _set_node(_get_nav(user_data), "section", label, section)
 
 def nav_set_year(user_data: dict, label: str, year_id: int) -> None:
-    nav = _get_nav(user_data)
-    _upsert_stack(nav, "year", label)
-    nav["data"]["year_id"] = year_id
-    _truncate_after(nav, "year")
+    _set_node(_get_nav(user_data), "year", label, year_id)
 
 def nav_set_lecturer(user_data: dict, label: str, lecturer_id: int) -> None:
-    nav = _get_nav(user_data)
-    _upsert_stack(nav, "lecturer", label)
-    nav["data"]["lecturer_id"] = lecturer_id
-    _truncate_after(nav, "lecturer")
+    _set_node(_get_nav(user_data), "lecturer", label, lecturer_id)
 
 def nav_set_lecture(user_data: dict, title: str) -> None:
     """
     تثبيت عنوان محاضرة محددة، ثم إغلاق أي مسار أعمق.
     """
-    nav = _get_nav(user_data)
-    _upsert_stack(nav, "lecture", title)
-    nav["data"]["lecture_title"] = title
-    _truncate_after(nav, "lecture")
+    _set_node(_get_nav(user_data), "lecture", title, title)
 
 # ---------------------------------------------------------------------------
 # انتقالات جاهزة (اختصارات)
@@ -171,8 +230,8 @@ def nav_go_levels_list(user_data: dict) -> None:
     """
     nav_reset(user_data)
     nav = _get_nav(user_data)
-    _upsert_stack(nav, "level", "")
-    _truncate_after(nav, "level")
+    nav.upsert("level")
+    nav.truncate_after("level")
 
 def nav_go_subject_list(user_data: dict) -> None:
     """
@@ -182,12 +241,22 @@ def nav_go_subject_list(user_data: dict) -> None:
     - نضع عقدة 'subject_list' كواجهة حالية.
     """
     nav = _get_nav(user_data)
-    _truncate_after(nav, "term")  # أبقِ حتى الترم
+    nav.truncate_after("term")  # أبقِ حتى الترم
 
     # تنظيف أي مفاتيح أعمق من الترم
     for k in ("subject_id", "section", "year_id", "lecturer_id", "lecture_title", "category"):
-        nav["data"].pop(k, None)
+        nav.discard(k)
+
+    nav.upsert("subject_list")
+    nav.truncate_after("subject_list")
 
-    _upsert_stack(nav, "subject_list", "")
-    _truncate_after(nav, "subject_list")
 
+def nav_go_subject(user_data: dict, path) -> None:
+    """
+    بناء المسار كاملًا حتى مادة معيّنة (مستوى → ترم → مادة) دون المرور بالشاشات،
+    path: SubjectPath (من get_subject_path). تستخدمه الروابط المباشرة والمطابقة التقريبية.
+    """
+    nav_reset(user_data)
+    nav_set_level(user_data, path.level_name, path.level_id)
+    nav_set_term(user_data, path.term_name, path.term_id)
+    nav_set_subject(user_data, path.subject_name, path.subject_id)
@@ -0,0 +1,220 @@
+# inline.py
+# وضع الأزرار المضمّنة (UI_MODE=inline) بدل لوحة Reply:
+# - المعالجات لا تتغيّر: ما زالت ترد بـ update.message.reply_text(..., reply_markup=ReplyKeyboardMarkup).
+#   نمرّر لها بديلًا (InlineMessage) يحوّل اللوحة إلى InlineKeyboardMarkup ويعدّل
+#   رسالة التنقل نفسها (edit_message_text) بدل إرسال رسالة جديدة.
+# - callback_data لكل زر: بايت للنوع + المعرّف كـ varint، مرمّزة base64url (بضعة أحرف، أقل من 64 بايت).
+#   الأنواع: أزرار ثابتة (رقمها في STATIC_LABELS)، مستوى/ترم/مادة/سنة/محاضر (المعرّف من قاعدة البيانات)،
+#   محاضرة (ترتيبها في فهرس الأزرار)، ونص آخر (ترتيبه في قائمة تُحفظ مع الرسالة).
+# - حل الضغطة: من فهرس أزرار الشاشة الحالية (nav_set_buttons) مباشرة، بلا أي استعلام.
+#   الناتج هو نص الزر نفسه فيمر بنفس مسار الرسائل النصية.
+
+import base64
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Message, ReplyKeyboardMarkup
+from telegram.error import BadRequest
+
+from .helpers import nav_buttons
+from .keyboards import (
+    main_menu,
+    BACK,
+    BACK_TO_LEVELS,
+    BACK_TO_SUBJECTS,
+    TERM_MENU_SHOW_SUBJECTS,
+    TERM_MENU_PLAN,
+    TERM_MENU_LINKS,
+    TERM_MENU_ADV_SEARCH,
+    FILTER_BY_YEAR,
+    FILTER_BY_LECTURER,
+    LIST_LECTURES,
+    YEAR_MENU_LECTURES,
+    CHOOSE_YEAR_FOR_LECTURER,
+    LIST_LECTURES_FOR_LECTURER,
+    SEARCH_NEXT,
+    SEARCH_PREV,
+    SECTION_LABELS,
+    CATEGORY_TO_LABEL,
+)
+
+# الأزرار الثابتة: رقم الزر = موضعه هنا (أضف في النهاية فقط حتى تبقى الرسائل القديمة صالحة)
+STATIC_LABELS = tuple(dict.fromkeys([
+    *(button.text for row in main_menu.keyboard for button in row),
+    BACK, BACK_TO_LEVELS, BACK_TO_SUBJECTS, "🔙 العودة للقائمة الرئيسية",
+    TERM_MENU_SHOW_SUBJECTS, TERM_MENU_PLAN, TERM_MENU_LINKS, TERM_MENU_ADV_SEARCH,
+    FILTER_BY_YEAR, FILTER_BY_LECTURER, LIST_LECTURES, YEAR_MENU_LECTURES,
+    CHOOSE_YEAR_FOR_LECTURER, LIST_LECTURES_FOR_LECTURER, SEARCH_NEXT, SEARCH_PREV,
+    *SECTION_LABELS.values(),
+    *CATEGORY_TO_LABEL.values(),
+]))
+_STATIC_CODES = {label: code for code, label in enumerate(STATIC_LABELS)}
+
+# نوع الزر (البايت الأول في callback_data)
+KIND_STATIC, KIND_TEXT = 0, 7
+NODE_KINDS = {"level": 1, "term": 2, "subject": 3, "year": 4, "lecturer": 5, "lecture": 6}
+_KIND_NODES = {kind: node for node, kind in NODE_KINDS.items()}
+
+# نصوص أزرار لا تُعرف بمعرّف (مثل اقتراحات المطابقة التقريبية): تُحفظ هنا ويُرسل ترتيبها
+TEXT_KEY = "inline_text"
+
+CALLBACK_MAX = 64
+
+
+# ---------------------------------------------------------------------------
+# ترميز callback_data
+# ---------------------------------------------------------------------------
+def pack_callback(kind: int, value: int) -> str:
+    """kind (بايت) + value (varint) ← نص base64url بلا حشو."""
+    if not 0 <= kind < 256 or value < 0:
+        raise ValueError("cannot pack negative values")
+    out = bytearray([kind])
+    while True:
+        byte, value = value & 0x7F, value >> 7
+        out.append(byte | 0x80 if value else byte)
+        if not value:
+            break
+    data = base64.urlsafe_b64encode(bytes(out)).rstrip(b"=").decode("ascii")
+    if len(data) > CALLBACK_MAX:
+        raise ValueError("callback data too long")
+    return data
+
+
+def unpack_callback(data: str):
+    """يرجع (kind, value) أو None إن لم تكن البيانات من ترميزنا."""
+    try:
+        raw = base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+    except (ValueError, TypeError):
+        return None
+    if len(raw) < 2 or len(raw) > 11:
+        return None
+    value = shift = 0
+    for i, byte in enumerate(raw[1:], start=1):
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return (raw[0], value) if i == len(raw) - 1 else None
+    return None
+
+
+# ---------------------------------------------------------------------------
+# تحويل اللوحة وحل الضغطة
+# ---------------------------------------------------------------------------
+def _current_buttons(user_data: dict):
+    """فهرس أزرار الشاشة الحالية (node_type, {label: id}) أو None إن كان لشاشة أخرى."""
+    indexed = nav_buttons(user_data)
+    if indexed is None:
+        return None
+    node_type, pairs = indexed
+    return node_type, {label: _id for _id, label in pairs}
+
+
+def inline_markup(user_data: dict, markup: ReplyKeyboardMarkup) -> InlineKeyboardMarkup:
+    """يحوّل لوحة Reply إلى لوحة مضمّنة بنفس الترتيب والنصوص."""
+    indexed = _current_buttons(user_data)
+    node_type, labels = indexed if indexed else (None, {})
+    positions = {label: i for i, label in enumerate(labels)} if node_type == "lecture" else None
+    texts: list[str] = []
+
+    rows = []
+    for row in markup.keyboard:
+        inline_row = []
+        for button in row:
+            label = button.text
+            if label in labels:
+                value = positions[label] if positions is not None else labels[label]
+                data = pack_callback(NODE_KINDS[node_type], value)
+            elif label in _STATIC_CODES:
+                data = pack_callback(KIND_STATIC, _STATIC_CODES[label])
+            else:
+                data = pack_callback(KIND_TEXT, len(texts))
+                texts.append(label)
+            inline_row.append(InlineKeyboardButton(label, callback_data=data))
+        rows.append(inline_row)
+
+    if texts:
+        user_data[TEXT_KEY] = texts
+    return InlineKeyboardMarkup(rows)
+
+
+def resolve_callback(user_data: dict, data: str) -> str | None:
+    """
+    يرجع نص الزر المضغوط (ليُعالج كأنه كُتب)، أو None إن كانت اللوحة قديمة
+    (زر من شاشة لم تعد معروضة) فيُعاد عرض الشاشة الحالية.
+    """
+    unpacked = unpack_callback(data or "")
+    if unpacked is None:
+        return None
+    kind, value = unpacked
+    if kind == KIND_STATIC:
+        return STATIC_LABELS[value] if value < len(STATIC_LABELS) else None
+    if kind == KIND_TEXT:
+        texts = user_data.get(TEXT_KEY) or []
+        return texts[value] if value < len(texts) else None
+
+    indexed = _current_buttons(user_data)
+    if indexed is None or _KIND_NODES.get(kind) != indexed[0]:
+        return None
+    node_type, labels = indexed
+    if node_type == "lecture":
+        return list(labels)[value] if value < len(labels) else None
+    return next((label for label, _id in labels.items() if _id == value), None)
+
+
+# ---------------------------------------------------------------------------
+# بديل update.message للمعالجات
+# ---------------------------------------------------------------------------
+class InlineMessage:
+    """
+    يحاكي update.message.reply_text:
+    - أول رد يحمل لوحة يعدّل رسالة التنقل (إن وُجدت) بدل إرسال رسالة جديدة.
+    - الردود بلا لوحة (روابط الملفات) ومجموعات الوسائط والرسائل المنسوخة تُرسل كرسائل
+      جديدة، وبعدها تُرسل اللوحة في رسالة جديدة أسفلها حتى تبقى أزرار التنقل آخر ما في المحادثة.
+    """
+
+    def __init__(self, context, chat_id: int, text: str = "", editable: Message | None = None):
+        self._context = context
+        self._chat_id = chat_id
+        self._editable = editable
+        self.text = text
+
+    async def reply_text(self, text: str, reply_markup=None, **kwargs):
+        if isinstance(reply_markup, ReplyKeyboardMarkup):
+            reply_markup = inline_markup(self._context.user_data, reply_markup)
+        editable, self._editable = self._editable, None
+        if editable is not None and reply_markup is not None:
+            try:
+                return await editable.edit_text(text, reply_markup=reply_markup, **kwargs)
+            except BadRequest as exc:
+                # نفس النص واللوحة (ضغطة مكررة): لا شيء لتعديله
+                if "not modified" in str(exc).lower():
+                    return editable
+                raise
+        return await self._context.bot.send_message(self._chat_id, text, reply_markup=reply_markup, **kwargs)
+
+    def detach(self) -> None:
+        """أُرسلت رسائل أسفل رسالة التنقل (مثل copy_messages عبر البوت): لا نعدّلها بعد الآن."""
+        self._editable = None
+
+    async def reply_media_group(self, media, **kwargs):
+        self.detach()
+        return await self._context.bot.send_media_group(self._chat_id, media, **kwargs)
+
+
+class InlineUpdate:
+    """غلاف للتحديث يستبدل message فقط ويمرّر بقية الخصائص للتحديث الأصلي."""
+
+    def __init__(self, update, message: InlineMessage):
+        self._update = update
+        self.message = message
+
+    def __getattr__(self, name):
+        return getattr(self._update, name)
+
+
+def as_inline(update, context) -> InlineUpdate:
+    """يجهّز التحديث (رسالة نصية أو ضغطة زر مضمّن) للمعالجات في الوضع المضمّن."""
+    query = update.callback_query
+    if query is not None:
+        editable = query.message if isinstance(query.message, Message) else None
+        return InlineUpdate(update, InlineMessage(context, update.effective_chat.id, editable=editable))
+    text = update.message.text if update.message else ""
+    return InlineUpdate(update, InlineMessage(context, update.effective_chat.id, text=text))
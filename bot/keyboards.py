@@ -13,6 +13,10 @@ TERM_MENU_PLAN          = "🗂 الخطة الدراسية"
 TERM_MENU_LINKS         = "🔗 روابط المجموعات والقنوات"
 TERM_MENU_ADV_SEARCH    = "🔎 البحث المتقدم"
 
+MAIN_MENU_SEARCH   = "🔍 بحث"
+SEARCH_NEXT        = "⬅️ النتائج التالية"
+SEARCH_PREV        = "➡️ النتائج السابقة"
+
 BACK               = "🔙 العودة"
 BACK_TO_LEVELS     = "🔙 العودة لقائمة المستويات"
 BACK_TO_SUBJECTS   = "🔙 العودة لقائمة المواد"
@@ -80,7 +84,7 @@ def _rows(items: list[str], cols: int = 2) -> list[list[str]]:
 main_menu = ReplyKeyboardMarkup(
     keyboard=[
         ["📚 المستويات", "🗂 الخطة الدراسية"],
-        ["🔧 البرامج الهندسية", "🔍 بحث"],
+        ["🔧 البرامج الهندسية", MAIN_MENU_SEARCH],
         ["📡 القنوات والمجموعات", "🆘 مساعدة"],
         ["📨 تواصل معنا"],
     ],
@@ -264,4 +268,27 @@ def generate_lecture_category_menu_keyboard(categories: list[str]) -> ReplyKeybo
     keyboard.append([BACK_TO_LEVELS])
     return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
 
+def generate_search_results_keyboard(has_prev: bool, has_next: bool) -> ReplyKeyboardMarkup:
+    """
+    شاشة نتائج البحث: أزرار التنقل بين الصفحات (إن وُجدت) + الرجوع.
+    أي نص آخر يكتبه المستخدم يُعامل كبحث جديد.
+    """
+    keyboard = []
+    paging = [label for label, show in ((SEARCH_PREV, has_prev), (SEARCH_NEXT, has_next)) if show]
+    if paging:
+        keyboard.append(paging)
+    keyboard.append([BACK, BACK_TO_LEVELS])
+    return ReplyKeyboardMarkup(
+        keyboard=keyboard,
+        resize_keyboard=True,
+        input_field_placeholder="اكتب كلمة البحث…",
+    )
 
+def generate_suggestions_keyboard(labels: list[str]) -> ReplyKeyboardMarkup:
+    """
+    اقتراحات المطابقة التقريبية (مواد/محاضرون) لنص غير معروف:
+    الضغط على اقتراح يرسل اسمه فيُطابق تمامًا وينتقل إليه.
+    """
+    keyboard = _rows(labels, cols=1)
+    keyboard.append([BACK_TO_LEVELS])
+    return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
@@ -11,15 +11,63 @@ from telegram.ext import (
     CommandHandler,
     ConversationHandler,
     MessageHandler,
+    CallbackQueryHandler,
+    InlineQueryHandler,
+    TypeHandler,
     filters,
     ContextTypes,
-    idle,
 )
 
-from .config import BOT_TOKEN
+from .config import (
+    BOT_TOKEN,
+    DB_READ_POOL_SIZE,
+    DB_MMAP_SIZE,
+    DB_CACHE_SIZE,
+    WRITE_QUEUE_ENABLED,
+    WRITE_BATCH_MAX,
+    WRITE_BATCH_DELAY_MS,
+    QUERY_STATS_ENABLED,
+    SLOW_QUERY_MS,
+    SLOW_QUERY_LOG,
+    CATALOG_ENABLED,
+    CATALOG_POLL_SECONDS,
+    UI_MODE,
+    RENDER_CACHE_SIZE,
+    NAV_PERSISTENCE,
+    STATE_DB_PATH,
+    NAV_FLUSH_SECONDS,
+    IDLE_TTL_SECONDS,
+    MAX_RESIDENT_USERS,
+    EVICTION_SWEEP_SECONDS,
+    MAX_CONCURRENT_UPDATES,
+    UPDATE_MODE,
+    WEBHOOK_LISTEN,
+    WEBHOOK_PORT,
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_MAX_CONNECTIONS,
+    WEBHOOK_CERT,
+    WEBHOOK_KEY,
+    BOT_API_BASE_URL,
+    GROUP_ID,
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_GLOBAL,
+    RATE_LIMIT_GROUP,
+    RATE_LIMIT_PRIVATE,
+    RATE_LIMIT_MAX_RETRIES,
+    INLINE_CACHE_SECONDS,
+    INLINE_CACHE_SIZE,
+)
 
 # --- Database ---
 from .db import Database
+from .db.fuzzy import FuzzyIndex
+from .db.persistence import SQLitePersistence
+from .render_cache import QueryCache, RenderCache
+from .eviction import IdleEvictor
+from .update_processor import PerUserUpdateProcessor
+from .rate_limiter import PriorityRateLimiter
 
 # from reaction import handle_reaction
 
@@ -28,6 +76,7 @@ from .keyboards import (
     main_menu,
     BACK_TO_LEVELS,
     BACK_TO_SUBJECTS,
+    MAIN_MENU_SEARCH,
 )
 # --- Conversation states ---
 from .conversation import ALL_STATES, get_state, LEVEL
@@ -39,18 +88,14 @@ from .handlers import (
     handle_levels_menu,
     handle_back_main_menu,
     handle_smart_back,
-    handle_choose_level,
-    handle_choose_term,
-    handle_term_menu_options,
-    handle_choose_subject,
-    handle_choose_section,
-    handle_section_filters,
-    handle_choose_year_or_lecturer,
-    handle_lecturer_list_actions,
-    handle_year_category_menu_actions,
-    handle_lecture_title_choice,
-    handle_lecture_category_choice,
+    handle_search_start,
+    handle_fuzzy_jump,
+    open_deep_link,
+    handle_share,
+    handle_inline_query,
 )
+from .router import dispatch_text, render_state
+from .inline import as_inline, resolve_callback
 
 
 # --------------------------------------------------------------------------
@@ -62,6 +107,11 @@ logging.basicConfig(
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """نقطة الدخول لبدء المحادثة."""
+    if UI_MODE == "inline":
+        update = as_inline(update, context)
+    # رابط مباشر (t.me/<bot>?start=<payload>): نفتح الشاشة الهدف في نفس التحديث
+    if context.args and await open_deep_link(update, context, context.args[0]):
+        return get_state(context.user_data)
     nav_go_levels_list(context.user_data)
     await update.message.reply_text(
         "👋 مرحبًا بك في بوت أرشيف قسم الميكاترونكس.\nاختر من القائمة:",
@@ -70,6 +120,12 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return LEVEL
 
 
+async def share(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/share: رابط مباشر للشاشة الحالية (لا يغيّر الحالة)."""
+    if UI_MODE == "inline":
+        update = as_inline(update, context)
+    await handle_share(update, context)
+    return get_state(context.user_data)
 
 
 
@@ -79,37 +135,45 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """معالج الرسائل الأساسي ضمن ConversationHandler."""
     text = update.message.text if update.message else ""
+    if UI_MODE == "inline":
+        update = as_inline(update, context)
+    return await route_text(update, context, text)
+
+
+async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """ضغطة زر مضمّن (UI_MODE=inline): نحوّلها لنص الزر ونمررها بنفس مسار الرسائل."""
+    query = update.callback_query
+    await query.answer()
+    text = resolve_callback(context.user_data, query.data)
+    update = as_inline(update, context)
+    if text is None:
+        # لوحة قديمة (من شاشة سابقة): نعيد عرض الشاشة الحالية مكانها
+        await render_state(update, context)
+        return get_state(context.user_data)
+    return await route_text(update, context, text)
+
 
+async def route_text(update, context, text: str):
+    """يوجّه نص الزر/الرسالة للمعالج المناسب ويرجع حالة المحادثة."""
     handler = {
         BACK_TO_LEVELS: handle_back_to_levels,
         BACK_TO_SUBJECTS: handle_back_to_subjects,
         "📚 المستويات": handle_levels_menu,
         "🔙 العودة للقائمة الرئيسية": handle_back_main_menu,
         "🔙 العودة": handle_smart_back,
+        MAIN_MENU_SEARCH: handle_search_start,
     }.get(text)
 
     if handler:
         await handler(update, context)
         return get_state(context.user_data)
 
-    dynamic_handlers = [
-        handle_choose_level,
-        handle_choose_term,
-        handle_term_menu_options,
-        handle_choose_subject,
-        handle_choose_section,
-        handle_section_filters,
-        handle_choose_year_or_lecturer,
-        handle_lecturer_list_actions,
-        handle_year_category_menu_actions,
-        handle_lecture_title_choice,
-        handle_lecture_category_choice,
-    ]
-
-    for func in dynamic_handlers:
-        result = await func(update, context, text)
-        if result:
-            return get_state(context.user_data)
+    if await dispatch_text(update, context, text):
+        return get_state(context.user_data)
+
+    # نص لا يطابق أي زر: مطابقة تقريبية لاسم/رمز مادة أو اسم محاضر
+    if await handle_fuzzy_jump(update, context, text):
+        return get_state(context.user_data)
 
     if text.startswith("/"):
         await update.message.reply_text("هذا أمر خاص. لم يتم تفعيله بعد.")
@@ -136,25 +200,127 @@ async def main() -> None:
         except Exception:
             pass
 
-    async with Database() as db:
+    async with Database(
+        read_pool_size=DB_READ_POOL_SIZE,
+        mmap_size=DB_MMAP_SIZE,
+        cache_size=DB_CACHE_SIZE,
+    ) as db:
         await db.init_db()
-
-        app = ApplicationBuilder().token(BOT_TOKEN).build()
+        if QUERY_STATS_ENABLED:
+            db.enable_query_stats(slow_ms=SLOW_QUERY_MS)
+            if SLOW_QUERY_LOG:
+                handler = logging.FileHandler(SLOW_QUERY_LOG, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+                logging.getLogger("bot.db.slow_queries").addHandler(handler)
+        if WRITE_QUEUE_ENABLED:
+            await db.enable_write_queue(max_batch=WRITE_BATCH_MAX, max_delay=WRITE_BATCH_DELAY_MS / 1000)
+        if CATALOG_ENABLED:
+            catalog = await db.enable_catalog(poll_interval=CATALOG_POLL_SECONDS)
+            logging.info("Catalog snapshot: %s", catalog.stats())
+        else:
+            # كتابات العمليات الأخرى (seed.py --sync، import_manifest.py) تُبطل ذاكرة الشاشات أيضًا
+            await db.watch_external_writes(poll_interval=CATALOG_POLL_SECONDS)
+
+        builder = ApplicationBuilder().token(BOT_TOKEN)
+        if BOT_API_BASE_URL:
+            builder = builder.base_url(BOT_API_BASE_URL)
+        persistence = None
+        if NAV_PERSISTENCE:
+            persistence = SQLitePersistence(STATE_DB_PATH, update_interval=NAV_FLUSH_SECONDS)
+            builder = builder.persistence(persistence)
+        processor = None
+        if MAX_CONCURRENT_UPDATES > 1:
+            # مستخدمون مختلفون بالتوازي، وتحديثات كل مستخدم بالترتيب
+            processor = PerUserUpdateProcessor(MAX_CONCURRENT_UPDATES)
+            builder = builder.concurrent_updates(processor)
+        rate_limiter = None
+        if RATE_LIMIT_ENABLED:
+            # حدود Telegram للإرسال، مع أولوية ردود التنقل على تسليم المواد
+            rate_limiter = PriorityRateLimiter(
+                global_rate=RATE_LIMIT_GLOBAL,
+                group_rate=RATE_LIMIT_GROUP,
+                private_rate=RATE_LIMIT_PRIVATE,
+                group_ids=[GROUP_ID],
+                max_retries=RATE_LIMIT_MAX_RETRIES,
+            )
+            builder = builder.rate_limiter(rate_limiter)
+        app = builder.build()
         # Make the database instance available to all handlers via context
         app.bot_data["db"] = db
-
+        # فهرس المطابقة التقريبية: يُبنى مرة ثم يُحدَّث تدريجيًا عند الاستخدام
+        fuzzy = app.bot_data["fuzzy"] = FuzzyIndex()
+        logging.info("Fuzzy index: %d subjects/lecturers", await fuzzy.rebuild(db))
+        render_cache = app.bot_data["render_cache"] = RenderCache(RENDER_CACHE_SIZE)
+        inline_cache = app.bot_data["inline_cache"] = QueryCache(INLINE_CACHE_SIZE, INLINE_CACHE_SECONDS)
+
+        # الوضع المضمّن: ضغطات الأزرار تصل كـ callback_query (وتبدأ المحادثة أيضًا بعد إعادة التشغيل)
+        callback_handlers = [CallbackQueryHandler(handle_callback)] if UI_MODE == "inline" else []
+        state_handlers = [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message), *callback_handlers]
         conv_handler = ConversationHandler(
-            entry_points=[CommandHandler("start", start)],
-            states={state: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)] for state in ALL_STATES},
-            fallbacks=[],
+            # حالة المحادثة تُشتق من مكدس التنقل (get_state)، لذا تُقبل الرسائل كنقطة دخول أيضًا:
+            # بعد إعادة التشغيل يكمل المستخدم من حيث توقف بحالته المحفوظة دون /start
+            entry_points=[CommandHandler("start", start), *state_handlers],
+            states={state: state_handlers for state in ALL_STATES},
+            fallbacks=[CommandHandler("share", share)],
+            # يسمح بفتح رابط مباشر (/start <payload>) أثناء محادثة قائمة
+            allow_reentry=True,
         )
         app.add_handler(conv_handler)
+        # البحث المضمّن (@bot كلمة) من أي محادثة
+        app.add_handler(InlineQueryHandler(handle_inline_query))
+
+        # إخراج المستخدمين الخاملين: تسجيل النشاط قبل أي معالج (المجموعة -1)
+        evictor = IdleEvictor(
+            app,
+            ttl=IDLE_TTL_SECONDS,
+            max_users=MAX_RESIDENT_USERS,
+            interval=EVICTION_SWEEP_SECONDS,
+            conversations=[conv_handler],
+        )
+        app.add_handler(TypeHandler(Update, evictor.touch), group=-1)
 
         print("✅ Bot is running...")
         async with app:
             await app.start()
-            await app.updater.start_polling()
-            await idle()
+            if UPDATE_MODE == "webhook":
+                # Telegram يدفع التحديثات إلى خادم PTB؛ المسار والترويسة السريان يرفضان غيره
+                await app.updater.start_webhook(
+                    listen=WEBHOOK_LISTEN,
+                    port=WEBHOOK_PORT,
+                    url_path=WEBHOOK_PATH,
+                    webhook_url=f"{WEBHOOK_URL}/{WEBHOOK_PATH}",
+                    secret_token=WEBHOOK_SECRET,
+                    max_connections=WEBHOOK_MAX_CONNECTIONS,
+                    cert=WEBHOOK_CERT,
+                    key=WEBHOOK_KEY,
+                )
+                logging.info(
+                    "Webhook listening on %s:%d (%s)", WEBHOOK_LISTEN, WEBHOOK_PORT,
+                    "TLS" if WEBHOOK_CERT else "TLS terminated upstream",
+                )
+            else:
+                await app.updater.start_polling()
+            evictor.start()
+            try:
+                # ننتظر حتى الإيقاف (Ctrl+C يلغي المهمة)
+                await asyncio.Event().wait()
+            finally:
+                await evictor.stop()
+                await app.updater.stop()
+                await app.stop()
+                logging.info("Render cache: %s", render_cache.stats())
+                logging.info("Inline search cache: %s", inline_cache.stats())
+                logging.info("Resident users: %s", evictor.stats())
+                if processor is not None:
+                    logging.info("Update processing: %s", processor.stats())
+                if persistence is not None:
+                    logging.info("Nav persistence: %s", persistence.stats())
+                if rate_limiter is not None:
+                    logging.info("Outgoing requests: %s", rate_limiter.stats())
+                if db.write_queue is not None:
+                    logging.info("Database writes: %s", db.write_queue.stats())
+                if db.query_stats is not None:
+                    logging.info("Query latency (top 15 by total time): %s", db.query_stats.stats(top=15))
 
 
 
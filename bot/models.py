@@ -1,5 +1,5 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 
 
@@ -29,3 +29,75 @@ class Material:
     url: Optional[str] = None
     year_id: Optional[int] = None
     lecturer_id: Optional[int] = None
+    # message in the archive channel holding the file (chat None = ARCHIVE_CHANNEL_ID)
+    archive_chat_id: Optional[int] = None
+    archive_message_id: Optional[int] = None
+
+
+@dataclass
+class SectionSnapshot:
+    """Everything the section (filters) screen needs, loaded in one query."""
+    years: list[tuple[int, str]] = field(default_factory=list)
+    lecturers: list[Lecturer] = field(default_factory=list)
+    categories: set[str] = field(default_factory=set)
+
+    @property
+    def lectures_exist(self) -> bool:
+        return "lecture" in self.categories
+
+
+@dataclass
+class YearMenuSnapshot:
+    """Data for the year category menu (optionally scoped to a lecturer)."""
+    lectures_exist: bool = False
+    categories: list[str] = field(default_factory=list)
+
+
+@dataclass
+class LecturerSnapshot:
+    """Data for a lecturer's screen inside a subject section."""
+    years: list[tuple[int, str]] = field(default_factory=list)
+    lectures_exist: bool = False
+
+
+@dataclass
+class SearchHit:
+    """One ranked full-text search result."""
+    material_id: int
+    subject_id: int
+    subject_name: str
+    section: str
+    category: str
+    title: str
+    url: Optional[str] = None
+
+
+@dataclass
+class SubjectPath:
+    """A subject together with the level and term it belongs to."""
+    subject_id: int
+    subject_name: str
+    code: str
+    level_id: int
+    level_name: str
+    term_id: int
+    term_name: str
+
+
+@dataclass
+class FuzzyMatch:
+    """A typo-tolerant match of free text against a subject or lecturer."""
+    kind: str  # "subject" | "lecturer"
+    id: int
+    label: str
+    score: float
+
+
+@dataclass
+class DeepLink:
+    """A navigation path carried by a ``/start`` payload or share code."""
+    subject_id: int
+    section: Optional[str] = None
+    lecturer_id: Optional[int] = None
+    year_id: Optional[int] = None
+    lecture: Optional[int] = None  # Database.get_lecture_key: id of the title's first material
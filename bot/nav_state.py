@@ -0,0 +1,202 @@
+# nav_state.py
+# تمثيل مضغوط لحالة التنقل لكل مستخدم (user_data["nav"]):
+# - NavState بـ __slots__: المسار مصفوفة بايتات من أرقام أنواع العقد، والبيانات حقول
+#   ثابتة (معرّفات فقط) بدل قاموس وقائمة من (نوع، تسمية) لكل مستخدم.
+# - التسميات لا تُخزن لكل مستخدم: تُستعاد من جدول مشترك (LABELS) بمفتاح (نوع العقدة، المعرّف)،
+#   فاسم المادة مثلًا نسخة واحدة في العملية مهما كان عدد المستخدمين داخلها.
+# - فهرس الأزرار يُحفظ كما أُعطي (أزواج (id, label))؛ من ذاكرة الشاشات يكون كائنًا مشتركًا.
+# - to_dict/from_dict بالشكل القديم {"stack", "data", "buttons"} للحفظ (JSON) والترحيل.
+
+import sys
+
+# أرقام أنواع العقد (الترتيب جزء من التمثيل: أضف في النهاية فقط)
+NODE_TYPES = (
+    "level", "term", "subject", "section", "year", "lecturer", "lecture",
+    "term_list", "subject_list", "year_list", "lecturer_list", "lecture_list",
+    "year_category_menu", "lecture_category_menu", "search",
+)
+NODE_CODES = {node_type: code for code, node_type in enumerate(NODE_TYPES)}
+
+# حقول البيانات المعروفة (غيرها يُحفظ في extra عند الحاجة)
+DATA_FIELDS = (
+    "level_id", "term_id", "subject_id", "section", "year_id", "lecturer_id",
+    "lecture_title", "search_query", "search_page",
+)
+_DATA_SET = frozenset(DATA_FIELDS)
+
+# نوع العقدة → الحقل الذي يحمل معرّفها (وبه تُستعاد تسميتها)
+NODE_FIELD = {
+    "level": "level_id",
+    "term": "term_id",
+    "subject": "subject_id",
+    "section": "section",
+    "year": "year_id",
+    "lecturer": "lecturer_id",
+    "lecture": "lecture_title",
+}
+_CODE_FIELD = {NODE_CODES[t]: f for t, f in NODE_FIELD.items()}
+_LECTURE = NODE_CODES["lecture"]
+
+
+class LabelTable:
+    """جدول مشترك (نوع العقدة، المعرّف) → التسمية، نسخة واحدة لكل كيان."""
+
+    __slots__ = ("_labels",)
+
+    def __init__(self) -> None:
+        self._labels: dict = {}
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def put(self, code: int, _id, label: str) -> None:
+        if _id is None or not label or code == _LECTURE:
+            return
+        key = (code, _id)
+        if self._labels.get(key) != label:
+            self._labels[key] = label
+
+    def get(self, code: int, _id) -> str:
+        if code == _LECTURE:
+            return _id or ""
+        return self._labels.get((code, _id), "")
+
+    def clear(self) -> None:
+        self._labels.clear()
+
+
+LABELS = LabelTable()
+
+
+class NavState:
+    __slots__ = ("nodes", *DATA_FIELDS, "buttons", "extra")
+
+    def __init__(self) -> None:
+        self.nodes = bytearray()
+        for name in DATA_FIELDS:
+            setattr(self, name, None)
+        # (screen code | None, node type code, ((id, label), ...)) — انظر nav_set_buttons
+        self.buttons = None
+        # نادر: تسميات شاشات الواجهة ومفاتيح بيانات غير معروفة
+        self.extra = None
+
+    # ------------------------------------------------------------------
+    # المسار
+    # ------------------------------------------------------------------
+    def top(self) -> str | None:
+        return NODE_TYPES[self.nodes[-1]] if self.nodes else None
+
+    def upsert(self, node_type: str, label: str = "") -> None:
+        """مثل _upsert_stack القديم: يبقي العقدة في موضعها إن وُجدت، وإلا يضيفها."""
+        code = NODE_CODES[node_type]
+        if code not in _CODE_FIELD and label:
+            self._extra()[("label", code)] = label
+        if self.nodes.find(code) < 0:
+            self.nodes.append(code)
+
+    def truncate_after(self, node_type: str) -> None:
+        i = self.nodes.find(NODE_CODES[node_type])
+        if i >= 0:
+            del self.nodes[i + 1:]
+
+    def pop(self) -> str | None:
+        if not self.nodes:
+            return None
+        node_type = NODE_TYPES[self.nodes.pop()]
+        if self.extra:
+            self.extra.pop(("label", NODE_CODES[node_type]), None)
+        return node_type
+
+    def label(self, node_type: str | None = None) -> str:
+        """تسمية العقدة (الأعلى افتراضيًا) من الجدول المشترك."""
+        if node_type is None:
+            if not self.nodes:
+                return ""
+            code = self.nodes[-1]
+        else:
+            code = NODE_CODES[node_type]
+            if self.nodes.find(code) < 0:
+                return ""
+        field = _CODE_FIELD.get(code)
+        if field is None:
+            return (self.extra or {}).get(("label", code), "")
+        return LABELS.get(code, getattr(self, field))
+
+    def stack(self) -> list[tuple[str, str]]:
+        return [(NODE_TYPES[code], self.label(NODE_TYPES[code])) for code in self.nodes]
+
+    # ------------------------------------------------------------------
+    # البيانات
+    # ------------------------------------------------------------------
+    def _extra(self) -> dict:
+        if self.extra is None:
+            self.extra = {}
+        return self.extra
+
+    def get(self, key: str, default=None):
+        if key in _DATA_SET:
+            value = getattr(self, key)
+        else:
+            value = (self.extra or {}).get(key)
+        return default if value is None else value
+
+    def set(self, key: str, value) -> None:
+        if key == "lecture_title" and isinstance(value, str):
+            value = sys.intern(value)
+        if key in _DATA_SET:
+            setattr(self, key, value)
+        else:
+            self._extra()[key] = value
+
+    def discard(self, key: str) -> None:
+        if key in _DATA_SET:
+            setattr(self, key, None)
+        elif self.extra:
+            self.extra.pop(key, None)
+
+    def data(self) -> dict:
+        values = {name: getattr(self, name) for name in DATA_FIELDS if getattr(self, name) is not None}
+        for key, value in (self.extra or {}).items():
+            if isinstance(key, str):
+                values[key] = value
+        return values
+
+    def reset(self) -> None:
+        self.__init__()
+
+    # ------------------------------------------------------------------
+    # التحويل من/إلى الشكل القديم (قاموس)
+    # ------------------------------------------------------------------
+    def to_dict(self) -> dict:
+        out = {"stack": self.stack(), "data": self.data()}
+        if self.buttons is not None:
+            screen, code, pairs = self.buttons
+            out["buttons"] = (
+                NODE_TYPES[screen] if screen is not None else None,
+                NODE_TYPES[code],
+                {label: _id for _id, label in pairs},
+            )
+        return out
+
+    @classmethod
+    def from_dict(cls, nav: dict) -> "NavState":
+        state = cls()
+        for key, value in (nav.get("data") or {}).items():
+            state.set(key, value)
+        for node_type, label in nav.get("stack") or ():
+            if node_type not in NODE_CODES:
+                continue
+            state.upsert(node_type, label)
+            code = NODE_CODES[node_type]
+            field = _CODE_FIELD.get(code)
+            if field is not None:
+                LABELS.put(code, getattr(state, field), label)
+        buttons = nav.get("buttons")
+        if buttons and buttons[1] in NODE_CODES and (buttons[0] is None or buttons[0] in NODE_CODES):
+            screen, node_type, labels = buttons
+            state.buttons = (
+                NODE_CODES[screen] if screen is not None else None,
+                NODE_CODES[node_type],
+                tuple((_id, label) for label, _id in labels.items()),
+            )
+        return state
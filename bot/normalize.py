@@ -0,0 +1,42 @@
+# normalize.py
+# توحيد النص العربي قبل البحث:
+# - حذف التشكيل (الحركات، الشدة، السكون، الألف الخنجرية) والتطويل (ـ)
+# - توحيد أشكال الألف (أ إ آ ٱ → ا) والياء (ى ی → ي) والتاء المربوطة (ة → ه)
+#
+# نفس الجدول يُستخدم لتوليد تعبير SQL مكافئ (sql_normalize) حتى تبقى
+# مشغلات فهرس البحث داخل SQLite متطابقة تمامًا مع تطبيع الاستعلام في بايثون،
+# دون الحاجة لتسجيل دوال بايثون على كل اتصال.
+# الجدول قصير عمدًا: كل زوج يضيف مستوى replace() متداخلًا، وSQLite يرفض التعابير الأعمق من ~25 مستوى.
+
+# الفتحتان .. السكون، الألف الخنجرية، التطويل
+_DIACRITICS = [chr(c) for c in range(0x064B, 0x0653)] + ["\u0670", "\u0640"]
+
+_REPLACEMENTS = {
+    "آ": "ا",  # آ → ا
+    "أ": "ا",  # أ → ا
+    "إ": "ا",  # إ → ا
+    "ٱ": "ا",  # ٱ → ا
+    "ى": "ي",  # ى → ي
+    "ی": "ي",  # ی → ي
+    "ة": "ه",  # ة → ه
+}
+
+# أزواج (من، إلى) بالترتيب المستخدم في بايثون وSQL
+PAIRS: list[tuple[str, str]] = [(ch, "") for ch in _DIACRITICS] + list(_REPLACEMENTS.items())
+
+_TABLE = str.maketrans({src: dst for src, dst in PAIRS})
+
+
+def normalize_arabic(text: str | None) -> str:
+    """يرجع النص بعد التطبيع (الحالة الحرفية اللاتينية تُترك لمحلل FTS)."""
+    if not text:
+        return ""
+    return text.translate(_TABLE)
+
+
+def sql_normalize(expr: str) -> str:
+    """يبني تعبير SQL يطبّق نفس التطبيع على العمود/التعبير المعطى."""
+    for src, dst in PAIRS:
+        target = f"char({ord(dst)})" if dst else "''"
+        expr = f"replace({expr}, char({ord(src)}), {target})"
+    return expr
@@ -0,0 +1,251 @@
+# rate_limiter.py
+# جدولة الطلبات الصادرة إلى Bot API (BaseRateLimiter في PTB):
+# - بدونها تتحول دفعات الردود (قوائم المواد) إلى RetryAfter وردود ضائعة.
+# - دلو رموز عام (~30 رسالة/ث لكل البوت) ودلو لكل مجموعة (~1/ث، ومنها GROUP_ID)؛
+#   المحادثات الخاصة بلا دلو افتراضيًا (Telegram يتسامح مع الدفعات القصيرة فيها).
+# - الطلبات تنتظر في طابور أولويات: ردود التنقل (تحمل لوحة أو تعدّل رسالة) أولًا، ثم تسليم المواد،
+#   ثم الإذاعات (rate_limit_args=PRIORITY_BROADCAST). طلب محادثة مقيّدة لا يحجز دور غيره.
+# - عند RetryAfter يتوقف الإرسال كله المدة المطلوبة (مع تذبذب عشوائي) ثم يُعاد الطلب بنفس أولويته.
+
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+from datetime import timedelta
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+PRIORITY_BROADCAST = 2
+_PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BULK: "bulk", PRIORITY_BROADCAST: "broadcast"}
+
+# طلبات لا تُرسل رسائل: تمر مباشرة (getUpdates لا يصل أصلًا، انظر ExtBot._do_post)
+_UNLIMITED_ENDPOINTS = frozenset({
+    "getMe", "getUpdates", "setWebhook", "deleteWebhook", "getWebhookInfo", "close", "logOut",
+    "answerCallbackQuery", "answerInlineQuery", "getChat", "getChatMember", "getFile",
+})
+# تعديل رسالة التنقل نفسها (الوضع المضمّن)
+_INTERACTIVE_ENDPOINTS = frozenset({"editMessageText", "editMessageReplyMarkup"})
+
+# تُحذف دلاء المجموعات الممتلئة (غير النشطة) حين يتجاوز عددها هذا
+_MAX_IDLE_BUCKETS = 1024
+
+
+class TokenBucket:
+    """دلو رموز: rate رمزًا في الثانية بسعة capacity."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _fill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait(self, now: float) -> float:
+        """الثواني حتى يتوفر رمز (0 إن توفر الآن)."""
+        self._fill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._fill(now)
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        self._fill(now)
+        return self.tokens >= self.capacity
+
+
+def _seconds(value) -> float:
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+class PriorityRateLimiter(BaseRateLimiter[int]):
+    """يحد الطلبات الصادرة بدلاء رموز ويخدمها حسب الأولوية؛ rate_limit_args = الأولوية."""
+
+    def __init__(
+        self,
+        *,
+        global_rate: float = 30.0,
+        group_rate: float = 1.0,
+        private_rate: float = 0.0,
+        group_ids=(),
+        max_retries: int = 3,
+        jitter: float = 0.25,
+    ) -> None:
+        if global_rate <= 0 or group_rate <= 0 or private_rate < 0 or max_retries < 0 or jitter < 0:
+            raise ValueError("rates must be positive (private_rate >= 0), max_retries/jitter >= 0")
+        self.global_rate = global_rate
+        self.group_rate = group_rate
+        self.private_rate = private_rate
+        self.group_ids = {int(g) for g in group_ids if g is not None}
+        self.max_retries = max_retries
+        self.jitter = jitter
+        self._global: TokenBucket | None = None
+        self._chats: dict[object, TokenBucket] = {}
+        # (الأولوية، الترتيب، المحادثة، future، وقت الدخول)
+        self._queue: list[tuple] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        # المقاييس
+        self.peak_depth = 0
+        self.granted = {name: 0 for name in _PRIORITY_NAMES.values()}
+        self.wait_total = {name: 0.0 for name in _PRIORITY_NAMES.values()}
+        self.wait_max = {name: 0.0 for name in _PRIORITY_NAMES.values()}
+        self.retries = 0
+        self.retry_after_seconds = 0.0
+
+    # ------------------------------------------------------------------
+    # دورة الحياة
+    # ------------------------------------------------------------------
+    async def initialize(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._dispatch())
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for *_rest, future, _t in self._queue:
+            if not future.done():
+                future.cancel()
+        self._queue.clear()
+
+    # ------------------------------------------------------------------
+    # التصنيف
+    # ------------------------------------------------------------------
+    @staticmethod
+    def priority_of(endpoint: str, data: dict, rate_limit_args: int | None) -> int:
+        if rate_limit_args is not None:
+            return int(rate_limit_args)
+        if endpoint in _INTERACTIVE_ENDPOINTS or data.get("reply_markup") is not None:
+            return PRIORITY_INTERACTIVE
+        return PRIORITY_BULK
+
+    def _chat_bucket(self, chat_id, now: float) -> TokenBucket | None:
+        if chat_id is None:
+            return None
+        bucket = self._chats.get(chat_id)
+        if bucket is not None:
+            return bucket
+        # المجموعات والقنوات: معرّف سالب أو @username أو GROUP_ID
+        is_group = isinstance(chat_id, str) or int(chat_id) < 0 or int(chat_id) in self.group_ids
+        rate = self.group_rate if is_group else self.private_rate
+        if not rate:
+            return None
+        if len(self._chats) >= _MAX_IDLE_BUCKETS:
+            self._chats = {k: b for k, b in self._chats.items() if not b.full(now)}
+        bucket = self._chats[chat_id] = TokenBucket(rate, 1.0, now)
+        return bucket
+
+    # ------------------------------------------------------------------
+    # الطلبات
+    # ------------------------------------------------------------------
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        if endpoint in _UNLIMITED_ENDPOINTS:
+            return await callback(*args, **kwargs)
+        priority = self.priority_of(endpoint, data, rate_limit_args)
+        chat_id = data.get("chat_id")
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(priority, chat_id)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as exc:
+                if attempt == self.max_retries:
+                    raise
+                delay = _seconds(exc.retry_after) * (1 + random.uniform(0, self.jitter))
+                self.retries += 1
+                self.retry_after_seconds += delay
+                loop = asyncio.get_running_loop()
+                self._paused_until = max(self._paused_until, loop.time() + delay)
+                logger.warning("RetryAfter on %s (chat %s): pausing %.2f s", endpoint, chat_id, delay)
+
+    async def _acquire(self, priority: int, chat_id) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), chat_id, future, loop.time()))
+        self.peak_depth = max(self.peak_depth, len(self._queue))
+        self._wakeup.set()
+        await future
+
+    async def _sleep(self, seconds: float) -> None:
+        """ينام حتى seconds أو حتى يصل طلب جديد (قد تكون محادثته غير مقيّدة)."""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._global = TokenBucket(self.global_rate, self.global_rate, loop.time())
+        while True:
+            self._wakeup.clear()
+            if not self._queue:
+                await self._wakeup.wait()
+                continue
+            now = loop.time()
+            wait = max(self._paused_until - now, self._global.wait(now))
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            # أول طلب بترتيب الأولوية لا تمنعه حدود محادثته
+            deferred, granted, chat_wait = [], None, None
+            while self._queue:
+                item = heapq.heappop(self._queue)
+                if item[3].done():  # أُلغي الطلب أثناء الانتظار
+                    continue
+                bucket = self._chat_bucket(item[2], now)
+                delay = bucket.wait(now) if bucket is not None else 0.0
+                if delay:
+                    deferred.append(item)
+                    chat_wait = delay if chat_wait is None else min(chat_wait, delay)
+                    continue
+                granted = item
+                break
+            for item in deferred:
+                heapq.heappush(self._queue, item)
+            if granted is None:
+                if chat_wait is not None:
+                    await self._sleep(chat_wait)
+                continue
+            priority, _seq, chat_id, future, enqueued = granted
+            self._global.take(now)
+            if bucket is not None:
+                bucket.take(now)
+            name = _PRIORITY_NAMES.get(priority, str(priority))
+            waited = now - enqueued
+            self.granted[name] = self.granted.get(name, 0) + 1
+            self.wait_total[name] = self.wait_total.get(name, 0.0) + waited
+            self.wait_max[name] = max(self.wait_max.get(name, 0.0), waited)
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": len(self._queue),
+            "peak_depth": self.peak_depth,
+            "granted": dict(self.granted),
+            "mean_wait_ms": {
+                name: round(self.wait_total[name] / count * 1000, 1)
+                for name, count in self.granted.items() if count
+            },
+            "max_wait_ms": {name: round(w * 1000, 1) for name, w in self.wait_max.items() if w},
+            "retries": self.retries,
+            "retry_after_seconds": round(self.retry_after_seconds, 2),
+            "chat_buckets": len(self._chats),
+        }
@@ -0,0 +1,116 @@
+# render_cache.py
+# ذاكرة مؤقتة (LRU محدودة الحجم) للشاشات المبنية بالكامل: نص الرسالة + لوحة الأزرار
+# + فهرس الأزرار (لـ nav_set_buttons). الشاشات الشائعة (قائمة المستويات، مواد ترم،
+# أقسام مادة، فلاتر قسم) تتكرر آلاف المرات بنفس المحتوى، فتصبح كلفتها بحثًا في قاموس
+# بدل استعلامات + بناء ReplyKeyboardMarkup من جديد.
+# - المفتاح: نوع الشاشة + بيانات التنقل التي تحدد محتواها (معرّفات/تسميات).
+# - الصلاحية: عند تغيّر Database.change_version (أي كتابة، أو إعادة بناء الكتالوج،
+#   أو commit من اتصال آخر يلاحظه Database.watch_external_writes)
+#   تُفرغ الذاكرة كلها، فلا تُعرض شاشة قديمة بعد تعديل البيانات.
+# - لوحات telegram غير قابلة للتعديل بعد إنشائها، لذا تُشارك بأمان بين المستخدمين.
+# QueryCache: نفس الفكرة لنتائج البحث المضمّن (@bot ...) مع مدة صلاحية ttl لكل مدخل.
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable
+
+
+@dataclass(frozen=True)
+class Screen:
+    """شاشة جاهزة للإرسال كما هي."""
+    text: str
+    markup: Any
+    # (node_type, ((id, label), ...)) لفهرس الأزرار، أو None للشاشات بلا أزرار ديناميكية
+    buttons: tuple | None = None
+
+
+class RenderCache:
+    """LRU بحد أقصى maxsize شاشة؛ maxsize=0 يعطّل التخزين."""
+
+    def __init__(self, maxsize: int = 512) -> None:
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        self.maxsize = maxsize
+        self._screens: "OrderedDict[Hashable, Screen]" = OrderedDict()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._screens)
+
+    def _check_version(self, version) -> None:
+        if version != self._version:
+            if self._screens:
+                self.invalidations += 1
+                self._screens.clear()
+            self._version = version
+
+    def get(self, key: Hashable, version=None) -> Screen | None:
+        self._check_version(version)
+        screen = self._screens.get(key)
+        if screen is None:
+            self.misses += 1
+            return None
+        self._screens.move_to_end(key)
+        self.hits += 1
+        return screen
+
+    def put(self, key: Hashable, screen: Screen, version=None) -> None:
+        # شاشة بُنيت قبل كتابة حدثت أثناء بنائها: لا نخزّنها
+        if not self.maxsize or version != self._version:
+            return
+        self._screens[key] = screen
+        self._screens.move_to_end(key)
+        while len(self._screens) > self.maxsize:
+            self._screens.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._screens.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._screens),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class QueryCache(RenderCache):
+    """RenderCache لقيم عامة، ينتهي كل مدخل فيها بعد ttl ثانية."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, clock=time.monotonic) -> None:
+        if ttl <= 0:
+            raise ValueError("ttl must be > 0")
+        super().__init__(maxsize)
+        self.ttl = ttl
+        self._clock = clock
+        self.expired = 0
+
+    def get(self, key: Hashable, version=None):
+        entry = super().get(key, version)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= self._clock():
+            del self._screens[key]
+            self.hits -= 1
+            self.misses += 1
+            self.expired += 1
+            return None
+        return value
+
+    def put(self, key: Hashable, value, version=None) -> None:
+        super().put(key, (self._clock() + self.ttl, value), version)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "ttl": self.ttl, "expired": self.expired}
@@ -0,0 +1,137 @@
+# router.py
+# توجيه الرسائل النصية إلى المعالج المالك للشاشة الحالية.
+# - الشاشة الحالية = نوع العقدة في أعلى مكدس التنقل (nav_top).
+# - إن كان النص زرًا من فهرس الأزرار نذهب مباشرة لمعالج نوعه،
+#   وإلا نجرب المعالج المالك لهذه الشاشة فقط، وإن لم يتعرف على النص
+#   نرجع للطريقة القديمة: تجربة كل المعالجات الديناميكية بالترتيب.
+# - render_state يعيد عرض الشاشة الحالية (تستخدمه أزرار الرجوع).
+
+from .helpers import nav_top, nav_back_one, nav_resolve_button
+from .handlers import (
+    render_level,
+    render_term_list,
+    render_term,
+    render_subject,
+    render_subject_list,
+    render_section,
+    render_year,
+    render_lecturer,
+    render_year_list,
+    render_lecturer_list,
+    render_lecture_list,
+    render_year_category_menu,
+    render_lecture_category_menu,
+    render_search,
+    handle_choose_level,
+    handle_choose_term,
+    handle_term_menu_options,
+    handle_choose_subject,
+    handle_choose_section,
+    handle_section_filters,
+    handle_choose_year_or_lecturer,
+    handle_lecturer_list_actions,
+    handle_year_category_menu_actions,
+    handle_lecture_title_choice,
+    handle_lecture_category_choice,
+    handle_search_query,
+)
+
+# الترتيب القديم لتجربة المعالجات (يُستخدم كاحتياط فقط)
+FALLBACK_HANDLERS = [
+    handle_choose_level,
+    handle_choose_term,
+    handle_term_menu_options,
+    handle_choose_subject,
+    handle_choose_section,
+    handle_section_filters,
+    handle_choose_year_or_lecturer,
+    handle_lecturer_list_actions,
+    handle_year_category_menu_actions,
+    handle_lecture_title_choice,
+    handle_lecture_category_choice,
+]
+
+# نوع العقدة في أعلى المكدس → المعالج الذي يملك أزرار تلك الشاشة
+SCREEN_HANDLERS = {
+    None: handle_choose_level,
+    "level": handle_choose_level,
+    "term_list": handle_choose_term,
+    "term": handle_term_menu_options,
+    "subject_list": handle_choose_subject,
+    "subject": handle_choose_section,
+    "section": handle_section_filters,
+    "year_list": handle_choose_year_or_lecturer,
+    "lecturer_list": handle_choose_year_or_lecturer,
+    "lecturer": handle_lecturer_list_actions,
+    "year": handle_lecture_title_choice,
+    "year_category_menu": handle_year_category_menu_actions,
+    "lecture_list": handle_lecture_title_choice,
+    "lecture": handle_lecture_title_choice,
+    "lecture_category_menu": handle_lecture_category_choice,
+    "search": handle_search_query,
+}
+
+# نوع الزر في فهرس الأزرار (nav_set_buttons) → المعالج الذي يفتح وجهته
+BUTTON_HANDLERS = {
+    "level": handle_choose_level,
+    "term": handle_choose_term,
+    "subject": handle_choose_subject,
+    "year": handle_choose_year_or_lecturer,
+    "lecturer": handle_choose_year_or_lecturer,
+    "lecture": handle_lecture_title_choice,
+}
+
+# نوع العقدة في أعلى المكدس → دالة إعادة عرض الشاشة
+SCREEN_RENDERERS = {
+    None: render_level,
+    "level": render_level,
+    "term_list": render_term_list,
+    "term": render_term,
+    "subject_list": render_subject_list,
+    "subject": render_subject,
+    "section": render_section,
+    "year": render_year,
+    "lecturer": render_lecturer,
+    "year_list": render_year_list,
+    "lecturer_list": render_lecturer_list,
+    "lecture_list": render_lecture_list,
+    "lecture": render_lecture_list,
+    "year_category_menu": render_year_category_menu,
+    "lecture_category_menu": render_lecture_category_menu,
+    "search": render_search,
+}
+
+
+async def dispatch_fallthrough(update, context, text, skip=None):
+    """السلوك القديم: تجربة كل المعالجات حتى يتعرف أحدها على النص."""
+    for func in FALLBACK_HANDLERS:
+        if func is skip:
+            continue
+        result = await func(update, context, text)
+        if result:
+            return result
+    return None
+
+
+async def dispatch_text(update, context, text):
+    """يوجّه النص مباشرة لمالك الشاشة الحالية، ثم للاحتياط عند الحاجة."""
+    hit = nav_resolve_button(context.user_data, text)
+    owner = BUTTON_HANDLERS.get(hit[0]) if hit else None
+    if owner is None:
+        owner = SCREEN_HANDLERS.get(nav_top(context.user_data))
+    if owner is not None:
+        result = await owner(update, context, text)
+        if result:
+            return result
+    return await dispatch_fallthrough(update, context, text, skip=owner)
+
+
+async def render_state(update, context):
+    """يعيد عرض الشاشة المطابقة لأعلى عقدة في مكدس التنقل."""
+    top = nav_top(context.user_data)
+    renderer = SCREEN_RENDERERS.get(top)
+    if renderer is None:
+        # عقدة غير معروفة: نرجع خطوة ونحاول مجددًا
+        nav_back_one(context.user_data)
+        return await render_state(update, context)
+    return await renderer(update, context)
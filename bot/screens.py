@@ -0,0 +1,88 @@
+# screens.py
+# بناء الشاشات المتكررة عبر ذاكرة الشاشات (render_cache):
+# كل دالة ترجع Screen جاهزة (نص + لوحة + فهرس أزرار)، تُبنى من القاعدة مرة
+# ثم تُقدَّم من الذاكرة حتى تتغير البيانات. send_screen يرسلها ويحدّث فهرس الأزرار.
+
+from .helpers import get_db, get_render_cache, nav_set_buttons
+from .render_cache import Screen
+from .keyboards import (
+    generate_levels_keyboard,
+    generate_terms_keyboard,
+    generate_term_menu_keyboard_dynamic,
+    generate_subjects_keyboard,
+    generate_subject_sections_keyboard_dynamic,
+    generate_section_filters_keyboard_dynamic,
+)
+
+
+async def _cached(context, key, build) -> Screen:
+    db = get_db(context)
+    cache = get_render_cache(context)
+    version = db.change_version
+    screen = cache.get(key, version)
+    if screen is None:
+        screen = await build(db)
+        cache.put(key, screen, version)
+    return screen
+
+
+async def send_screen(update, context, screen: Screen, text: str | None = None):
+    """يرسل الشاشة (بنص بديل إن أُعطي) ويحفظ فهرس أزرارها للشاشة الحالية."""
+    if screen.buttons is not None:
+        nav_set_buttons(context.user_data, *screen.buttons)
+    return await update.message.reply_text(text or screen.text, reply_markup=screen.markup)
+
+
+# ---------------------------------------------------------------------------
+# الشاشات
+# ---------------------------------------------------------------------------
+async def levels_screen(context) -> Screen:
+    async def build(db):
+        levels = tuple(await db.get_levels())
+        return Screen("اختر المستوى:", generate_levels_keyboard(levels), ("level", levels))
+
+    return await _cached(context, ("levels",), build)
+
+
+async def terms_screen(context, level_id, heading: str = "اختر الترم:") -> Screen:
+    async def build(db):
+        terms = tuple(await db.get_terms_by_level(level_id))
+        return Screen(heading, generate_terms_keyboard(terms), ("term", terms))
+
+    return await _cached(context, ("terms", level_id, heading), build)
+
+
+async def term_menu_screen(context, level_id, term_id, heading: str = "اختر:") -> Screen:
+    async def build(db):
+        flags = await db.term_feature_flags(level_id, term_id)
+        return Screen(heading, generate_term_menu_keyboard_dynamic(flags))
+
+    return await _cached(context, ("term_menu", level_id, term_id, heading), build)
+
+
+async def subjects_screen(context, level_id, term_id) -> Screen:
+    async def build(db):
+        subjects = await db.get_subjects_by_level_and_term(level_id, term_id)
+        msg = "اختر المادة:" if subjects else "لا توجد مواد لهذا الترم."
+        pairs = tuple((s.id, s.name) for s in subjects)
+        return Screen(msg, generate_subjects_keyboard(subjects), ("subject", pairs))
+
+    return await _cached(context, ("subjects", level_id, term_id), build)
+
+
+async def subject_sections_screen(context, subject_id, label: str) -> Screen:
+    async def build(db):
+        sections = await db.get_available_sections_for_subject(subject_id) if subject_id else []
+        msg = f"المادة: {label}\nاختر القسم:" if sections else "لا توجد أقسام متاحة لهذه المادة حتى الآن."
+        return Screen(msg, generate_subject_sections_keyboard_dynamic(sections))
+
+    return await _cached(context, ("sections", subject_id, label), build)
+
+
+async def section_filters_screen(context, subject_id, section_code) -> Screen:
+    async def build(db):
+        snap = await db.get_section_snapshot(subject_id, section_code)
+        markup = generate_section_filters_keyboard_dynamic(bool(snap.years), bool(snap.lecturers), snap.lectures_exist)
+        return Screen("اختر طريقة التصفية:", markup)
+
+    return await _cached(context, ("section_filters", subject_id, section_code), build)
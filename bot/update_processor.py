@@ -0,0 +1,92 @@
+# update_processor.py
+# معالجة التحديثات بالتوازي مع الحفاظ على ترتيب تحديثات كل مستخدم:
+# - بدون concurrent_updates يعالج PTB تحديثًا واحدًا في كل مرة، فقائمة مواد بطيئة تؤخر الجميع.
+# - هنا يعمل حتى max_in_flight تحديثًا معًا لمستخدمين مختلفين، بينما تحديثات المستخدم الواحد
+#   (ومحادثته) تمر واحدًا تلو الآخر بقفل خاص به: ضغطاته تُعالج بترتيب وصولها، وحالة التنقل
+#   (user_data) لا يعدّلها تحديثان في نفس الوقت.
+# - المقعد (slot) يُحجز بعد الحصول على قفل المستخدم، فمستخدم يضغط بسرعة ينتظر دوره
+#   دون أن يحجز مقاعد الآخرين.
+
+import asyncio
+from typing import Any, Awaitable
+
+from telegram.ext import BaseUpdateProcessor
+
+# عدد التحديثات المسموح بانتظارها (في طابور PTB) لكل مقعد معالجة
+PENDING_PER_SLOT = 16
+
+
+def update_key(update) -> int | None:
+    """مفتاح التسلسل: المستخدم (حالته مشتركة بين محادثاته)، وإلا المحادثة، وإلا None."""
+    user = getattr(update, "effective_user", None)
+    if user is not None:
+        return user.id
+    # معرّفات المجموعات والقنوات سالبة فلا تتداخل مع معرّفات المستخدمين
+    chat = getattr(update, "effective_chat", None)
+    return chat.id if chat is not None else None
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """يعالج تحديثات المستخدمين المختلفين بالتوازي وتحديثات المستخدم الواحد بالترتيب."""
+
+    def __init__(self, max_in_flight: int, *, max_pending: int | None = None) -> None:
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be a positive integer")
+        # سيمافور PTB يحد التحديثات المقبولة (المنتظرة + الجارية)؛ الجارية يحدها _slots
+        super().__init__(max_pending or max_in_flight * PENDING_PER_SLOT)
+        self.max_in_flight = max_in_flight
+        self._slots = asyncio.BoundedSemaphore(max_in_flight)
+        # key -> [القفل، عدد من يستخدمه/ينتظره] — يُحذف حين لا ينتظره أحد
+        self._locks: dict[int, list] = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.processed = 0
+        self.queued_behind_user = 0
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = update_key(update)
+        if key is None:
+            async with self._slots:
+                await self._run(coroutine)
+            return
+
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        lock = entry[0]
+        if lock.locked():
+            self.queued_behind_user += 1
+        entry[1] += 1
+        try:
+            async with lock:
+                async with self._slots:
+                    await self._run(coroutine)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    async def _run(self, coroutine: Awaitable[Any]) -> None:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await coroutine
+        finally:
+            self.in_flight -= 1
+            self.processed += 1
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "processed": self.processed,
+            "queued_behind_user": self.queued_behind_user,
+            "active_users": len(self._locks),
+        }
@@ -4,8 +4,8 @@
 -- =========================
 -- هذا الملف يحتوي على إنشاء الجداول الأساسية لقاعدة البيانات
 -- ويشمل مستويات التعليم، الاترام، والمقررات الدراسية.
--- تأكد من تشغيل هذا الملف مرة واحدة فقط لإنشاء الجداول
--- وتجنب تكرار إنشاء الجداول.
+-- يُطبَّق هذا الملف كترحيل أساسي (الإصدار 1) عبر bot/db/migrations.py،
+-- والترحيلات اللاحقة (الفهارس وغيرها) تُضاف هناك وليس هنا.
 -- =========================
 CREATE TABLE IF NOT EXISTS levels (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
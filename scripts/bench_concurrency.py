@@ -0,0 +1,85 @@
+"""
+Measure update throughput with concurrent, per-user ordered processing.
+
+Every simulated student runs the navigation session from bench_router.py.
+Their taps arrive interleaved (user 1 tap 1, user 2 tap 1, ...) and are fed
+to PerUserUpdateProcessor the way PTB's Application does: one task per
+update. Each reply waits ``--latency`` seconds, standing in for the Bot API
+round trip. ``--in-flight 1`` is the old sequential behaviour.
+
+Each user's replies are checked against a sequential run, so a reordering
+or a nav-state race would fail the benchmark.
+
+Usage:
+    python scripts/bench_concurrency.py [--users 50] [--latency 0.03] [--in-flight 1 4 16 64]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from bench_router import SESSION
+from bench_utils import FakeUser, build_sample_archive, fake_application
+
+from bot import main as bot_main
+from bot.db import Database
+from bot.update_processor import PerUserUpdateProcessor
+
+
+async def run(db: Database, users: int, latency: float, in_flight: int):
+    app = fake_application(db)
+    students = [FakeUser(app, user_id, latency) for user_id in range(1, users + 1)]
+    for student in students:
+        await bot_main.start(student.update("/start"), student.context())
+
+    processor = PerUserUpdateProcessor(in_flight)
+    t0 = time.perf_counter()
+    if in_flight == 1:
+        # PTB awaits each update in turn when concurrent_updates is off
+        for text in SESSION:
+            for student in students:
+                await bot_main.handle_message(student.update(text), student.context())
+    else:
+        tasks = []
+        for text in SESSION:
+            for student in students:
+                update = student.update(text)
+                coroutine = bot_main.handle_message(update, student.context())
+                tasks.append(asyncio.create_task(processor.process_update(update, coroutine)))
+        await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - t0
+    return elapsed, [[text for text, _markup in s.replies] for s in students], processor.stats()
+
+
+async def main(users: int, latency: float, levels: list[int]) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        async with Database(os.path.join(tmp, "bench.db"), read_pool_size=4) as db:
+            await build_sample_archive(db)
+            updates = users * len(SESSION)
+            print(f"{users} users x {len(SESSION)} taps = {updates} updates, {latency * 1000:.0f} ms per reply")
+            print(f"{'in-flight':>9}  {'seconds':>8}  {'updates/s':>9}  {'speed-up':>8}  {'peak':>5}")
+            expected = base = None
+            for in_flight in levels:
+                elapsed, replies, stats = await run(db, users, latency, in_flight)
+                if expected is None:
+                    expected = replies
+                elif replies != expected:
+                    raise SystemExit(f"in-flight={in_flight}: replies differ from the sequential run")
+                base = base or elapsed
+                peak = stats["peak_in_flight"] if in_flight > 1 else 1
+                print(f"{in_flight:>9}  {elapsed:>8.2f}  {updates / elapsed:>9.0f}  {base / elapsed:>7.1f}x  {peak:>5}")
+            print("per-user replies identical to the sequential run")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.latency, args.in_flight))
@@ -0,0 +1,90 @@
+"""
+Benchmark the trigram index used for free-text subject/lecturer matching.
+
+Builds a FuzzyIndex over a synthetic catalogue (Arabic-like subject names,
+course codes, lecturer names) and times lookups for exact, partial and
+misspelt queries.
+
+Usage:
+    python scripts/bench_fuzzy.py [--subjects 1000] [--lecturers 300] [--repeat 500]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bot.db.fuzzy import FuzzyIndex
+
+LETTERS = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+
+
+def _catalogue(subjects: int, lecturers: int):
+    rnd = random.Random(3)
+    vocab = ["ال" + "".join(rnd.choice(LETTERS) for _ in range(rnd.randint(3, 7))) for _ in range(400)]
+    subject_rows = [
+        (i, f"B{rnd.randint(1000000, 9999999)}", " ".join(rnd.sample(vocab, rnd.randint(1, 3))))
+        for i in range(1, subjects + 1)
+    ]
+    lecturer_rows = [
+        (i, f"د. {rnd.choice(vocab)[2:]} {rnd.choice(vocab)[2:]}") for i in range(1, lecturers + 1)
+    ]
+    return rnd, subject_rows, lecturer_rows
+
+
+def _queries(rnd: random.Random, subject_rows, lecturer_rows) -> dict[str, list[tuple[str, str, int]]]:
+    """Query sets as ``(text, expected kind, expected id)``."""
+
+    picks = rnd.sample(subject_rows, 20)
+    lecturers = rnd.sample(lecturer_rows, 20)
+    return {
+        "exact name": [(name, "subject", i) for i, _code, name in picks],
+        "partial word (no article)": [(name.split()[0][2:], "subject", i) for i, _code, name in picks],
+        "course code": [(code, "subject", i) for i, code, _name in picks],
+        "misspelt code": [(code[:-2] + code[-1] + code[-2], "subject", i) for i, code, _name in picks],
+        "misspelt name": [(name[:-1] + "ه", "subject", i) for i, _code, name in picks],
+        "lecturer": [(name.split()[1], "lecturer", i) for i, name in lecturers],
+    }
+
+
+def main(subjects: int, lecturers: int, repeat: int) -> None:
+    rnd, subject_rows, lecturer_rows = _catalogue(subjects, lecturers)
+    index = FuzzyIndex()
+    t0 = time.perf_counter()
+    index.add_subjects(subject_rows)
+    index.add_lecturers(lecturer_rows)
+    print(f"indexed {len(index):,} entries in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    width = 26
+    # top-1: the entry a confident match would jump to; top-5: the suggestions shown otherwise
+    print(f"\n{'query':<{width}}  {'p50 ms':>8}  {'max ms':>8}  {'top-1':>6}  {'top-5':>6}")
+    for name, queries in _queries(rnd, subject_rows, lecturer_rows).items():
+        samples = []
+        for i in range(repeat):
+            query = queries[i % len(queries)][0]
+            start = time.perf_counter()
+            index.search(query)
+            samples.append((time.perf_counter() - start) * 1000)
+        top1 = top5 = 0
+        for query, kind, _id in queries:
+            keys = [(m.kind, m.id) for m in index.search(query, limit=5)]
+            top1 += keys[:1] == [(kind, _id)]
+            top5 += (kind, _id) in keys
+        n = len(queries)
+        print(
+            f"{name:<{width}}  {statistics.median(samples):>8.3f}  {max(samples):>8.3f}"
+            f"  {top1:>3}/{n}  {top5:>3}/{n}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subjects", type=int, default=1000)
+    parser.add_argument("--lecturers", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+    main(args.subjects, args.lecturers, args.repeat)
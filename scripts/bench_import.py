@@ -0,0 +1,59 @@
+"""
+Measure the streaming manifest importer: throughput and peak memory by size.
+
+Synthetic CSV manifests are written row by row (so the benchmark itself does
+not hold them in memory) and each one is imported into a fresh database by
+``import_manifest.py`` in its own process. Peak RSS should stay roughly the
+same from the smallest manifest to the largest.
+
+Usage:
+    python scripts/bench_import.py [--rows 50000 500000] [--chunk-size 5000]
+"""
+
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_manifest.py")
+SECTIONS = ("theory", "discussion", "lab")
+KINDS = ("lecture", "slides", "exam", "summary", "notes")
+COLUMNS = ("level", "term", "subject_code", "subject", "section", "category", "title", "url", "year", "lecturer")
+
+
+def write_manifest(path: str, rows: int, subjects: int = 300) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for i in range(rows):
+            s = i % subjects
+            writer.writerow((
+                f"المستوى {s % 5 + 1}", "الترم الأول" if s % 2 else "الترم الثاني",
+                f"B{s:05d}", f"مادة {s}",
+                SECTIONS[i % 3], KINDS[i % 5], f"ملف {i}",
+                f"https://example.com/{i}.pdf", str(1440 + i % 6), f"د. محاضر {i % 40}",
+            ))
+
+
+def main(sizes: list[int], chunk_size: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            manifest = os.path.join(tmp, f"manifest_{rows}.csv")
+            write_manifest(manifest, rows)
+            mb = os.path.getsize(manifest) / 2**20
+            print(f"== {rows} rows ({mb:.0f} MB CSV)", flush=True)
+            subprocess.run(
+                [sys.executable, SCRIPT, manifest, "--db", os.path.join(tmp, f"import_{rows}.db"),
+                 "--chunk-size", str(chunk_size)],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[50000, 500000])
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+    main(args.rows, args.chunk_size)
@@ -0,0 +1,124 @@
+"""
+Benchmark navigation queries on a synthetic ``materials`` table,
+before and after the index migrations.
+
+Usage:
+    python scripts/bench_indexes.py [--rows 1000000] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bot.db import Database
+from bot.db.migrations import MIGRATIONS, migrate
+
+SECTIONS = ("theory", "discussion", "lab", "syllabus", "apps")
+CATEGORIES = (
+    "lecture", "slides", "audio", "exam", "booklet", "board_images", "video",
+    "simulation", "summary", "notes", "external_link", "mind_map", "transcript", "related",
+)
+
+
+def _populate(path: str, rows: int, subjects: int = 400, years: int = 12, lecturers: int = 80) -> None:
+    rnd = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executemany("INSERT INTO levels (name) VALUES (?)", [(f"L{i}",) for i in range(1, 6)])
+    conn.executemany("INSERT INTO terms (name) VALUES (?)", [("T1",), ("T2",)])
+    conn.executemany(
+        "INSERT INTO subjects (code, name, level_id, term_id) VALUES (?, ?, ?, ?)",
+        [(f"C{i:04d}", f"Subject {i}", i % 5 + 1, i % 2 + 1) for i in range(subjects)],
+    )
+    conn.executemany("INSERT INTO years (name) VALUES (?)", [(str(1435 + i),) for i in range(years)])
+    conn.executemany("INSERT INTO lecturers (name) VALUES (?)", [(f"Dr {i}",) for i in range(lecturers)])
+
+    def gen():
+        for i in range(rows):
+            yield (
+                rnd.randint(1, subjects),
+                rnd.choice(SECTIONS),
+                rnd.choice(CATEGORIES),
+                f"Lecture {i % 30}",
+                f"https://example.com/{i}",
+                rnd.randint(1, years) if rnd.random() < 0.9 else None,
+                rnd.randint(1, lecturers) if rnd.random() < 0.9 else None,
+            )
+
+    conn.executemany(
+        "INSERT INTO materials (subject_id, section, category, title, url, year_id, lecturer_id)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        gen(),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _cases(db: Database):
+    s, sec, y, l, t = 7, "theory", 3, 5, "Lecture 4"
+    return {
+        "get_available_sections_for_subject": lambda: db.get_available_sections_for_subject(s),
+        "get_years_for_subject_section": lambda: db.get_years_for_subject_section(s, sec),
+        "get_lecturers_for_subject_section": lambda: db.get_lecturers_for_subject_section(s, sec),
+        "has_lecture_category": lambda: db.has_lecture_category(s, sec),
+        "list_lecture_titles": lambda: db.list_lecture_titles(s, sec),
+        "list_lecture_titles_by_year": lambda: db.list_lecture_titles_by_year(s, sec, y),
+        "list_lecture_titles_by_lecturer": lambda: db.list_lecture_titles_by_lecturer(s, sec, l),
+        "list_lecture_titles_by_lecturer_year": lambda: db.list_lecture_titles_by_lecturer_year(s, sec, l, y),
+        "get_years_for_subject_section_lecturer": lambda: db.get_years_for_subject_section_lecturer(s, sec, l),
+        "get_materials_by_category": lambda: db.get_materials_by_category(s, sec, "exam", year_id=y),
+        "list_categories_for_subject_section_year": lambda: db.list_categories_for_subject_section_year(s, sec, y),
+        "list_categories_for_lecture": lambda: db.list_categories_for_lecture(s, sec, t),
+        "term_feature_flags": lambda: db.term_feature_flags(3, 1),
+    }
+
+
+async def _time_all(db: Database, repeat: int) -> dict[str, float]:
+    timings = {}
+    for name, call in _cases(db).items():
+        await call()  # warm-up
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await call()
+        timings[name] = (time.perf_counter() - start) / repeat * 1000
+    return timings
+
+
+async def main(rows: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        async with Database(path) as db:
+            await migrate(await db.connect(), MIGRATIONS[:1])
+        t0 = time.perf_counter()
+        _populate(path, rows)
+        print(f"populated {rows:,} materials in {time.perf_counter() - t0:.1f}s")
+
+        async with Database(path) as db:
+            before = await _time_all(db, repeat)
+            t0 = time.perf_counter()
+            applied = await db.init_db()
+            await (await db.connect()).execute("ANALYZE")
+            print(f"applied migrations {applied} in {time.perf_counter() - t0:.1f}s")
+            after = await _time_all(db, repeat)
+
+    width = max(len(n) for n in before)
+    print(f"\n{'query':<{width}}  {'before ms':>10}  {'after ms':>10}  {'speedup':>8}")
+    for name in before:
+        b, a = before[name], after[name]
+        print(f"{name:<{width}}  {b:>10.3f}  {a:>10.3f}  {b / a if a else float('inf'):>7.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,193 @@
+"""
+Measure the per-user heap cost of the navigation state.
+
+Simulates N users, each navigated to a random depth of a synthetic catalogue
+(level → term → subject list → subject → section → year list → year →
+lecture list → lecture), and records the bytes allocated for their
+``user_data["nav"]`` with tracemalloc:
+
+* legacy: the previous layout, a dict with a ``[(node_type, label), ...]``
+  stack, a data dict and a ``{label: id}`` button index per user;
+* NavState: the slotted representation in ``bot/nav_state.py``.
+
+Labels arrive as fresh strings (as they do when decoded from a Telegram
+update or read from SQLite), so the legacy layout keeps one copy per user
+while NavState keeps one per catalogue entry. The subject list comes from
+the render cache and is shared, as it is in the bot.
+
+Usage:
+    python scripts/bench_nav_memory.py [--users 100000]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bot import helpers
+from bot.nav_state import LABELS
+
+LETTERS = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+
+
+def _fresh(text: str) -> str:
+    """A new string object equal to ``text``."""
+    return (text + ".")[:-1]
+
+
+def _catalogue(rnd: random.Random):
+    def name(lo, hi):
+        return "".join(rnd.choice(LETTERS) for _ in range(rnd.randint(lo, hi)))
+
+    levels = [(i, f"المستوى {name(4, 8)}") for i in range(1, 6)]
+    terms = [(i, f"الترم {name(4, 8)}") for i in range(1, 3)]
+    subjects = {
+        (lv, t): tuple((lv * 100 + t * 10 + i, f"{name(5, 9)} {name(4, 8)}") for i in range(8))
+        for lv, _ in levels for t, _ in terms
+    }
+    years = [(i, str(1440 + i)) for i in range(6)]
+    titles = [f"المحاضرة {i}: {name(6, 12)} {name(4, 9)}" for i in range(12)]
+    return levels, terms, subjects, years, titles
+
+
+# ---------------------------------------------------------------------------
+# The previous dict layout (as bot/helpers.py kept it before NavState)
+# ---------------------------------------------------------------------------
+def _legacy_set(nav: dict, node_type: str, label: str, key=None, value=None) -> None:
+    stack = nav["stack"]
+    for i, (t, _) in enumerate(stack):
+        if t == node_type:
+            stack[i] = (node_type, label)
+            del stack[i + 1:]
+            break
+    else:
+        stack.append((node_type, label))
+    if key is not None:
+        nav["data"][key] = value
+
+
+def _legacy_buttons(nav: dict, node_type: str, pairs) -> None:
+    screen = nav["stack"][-1][0] if nav["stack"] else None
+    nav["buttons"] = (screen, node_type, {label: _id for _id, label in pairs})
+
+
+class Legacy:
+    @staticmethod
+    def level(ud, label, _id):
+        ud.setdefault("nav", {"stack": [], "data": {}})
+        _legacy_set(ud["nav"], "level", label, "level_id", _id)
+
+    @staticmethod
+    def term(ud, label, _id):
+        _legacy_set(ud["nav"], "term", label, "term_id", _id)
+
+    @staticmethod
+    def view(ud, node_type):
+        _legacy_set(ud["nav"], node_type, "")
+
+    @staticmethod
+    def subject(ud, label, _id):
+        _legacy_set(ud["nav"], "subject", label, "subject_id", _id)
+
+    @staticmethod
+    def section(ud, label, code):
+        _legacy_set(ud["nav"], "section", label, "section", code)
+
+    @staticmethod
+    def year(ud, label, _id):
+        _legacy_set(ud["nav"], "year", label, "year_id", _id)
+
+    @staticmethod
+    def lecture(ud, title):
+        _legacy_set(ud["nav"], "lecture", title, "lecture_title", title)
+
+    @staticmethod
+    def buttons(ud, node_type, pairs):
+        _legacy_buttons(ud["nav"], node_type, pairs)
+
+
+class Compact:
+    level = staticmethod(helpers.nav_set_level)
+    term = staticmethod(helpers.nav_set_term)
+    view = staticmethod(helpers.nav_push_view)
+    subject = staticmethod(helpers.nav_set_subject)
+    section = staticmethod(helpers.nav_set_section)
+    year = staticmethod(helpers.nav_set_year)
+    lecture = staticmethod(helpers.nav_set_lecture)
+    buttons = staticmethod(helpers.nav_set_buttons)
+
+
+def _navigate(api, ud: dict, rnd: random.Random, catalogue) -> None:
+    levels, terms, subjects, years, titles = catalogue
+    depth = rnd.randint(1, 6)
+    level_id, level_label = rnd.choice(levels)
+    api.level(ud, _fresh(level_label), level_id)
+    term_id, term_label = rnd.choice(terms)
+    api.term(ud, _fresh(term_label), term_id)
+    if depth < 2:
+        return
+    api.view(ud, "subject_list")
+    shown = subjects[(level_id, term_id)]
+    api.buttons(ud, "subject", shown)  # from the render cache: one shared tuple
+    if depth < 3:
+        return
+    subject_id, subject_label = rnd.choice(shown)
+    api.subject(ud, _fresh(subject_label), subject_id)
+    api.section(ud, _fresh("📘 النظري"), "theory")
+    if depth < 4:
+        return
+    api.view(ud, "year_list")
+    api.buttons(ud, "year", [(i, _fresh(label)) for i, label in years])
+    if depth < 5:
+        return
+    year_id, year_label = rnd.choice(years)
+    api.year(ud, _fresh(year_label), year_id)
+    api.view(ud, "year_category_menu")
+    api.view(ud, "lecture_list")
+    api.buttons(ud, "lecture", [(t, t) for t in map(_fresh, titles)])
+    if depth < 6:
+        return
+    api.lecture(ud, _fresh(rnd.choice(titles)))
+    api.view(ud, "lecture_category_menu")
+
+
+def measure(api, users: int, catalogue) -> int:
+    rnd = random.Random(7)
+    LABELS.clear()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    population = []
+    for _ in range(users):
+        ud: dict = {}
+        _navigate(api, ud, rnd, catalogue)
+        population.append(ud)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    # the per-user dicts themselves are the same in both layouts
+    baseline = sum(sys.getsizeof(ud) for ud in population) + sys.getsizeof(population)
+    return used - baseline
+
+
+def main(users: int) -> None:
+    catalogue = _catalogue(random.Random(3))
+    print(f"{users:,} simulated users")
+    results = {}
+    for name, api in (("legacy dict", Legacy), ("NavState", Compact)):
+        results[name] = measure(api, users, catalogue)
+        print(f"{name:>12}: {results[name] / users:8.1f} bytes/user  ({results[name] / 2**20:7.1f} MiB total)")
+    print(f"shared label table: {len(LABELS)} entries")
+    legacy, compact = results["legacy dict"], results["NavState"]
+    print(f"saved {(legacy - compact) / users:.1f} bytes/user ({1 - compact / legacy:.0%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    args = parser.parse_args()
+    main(args.users)
@@ -0,0 +1,114 @@
+"""
+Measure the overhead of Database.enable_query_stats.
+
+Two workloads run against the same synthetic archive on two open Database
+instances, one with query stats. Short runs of ``--rounds`` rounds alternate
+between them ``--pairs`` times; the overhead is the median of the per-pair
+ratios, which keeps scheduling noise and drift from swamping a difference of
+a percent or two:
+
+* ``session``: the navigation session of ``bench_router.py`` through
+  ``handle_message``, i.e. what one update costs the bot;
+* ``queries``: the screen queries alone, called back to back, which is the
+  worst case since the statement timing is the only other work;
+* ``catalog``: the session again with the in-memory catalog enabled, so the
+  timed reads are mostly snapshot lookups.
+
+Prints the per-method table collected during the instrumented ``queries`` runs.
+
+Usage:
+    python scripts/bench_query_stats.py [--rounds 2] [--pairs 200]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from bench_router import SESSION
+from bench_utils import FakeUser, build_sample_archive, fake_application
+
+from bot import main as bot_main
+from bot.db import Database
+
+
+async def session(db: Database, rounds: int) -> None:
+    user = FakeUser(fake_application(db))
+    for _ in range(rounds):
+        await bot_main.start(user.update("/start"), user.context())
+        for text in SESSION:
+            await bot_main.handle_message(user.update(text), user.context())
+
+
+async def queries(db: Database, rounds: int) -> None:
+    for _ in range(rounds):
+        for sid in range(1, 21):
+            await db.get_available_sections_for_subject(sid)
+            await db.get_section_snapshot(sid, "theory")
+            await db.get_year_menu_snapshot(sid, "theory", 2)
+            await db.list_lecture_titles_by_year(sid, "theory", 2)
+            await db.list_categories_for_lecture(sid, "theory", "محاضرة 3")
+            await db.get_materials_by_category(sid, "theory", "slides", title="محاضرة 3")
+
+
+async def compare(
+    path: str, workload, rounds: int, pairs: int, catalog: bool = False
+) -> tuple[float, float, Database]:
+    """Median time of ``rounds`` rounds without stats, and the median with/without ratio over interleaved pairs."""
+
+    off, on = Database(path), Database(path)
+    await off.connect()
+    await on.connect()
+    if catalog:
+        await off.enable_catalog(poll_interval=3600)
+        await on.enable_catalog(poll_interval=3600)
+    on.enable_query_stats(slow_ms=1e9)
+    await workload(off, 1)  # warm the page cache
+    await workload(on, 1)
+    times = {off: [], on: []}
+    for i in range(pairs):
+        # alternate which one goes first, so drift hits both equally
+        for db in ((off, on) if i % 2 else (on, off)):
+            t0 = time.perf_counter()
+            await workload(db, rounds)
+            times[db].append(time.perf_counter() - t0)
+    await off.close()
+    await on.close()
+    ratio = statistics.median(b / a for a, b in zip(times[off], times[on]))
+    return statistics.median(times[off]), ratio, on
+
+
+async def main(rounds: int, pairs: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        async with Database(path) as db:
+            await build_sample_archive(db)
+        print(f"{'workload':>8}  {'off ms':>7}  {'on ms':>7}  {'overhead':>8}")
+        instrumented = None
+        for name, workload, catalog in (
+            ("session", session, False),
+            ("queries", queries, False),
+            ("catalog", session, True),
+        ):
+            off, ratio, on = await compare(path, workload, rounds, pairs, catalog)
+            if name == "queries":
+                instrumented = on
+            print(f"{name:>8}  {off * 1000:>7.2f}  {off * ratio * 1000:>7.2f}  {(ratio - 1) * 100:>7.2f}%")
+
+    print()
+    print(f"{'method':<40} {'stmts':>6} {'rows':>7} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}")
+    for method, s in instrumented.query_stats.stats(top=10).items():
+        print(f"{method:<40} {s['statements']:>6} {s['rows']:>7} {s['p50_ms']:>7.3f} {s['p95_ms']:>7.3f} {s['p99_ms']:>7.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--pairs", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.rounds, args.pairs))
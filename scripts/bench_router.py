@@ -0,0 +1,92 @@
+"""
+Count DB queries per update for a full navigation session, comparing the old
+"try every dynamic handler" dispatch with per-screen routing.
+
+Usage:
+    python scripts/bench_router.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from bench_utils import FakeUser, QueryCounter, build_sample_archive, fake_application
+
+from bot import main as bot_main
+from bot.db import Database
+from bot.keyboards import (
+    BACK,
+    CATEGORY_TO_LABEL,
+    FILTER_BY_LECTURER,
+    FILTER_BY_YEAR,
+    LIST_LECTURES,
+    LIST_LECTURES_FOR_LECTURER,
+    SECTION_LABELS,
+    TERM_MENU_SHOW_SUBJECTS,
+    YEAR_MENU_LECTURES,
+)
+from bot.router import dispatch_fallthrough, dispatch_text
+
+SESSION = [
+    "📚 المستويات",
+    "المستوى 2",
+    "الترم الأول",
+    TERM_MENU_SHOW_SUBJECTS,
+    "مادة 20",
+    SECTION_LABELS["theory"],
+    FILTER_BY_YEAR,
+    "1445",
+    YEAR_MENU_LECTURES,
+    "محاضرة 3",
+    CATEGORY_TO_LABEL["slides"],
+    BACK,
+    BACK,
+    BACK,
+    BACK,
+    FILTER_BY_LECTURER,
+    "د. محاضر 2",
+    LIST_LECTURES_FOR_LECTURER,
+    "محاضرة 1",
+    BACK,
+    BACK,
+    BACK,
+    BACK,
+    LIST_LECTURES,
+    "محاضرة 5",
+]
+
+
+async def run_session(db: Database, dispatcher) -> list[int]:
+    bot_main.dispatch_text = dispatcher
+    counter = QueryCounter()
+    await counter.attach(db)
+    user = FakeUser(fake_application(db))
+    await bot_main.start(user.update("/start"), user.context())
+    counts = []
+    for text in SESSION:
+        before = counter.count
+        await bot_main.handle_message(user.update(text), user.context())
+        counts.append(counter.count - before)
+    return counts
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        async with Database(os.path.join(tmp, "bench.db")) as db:
+            await build_sample_archive(db)
+            old = await run_session(db, dispatch_fallthrough)
+            new = await run_session(db, dispatch_text)
+
+    width = max(len(t) for t in SESSION)
+    print(f"{'tap':<{width}}  {'fall-through':>12}  {'routed':>6}")
+    for text, o, n in zip(SESSION, old, new):
+        print(f"{text:<{width}}  {o:>12}  {n:>6}")
+    print(f"{'total':<{width}}  {sum(old):>12}  {sum(new):>6}")
+    print(f"{'per update':<{width}}  {sum(old) / len(SESSION):>12.2f}  {sum(new) / len(SESSION):>6.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
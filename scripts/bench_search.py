@@ -0,0 +1,130 @@
+"""
+Benchmark full-text search (``Database.search_materials``) on a synthetic
+archive of Arabic material titles.
+
+The archive is filled first and the search-index migration then backfills
+it, which is how an existing production database is upgraded.
+
+Usage:
+    python scripts/bench_search.py [--rows 1000000] [--repeat 50]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bot.db import Database
+from bot.db.migrations import MIGRATIONS, migrate
+
+SECTIONS = ("theory", "discussion", "lab", "syllabus", "apps")
+CATEGORIES = ("lecture", "slides", "audio", "exam", "summary", "notes", "video")
+TOPICS = (
+    "الدوائر", "الكهربائية", "التحكم", "الآلي", "الميكانيكا", "الهندسية", "الرياضيات",
+    "التفاضل", "التكامل", "الفيزياء", "البرمجة", "الإلكترونيات", "الرقمية", "المتحكمات",
+    "الدقيقة", "الحساسات", "المحركات", "الروبوتات", "الهيدروليك", "النيوماتيك", "الإشارات",
+    "الأنظمة", "الديناميكا", "الحرارية", "المواد", "التصميم", "الرسم", "القياسات",
+    "الاهتزازات", "الموائع", "مقدمة", "مراجعة", "تمارين", "حلول", "مُلخّص", "شرح",
+)
+KINDS = ("محاضرة", "مُحاضرة", "امتحان", "إمتحان", "ملزمة", "ملخص", "تمارين", "مراجعة")
+
+QUERIES = {
+    "single word": ("الدوائر", {}),
+    "two words": ("التحكم الالي", {}),
+    "diacritics + hamza": ("إِمْتِحَان الفيزياء", {}),
+    "partial word (prefix)": ("الروب", {}),
+    "lecturer name": ("د. احمد", {}),
+    "subject code": ("MT105", {}),
+    "scoped to level/term": ("محاضرة الدوائر", {"level_id": 3, "term_id": 1}),
+    "rare word": ("الاهتزازات حلول", {}),
+    "no match": ("غيرموجود", {}),
+}
+
+
+def _populate(path: str, rows: int, subjects: int = 400, lecturers: int = 80) -> None:
+    rnd = random.Random(7)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executemany("INSERT INTO levels (name) VALUES (?)", [(f"المستوى {i}",) for i in range(1, 6)])
+    conn.executemany("INSERT INTO terms (name) VALUES (?)", [("الترم الأول",), ("الترم الثاني",)])
+    conn.executemany(
+        "INSERT INTO subjects (code, name, level_id, term_id) VALUES (?, ?, ?, ?)",
+        [
+            (f"MT{100 + i}", " ".join(rnd.sample(TOPICS, 2)), i % 5 + 1, i % 2 + 1)
+            for i in range(subjects)
+        ],
+    )
+    conn.executemany("INSERT INTO years (name) VALUES (?)", [(str(1435 + i),) for i in range(12)])
+    first = ("أحمد", "محمد", "علي", "خالد", "سعيد", "عبدالله", "يوسف", "إبراهيم")
+    conn.executemany(
+        "INSERT INTO lecturers (name) VALUES (?)",
+        [(f"د. {first[i % len(first)]} {TOPICS[i % len(TOPICS)]} {i}",) for i in range(lecturers)],
+    )
+
+    def gen():
+        for i in range(rows):
+            yield (
+                rnd.randint(1, subjects),
+                rnd.choice(SECTIONS),
+                rnd.choice(CATEGORIES),
+                f"{rnd.choice(KINDS)} {rnd.randint(1, 30)} {' '.join(rnd.sample(TOPICS, 2))}",
+                f"https://t.me/archive/{i}",
+                rnd.randint(1, 12),
+                rnd.randint(1, lecturers) if rnd.random() < 0.9 else None,
+            )
+
+    conn.executemany(
+        "INSERT INTO materials (subject_id, section, category, title, url, year_id, lecturer_id)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        gen(),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def _time(db: Database, query: str, scope: dict, repeat: int) -> tuple[float, float, int]:
+    hits = await db.search_materials(query, **scope)  # warm-up
+    samples = []
+    for page in range(repeat):
+        start = time.perf_counter()
+        await db.search_materials(query, offset=(page % 3) * 10, **scope)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1], len(hits)
+
+
+async def main(rows: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        async with Database(path) as db:
+            await migrate(await db.connect(), [m for m in MIGRATIONS if m.version < 4])
+        t0 = time.perf_counter()
+        _populate(path, rows)
+        print(f"populated {rows:,} materials in {time.perf_counter() - t0:.1f}s")
+
+        async with Database(path) as db:
+            t0 = time.perf_counter()
+            applied = await db.init_db()
+            print(f"applied migrations {applied} (index backfill) in {time.perf_counter() - t0:.1f}s")
+
+            width = max(len(n) for n in QUERIES)
+            print(f"\n{'query':<{width}}  {'p50 ms':>8}  {'p95 ms':>8}  {'hits':>5}")
+            for name, (query, scope) in QUERIES.items():
+                p50, p95, hits = await _time(db, query, scope, repeat)
+                print(f"{name:<{width}}  {p50:>8.2f}  {p95:>8.2f}  {hits:>5}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,140 @@
+"""
+Measure seeding throughput: row-by-row commits versus bulk upserts.
+
+A synthetic archive in the ``seed_data.yml`` format is loaded three ways:
+
+* ``row-by-row``: the previous seed, one ``insert_*`` call (and one commit)
+  per row with get->insert->get lookups for levels and terms. It only loads
+  the first ``--legacy-materials`` materials, since it is slow;
+* ``bulk``: ``seed.seed`` into an empty database, one transaction;
+* ``bulk re-run``: the same data again, which must change nothing.
+
+Usage:
+    python scripts/bench_seed.py [--materials 20000] [--legacy-materials 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from seed import seed
+
+from bot.db import Database
+
+SECTIONS = ("theory", "discussion", "lab")
+KINDS = ("lecture", "slides", "exam", "summary", "notes")
+
+
+def synthetic_data(materials: int, subjects_per_term: int = 6) -> dict:
+    levels = []
+    subjects = []
+    n = 0
+    for lv in range(1, 6):
+        terms = []
+        for tm in ("الترم الأول", "الترم الثاني"):
+            items = []
+            for _ in range(subjects_per_term):
+                n += 1
+                items.append({"code": f"B{n:05d}", "name": f"مادة {n}"})
+                subjects.append((f"المستوى {lv}", tm, f"مادة {n}"))
+            terms.append({"name": tm, "subjects": items})
+        levels.append({"name": f"المستوى {lv}", "terms": terms})
+    years = {f"y{y}": str(1440 + y) for y in range(5)}
+    lecturers = {f"p{i}": {"name": f"د. محاضر {i}", "role": "lecturer"} for i in range(20)}
+    per_subject = -(-materials // len(subjects))
+    entries = []
+    left = materials
+    for i, (level, term, subject) in enumerate(subjects):
+        count = min(per_subject, left)
+        left -= count
+        items = [
+            {
+                "section": SECTIONS[k % len(SECTIONS)],
+                "kind": KINDS[k % len(KINDS)],
+                "title": f"ملف {k}",
+                "url": f"https://example.com/{i}/{k}.pdf",
+                "year": f"y{k % 5}",
+                "person": f"p{(i + k) % 20}",
+            }
+            for k in range(count)
+        ]
+        entries.append({"level": level, "term": term, "subject": subject, "items": items})
+    return {"structure": {"levels": levels}, "years": years, "lecturers": lecturers, "materials": entries}
+
+
+async def _ensure(db: Database, kind: str, name: str) -> int:
+    get = getattr(db, f"get_{kind}_id_by_name")
+    _id = await get(name)
+    if _id is None:
+        await getattr(db, f"insert_{kind}")(name)
+        _id = await get(name)
+    return _id
+
+
+async def seed_row_by_row(db: Database, data: dict, limit: int) -> int:
+    """The previous scripts/seed.py: one commit per row."""
+
+    rows = 0
+    for level in data["structure"]["levels"]:
+        for term in level["terms"]:
+            level_id = await _ensure(db, "level", level["name"])
+            term_id = await _ensure(db, "term", term["name"])
+            for s in term["subjects"]:
+                await db.insert_subject(s["code"], s["name"], level_id, term_id)
+                rows += 1
+    years = {key: await db.ensure_year_id(name) for key, name in data["years"].items()}
+    people = {key: await db.ensure_lecturer_id(p["name"], p["role"]) for key, p in data["lecturers"].items()}
+    rows += len(years) + len(people)
+    for entry in data["materials"]:
+        level_id = await db.get_level_id_by_name(entry["level"])
+        term_id = await db.get_term_id_by_name(entry["term"])
+        sid = await db.get_subject_id_by_name(level_id, term_id, entry["subject"])
+        for item in entry["items"]:
+            if limit <= 0:
+                return rows
+            await db.insert_material(
+                sid, item["section"], item["kind"], item["title"], item["url"],
+                years[item["year"]], people[item["person"]],
+            )
+            rows += 1
+            limit -= 1
+    return rows
+
+
+async def main(materials: int, legacy_materials: int) -> None:
+    data = synthetic_data(materials)
+    print(f"{'method':>12}  {'rows':>7}  {'seconds':>8}  {'rows/s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        async with Database(os.path.join(tmp, "legacy.db")) as db:
+            await db.init_db()
+            t0 = time.perf_counter()
+            rows = await seed_row_by_row(db, data, legacy_materials)
+            elapsed = time.perf_counter() - t0
+            print(f"{'row-by-row':>12}  {rows:>7}  {elapsed:>8.2f}  {rows / elapsed:>9.0f}")
+
+        async with Database(os.path.join(tmp, "bulk.db")) as db:
+            await db.init_db()
+            for label in ("bulk", "bulk re-run"):
+                t0 = time.perf_counter()
+                counts = await seed(db, data)
+                elapsed = time.perf_counter() - t0
+                rows = counts["subjects"] + counts["materials"] + len(data["years"]) + len(data["lecturers"])
+                print(f"{label:>12}  {rows:>7}  {elapsed:>8.2f}  {rows / elapsed:>9.0f}"
+                      f"  ({counts['materials_changed']} materials inserted/updated)")
+            total = (await db._fetchone("bench_seed", "SELECT COUNT(*) FROM materials"))[0]
+            if total != materials:
+                raise SystemExit(f"expected {materials} materials after re-running the seed, found {total}")
+            print(f"re-run is idempotent: {total} materials")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--materials", type=int, default=20000)
+    parser.add_argument("--legacy-materials", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.materials, args.legacy_materials))
@@ -0,0 +1,121 @@
+"""
+Shared helpers for the benchmark scripts: a synthetic archive and minimal
+stand-ins for telegram's Update/Context so handlers can run without a bot.
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bot.db import Database
+
+
+class FakeMessage:
+    """Records every reply instead of sending it."""
+
+    def __init__(self, text: str, chat_id: int, replies: list, latency: float = 0.0):
+        self.text = text
+        self.chat_id = chat_id
+        self._replies = replies
+        self._latency = latency
+
+    async def reply_text(self, text, reply_markup=None, **kwargs):
+        if self._latency:
+            # round trip to the Bot API
+            await asyncio.sleep(self._latency)
+        self._replies.append((text, reply_markup))
+        return SimpleNamespace(text=text, reply_markup=reply_markup)
+
+
+class FakeUser:
+    """One simulated student: holds user_data and builds updates."""
+
+    def __init__(self, application, user_id: int = 1, latency: float = 0.0):
+        self.application = application
+        self.user_id = user_id
+        self.latency = latency
+        self.user_data: dict = {}
+        self.replies: list = []
+
+    def update(self, text: str):
+        message = FakeMessage(text, self.user_id, self.replies, self.latency)
+        user = SimpleNamespace(id=self.user_id)
+        chat = SimpleNamespace(id=self.user_id, type="private")
+        return SimpleNamespace(
+            message=message,
+            effective_message=message,
+            effective_user=user,
+            effective_chat=chat,
+            update_id=0,
+        )
+
+    def context(self, args=None):
+        return SimpleNamespace(
+            application=self.application,
+            bot_data=self.application.bot_data,
+            user_data=self.user_data,
+            args=args or [],
+        )
+
+
+def fake_application(db: Database):
+    return SimpleNamespace(bot_data={"db": db})
+
+
+class QueryCounter:
+    """Counts SQL statements executed on every connection of a Database."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, statement: str) -> None:
+        self.count += 1
+
+    async def attach(self, db: Database) -> None:
+        for conn in [await db.connect(), *db._readers]:
+            await conn.set_trace_callback(self)
+
+
+async def build_sample_archive(
+    db: Database,
+    *,
+    levels: int = 4,
+    subjects_per_term: int = 8,
+    years: int = 3,
+    lecturers: int = 3,
+    lectures: int = 6,
+) -> None:
+    """Fill an empty database with a small but complete hierarchy."""
+
+    await db.init_db()
+    conn = await db.connect()
+    await conn.executemany("INSERT INTO levels (name) VALUES (?)", [(f"المستوى {i}",) for i in range(1, levels + 1)])
+    await conn.executemany("INSERT INTO terms (name) VALUES (?)", [("الترم الأول",), ("الترم الثاني",)])
+    await conn.executemany("INSERT INTO years (name) VALUES (?)", [(str(1444 + i),) for i in range(years)])
+    await conn.executemany("INSERT INTO lecturers (name) VALUES (?)", [(f"د. محاضر {i}",) for i in range(1, lecturers + 1)])
+    subjects = []
+    n = 0
+    for level_id in range(1, levels + 1):
+        for term_id in (1, 2):
+            for _ in range(subjects_per_term):
+                n += 1
+                subjects.append((f"B{n:04d}", f"مادة {n}", level_id, term_id))
+    await conn.executemany("INSERT INTO subjects (code, name, level_id, term_id) VALUES (?, ?, ?, ?)", subjects)
+    materials = []
+    for sid in range(1, n + 1):
+        for section in ("theory", "lab"):
+            for y in range(1, years + 1):
+                lec = (sid + y) % lecturers + 1
+                for t in range(1, lectures + 1):
+                    for category in ("lecture", "slides"):
+                        materials.append((sid, section, category, f"محاضرة {t}", f"https://example.com/{sid}/{t}", y, lec))
+                materials.append((sid, section, "exam", f"امتحان {y}", f"https://example.com/{sid}/exam{y}", y, None))
+    await conn.executemany(
+        "INSERT INTO materials (subject_id, section, category, title, url, year_id, lecturer_id)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        materials,
+    )
+    await conn.commit()
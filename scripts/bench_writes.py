@@ -0,0 +1,71 @@
+"""
+Measure small concurrent writes: one commit per write versus the write queue.
+
+``--writers`` coroutines each insert ``--per-writer`` materials one at a time
+through ``Database.insert_material``, first committing every write on its
+own and then with ``Database.enable_write_queue`` group-committing them.
+Reports writes/s, per-write latency and the queue's batch and commit
+statistics. ``--wal`` runs both in WAL mode (as with ``DB_READ_POOL_SIZE``).
+
+Usage:
+    python scripts/bench_writes.py [--writers 50] [--per-writer 40] [--max-batch 64] [--delay-ms 5] [--wal]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bot.db import Database
+
+
+async def run(path: str, writers: int, per_writer: int, *, queue: dict | None, wal: bool) -> None:
+    async with Database(path, read_pool_size=1 if wal else 0) as db:
+        await db.init_db()
+        await db.insert_level("L")
+        await db.insert_term("T")
+        await db.insert_subject("C1", "Subject", 1, 1)
+        if queue is not None:
+            await db.enable_write_queue(**queue)
+        latencies: list[float] = []
+
+        async def writer(w: int) -> None:
+            for i in range(per_writer):
+                t0 = time.perf_counter()
+                await db.insert_material(1, "theory", "exam", f"w{w}-{i}", f"https://example.com/{w}/{i}")
+                latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(writer(w) for w in range(writers)))
+        elapsed = time.perf_counter() - t0
+        latencies.sort()
+        total = writers * per_writer
+        label = "write queue" if queue is not None else "commit each"
+        print(
+            f"{label:>12}  {total:>6}  {elapsed:>7.2f}  {total / elapsed:>8.0f}"
+            f"  {latencies[len(latencies) // 2] * 1000:>7.2f}  {latencies[int(len(latencies) * 0.99)] * 1000:>7.2f}"
+        )
+        if db.write_queue is not None:
+            print(f"{'':>12}  {db.write_queue.stats()}")
+
+
+async def main(args) -> None:
+    queue = {"max_batch": args.max_batch, "max_delay": args.delay_ms / 1000}
+    print(f"{'method':>12}  {'writes':>6}  {'seconds':>7}  {'writes/s':>8}  {'p50 ms':>7}  {'p99 ms':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        await run(os.path.join(tmp, "each.db"), args.writers, args.per_writer, queue=None, wal=args.wal)
+        await run(os.path.join(tmp, "queue.db"), args.writers, args.per_writer, queue=queue, wal=args.wal)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=50)
+    parser.add_argument("--per-writer", type=int, default=40)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--delay-ms", type=float, default=5.0)
+    parser.add_argument("--wal", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,258 @@
+"""
+A local stand-in for the Telegram Bot API, for measuring the bot end to end.
+
+The server answers the Bot API methods the bot calls (getMe, setWebhook,
+sendMessage, editMessageText, ...) with plausible results. Once the bot has
+registered its webhook, simulated students push message updates to it, each
+with the secret-token header. Every student sends the next tap only after
+the replies to the previous one have settled.
+
+The script reports update→reply latency: the time to the first reply and
+the time until the bot stops replying to that tap.
+
+Run the server, then start the bot against it in webhook mode:
+
+    python scripts/fake_bot_api.py --port 8081 --users 20
+
+    BOT_API_BASE_URL=http://127.0.0.1:8081/bot UPDATE_MODE=webhook \\
+    WEBHOOK_URL=http://127.0.0.1:8443 python -m bot
+
+Usage:
+    python scripts/fake_bot_api.py [--port 8081] [--users 20] [--rounds 1]
+                                   [--settle 0.05] [--timeout 10]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from urllib.parse import parse_qsl
+
+import httpx
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+# tap sequence of one simulated student (reads bot settings from .env like the bot)
+from bench_router import SESSION
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_archive_bot"}
+
+# methods whose result is a Message / list of Messages / MessageId(s)
+_MESSAGE_METHODS = {
+    "sendmessage", "editmessagetext", "editmessagereplymarkup", "senddocument",
+    "sendphoto", "sendvideo", "sendaudio", "sendvoice", "forwardmessage",
+}
+
+
+class FakeBotAPI:
+    """Minimal HTTP/1.1 server speaking enough of the Bot API for the bot."""
+
+    def __init__(self) -> None:
+        self.webhook_url: str | None = None
+        self.secret_token: str | None = None
+        self.max_connections = 40
+        self.webhook_set = asyncio.Event()
+        self.calls: dict[str, int] = {}
+        self._message_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+        # chat_id -> timestamps of replies for the tap in progress
+        self._replies: dict[int, list[float]] = {}
+        self._waiters: dict[int, asyncio.Future] = {}
+        self._connections: set[asyncio.StreamWriter] = set()
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def close_connections(self) -> None:
+        """Close the bot's keep-alive connections so their handlers finish normally."""
+
+        for writer in list(self._connections):
+            writer.close()
+        await asyncio.sleep(0.1)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                _verb, target, _version = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, value = header.decode("latin-1").split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = self._dispatch(target, headers.get("content-type", ""), body)
+                data = json.dumps(payload, ensure_ascii=False).encode()
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    def _dispatch(self, target: str, content_type: str, body: bytes):
+        # /bot<token>/<method>
+        method = target.rsplit("/", 1)[-1].split("?", 1)[0]
+        if content_type.startswith("application/json"):
+            params = json.loads(body or b"{}")
+        else:
+            params = dict(parse_qsl(body.decode()))
+        self.calls[method] = self.calls.get(method, 0) + 1
+        try:
+            return "200 OK", {"ok": True, "result": self._result(method.lower(), params)}
+        except KeyError as exc:
+            return "400 Bad Request", {"ok": False, "error_code": 400, "description": f"missing {exc}"}
+
+    def _result(self, method: str, params: dict):
+        if method == "getme":
+            return BOT_USER
+        if method == "setwebhook":
+            self.webhook_url = params["url"]
+            self.secret_token = params.get("secret_token")
+            self.max_connections = int(params.get("max_connections", 40))
+            self.webhook_set.set()
+            return True
+        if method == "deletewebhook":
+            self.webhook_url = None
+            return True
+        if method == "getwebhookinfo":
+            return {"url": self.webhook_url or "", "has_custom_certificate": False, "pending_update_count": 0}
+
+        chat_id = params.get("chat_id")
+        if chat_id is not None:
+            self._record_reply(int(chat_id))
+        if method in _MESSAGE_METHODS:
+            return self._message(int(chat_id or 0), params.get("text", ""))
+        if method == "sendmediagroup":
+            media = json.loads(params["media"]) if isinstance(params["media"], str) else params["media"]
+            return [self._message(int(chat_id), "") for _ in media]
+        if method == "copymessage":
+            return {"message_id": next(self._message_ids)}
+        if method == "copymessages":
+            ids = params["message_ids"]
+            ids = json.loads(ids) if isinstance(ids, str) else ids
+            return [{"message_id": next(self._message_ids)} for _ in ids]
+        return True
+
+    def _message(self, chat_id: int, text: str) -> dict:
+        return {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": text,
+        }
+
+    # ------------------------------------------------------------------
+    # Simulated students
+    # ------------------------------------------------------------------
+    def _record_reply(self, chat_id: int) -> None:
+        stamps = self._replies.get(chat_id)
+        if stamps is None:
+            return
+        stamps.append(time.perf_counter())
+        waiter = self._waiters.pop(chat_id, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def message_update(self, user_id: int, text: str) -> dict:
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"Student {user_id}"},
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"update_id": next(self._update_ids), "message": message}
+
+    async def tap(self, client: httpx.AsyncClient, user_id: int, text: str, settle: float, timeout: float):
+        """Push one update; return (first reply latency, settled latency) in seconds."""
+
+        stamps = self._replies[user_id] = []
+        waiter = self._waiters[user_id] = asyncio.get_running_loop().create_future()
+        headers = {"X-Telegram-Bot-Api-Secret-Token": self.secret_token} if self.secret_token else {}
+        t0 = time.perf_counter()
+        response = await client.post(self.webhook_url, json=self.message_update(user_id, text), headers=headers)
+        response.raise_for_status()
+        await asyncio.wait_for(waiter, timeout)
+        # wait until the bot stops replying to this tap
+        seen = 0
+        while len(stamps) != seen:
+            seen = len(stamps)
+            await asyncio.sleep(settle)
+        return stamps[0] - t0, stamps[-1] - t0
+
+    async def student(self, client, user_id: int, taps: list[str], settle: float, timeout: float, out: list):
+        for text in taps:
+            try:
+                out.append(await self.tap(client, user_id, text, settle, timeout))
+            except asyncio.TimeoutError:
+                print(f"user {user_id}: no reply to {text!r} within {timeout}s", file=sys.stderr)
+        self._replies.pop(user_id, None)
+
+
+def _summary(name: str, values: list[float]) -> str:
+    values = sorted(values)
+    pct = lambda p: values[min(len(values) - 1, int(p * len(values)))] * 1000  # noqa: E731
+    return (
+        f"{name:>14}: p50 {pct(0.50):7.1f} ms  p90 {pct(0.90):7.1f} ms  "
+        f"p99 {pct(0.99):7.1f} ms  max {values[-1] * 1000:7.1f} ms  mean {statistics.fmean(values) * 1000:7.1f} ms"
+    )
+
+
+async def main(host: str, port: int, users: int, rounds: int, settle: float, timeout: float) -> None:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    api = FakeBotAPI()
+    server = await api.serve(host, port)
+    print(f"Fake Bot API on http://{host}:{port}/bot — waiting for setWebhook ...")
+    async with server:
+        await api.webhook_set.wait()
+        print(f"webhook: {api.webhook_url} (max_connections={api.max_connections})")
+        taps = ["/start", *SESSION * rounds]
+        results: list[tuple[float, float]] = []
+        limits = httpx.Limits(max_connections=api.max_connections)
+        async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+            t0 = time.perf_counter()
+            await asyncio.gather(*(
+                api.student(client, user_id, taps, settle, timeout, results)
+                for user_id in range(1000, 1000 + users)
+            ))
+            elapsed = time.perf_counter() - t0
+        print(f"{len(results)} updates from {users} students in {elapsed:.2f} s "
+              f"({len(results) / elapsed:.0f} updates/s, settle {settle * 1000:.0f} ms per tap)")
+        if results:
+            print(_summary("first reply", [first for first, _ in results]))
+            print(_summary("last reply", [last for _, last in results]))
+        print("Bot API calls:", dict(sorted(api.calls.items())))
+        await api.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=1, help="times each student repeats the session")
+    parser.add_argument("--settle", type=float, default=0.05, help="quiet time that ends a tap")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.host, args.port, args.users, args.rounds, args.settle, args.timeout))
@@ -0,0 +1,323 @@
+"""
+Stream a CSV or JSONL material manifest into the database.
+
+Content editors keep their inventories in spreadsheets; this script loads an
+export of one without reading it whole. One material per row (CSV header or
+JSON object keys):
+
+    level, term, subject_code, subject, section, category, title,
+    url, year, lecturer, lecturer_role, archive_chat_id, archive_message_id
+
+``level``, ``term``, ``section``, ``category``, ``title`` and one of
+``subject_code``/``subject`` are required. A subject is looked up by code
+within its level and term (or by name when no code is given); levels, terms,
+years, lecturers and subjects that do not exist yet are created. Names are
+resolved through an in-memory name->id cache that only grows with the
+number of distinct names, so memory stays flat however long the manifest is.
+
+Rows are written in chunks (``--chunk-size``), each in one transaction with
+``Database.upsert_materials`` and a checkpoint in ``import_checkpoints``. An
+interrupted import resumes after the last committed chunk; the checkpoint is
+dropped when the file changes or with ``--restart``. Rows are keyed on the
+same natural keys as the seed, so importing a file twice changes nothing.
+
+Usage:
+    python scripts/import_manifest.py manifest.csv [--db database/archive.db] [--chunk-size 5000]
+    python scripts/import_manifest.py manifest.jsonl --restart
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bot.db import Database
+from bot.db.connection import DB_PATH
+
+# Mirror the CHECK constraints in database/init.sql: one bad row would
+# otherwise abort its whole chunk.
+SECTIONS = {"theory", "discussion", "lab", "syllabus", "apps"}
+CATEGORIES = {
+    "lecture", "slides", "audio", "exam", "booklet", "board_images", "video", "simulation",
+    "summary", "notes", "external_link", "mind_map", "transcript", "related",
+}
+ROLES = {"lecturer", "ta", "lab"}
+# rejected rows printed individually; the rest are only counted
+MAX_WARNINGS = 20
+
+# ---------------- Reading ----------------
+
+class ManifestReader:
+    """Iterate the rows of a CSV or JSONL file as ``(line number, row)``.
+
+    A row is a dict of stripped strings, or the ``ValueError`` describing a
+    JSONL line that is not a JSON object, so that one bad line is rejected
+    like any invalid row instead of ending the import. ``position`` is the
+    number of bytes read so far, for progress reports.
+    """
+
+    def __init__(self, path: str | Path, fmt: str | None = None):
+        self.path = Path(path)
+        self.format = fmt or ("jsonl" if self.path.suffix.lower() in (".jsonl", ".ndjson") else "csv")
+        self._file = None
+
+    def __enter__(self) -> "ManifestReader":
+        self._file = self.path.open("r", encoding="utf-8-sig", newline="")
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._file.close()
+
+    @property
+    def position(self) -> int:
+        return self._file.buffer.tell()
+
+    def __iter__(self):
+        if self.format == "csv":
+            reader = csv.DictReader(self._file)
+            for row in reader:
+                yield reader.line_num, {k.strip(): (v or "").strip() for k, v in row.items() if k}
+            return
+        for number, line in enumerate(self._file, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield number, ValueError(f"invalid JSON ({exc.msg})")
+                continue
+            if not isinstance(row, dict):
+                yield number, ValueError(f"expected a JSON object, got {type(row).__name__}")
+                continue
+            yield number, {k: "" if v is None else str(v).strip() for k, v in row.items()}
+
+
+def fingerprint(path: Path) -> str:
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _int_or_none(value: str) -> int | None:
+    return int(value) if value else None
+
+
+def parse_row(row: dict | ValueError) -> dict:
+    """Validate one manifest row; raise ``ValueError`` with the reason."""
+
+    if isinstance(row, ValueError):
+        raise row
+    missing = [k for k in ("level", "term", "section", "category", "title") if not row.get(k)]
+    if not row.get("subject_code") and not row.get("subject"):
+        missing.append("subject_code/subject")
+    if missing:
+        raise ValueError("missing " + ", ".join(missing))
+    if row["section"] not in SECTIONS:
+        raise ValueError(f"unknown section {row['section']!r}")
+    if row["category"] not in CATEGORIES:
+        raise ValueError(f"unknown category {row['category']!r}")
+    role = row.get("lecturer_role") or "lecturer"
+    if role not in ROLES:
+        raise ValueError(f"unknown lecturer_role {role!r}")
+    return {
+        "level": row["level"],
+        "term": row["term"],
+        "code": row.get("subject_code") or None,
+        "subject": row.get("subject") or None,
+        "section": row["section"],
+        "category": row["category"],
+        "title": row["title"],
+        "url": row.get("url") or None,
+        "year": row.get("year") or None,
+        "lecturer": row.get("lecturer") or None,
+        "role": role,
+        "archive_chat_id": _int_or_none(row.get("archive_chat_id", "")),
+        "archive_message_id": _int_or_none(row.get("archive_message_id", "")),
+    }
+
+# ---------------- Name resolution ----------------
+
+class NameCache:
+    """name -> id maps for everything a material row refers to.
+
+    Loaded once from the database; names first seen in a chunk are created
+    in bulk inside that chunk's transaction.
+    """
+
+    def __init__(self):
+        self.levels: dict[str, int] = {}
+        self.terms: dict[str, int] = {}
+        self.years: dict[str, int] = {}
+        self.lecturers: dict[str, int] = {}
+        self.subjects: dict[tuple[int, int, str], int] = {}
+        self.subject_names: dict[tuple[int, int, str], int] = {}
+        self.created = 0
+
+    async def load(self, db: Database) -> None:
+        keys = await db.natural_keys(materials=False)
+        self.levels, self.terms, self.years = keys["levels"], keys["terms"], keys["years"]
+        self.lecturers = {name: _id for name, (_id, _role) in keys["lecturers"].items()}
+        for (level_id, term_id, code), (_id, name) in keys["subjects"].items():
+            self.subjects[(level_id, term_id, code)] = _id
+            self.subject_names.setdefault((level_id, term_id, name), _id)
+
+    async def _add(self, cache: dict, upsert, names) -> None:
+        missing = [n for n in dict.fromkeys(names) if n is not None and n not in cache]
+        if missing:
+            cache.update(await upsert(missing))
+            self.created += len(missing)
+
+    async def resolve(self, db: Database, rows: list[tuple[int, dict]]) -> tuple[list[tuple], list[str]]:
+        """Turn parsed rows into ``upsert_materials`` rows; return them and the errors."""
+
+        await self._add(self.levels, db.upsert_levels, (r["level"] for _n, r in rows))
+        await self._add(self.terms, db.upsert_terms, (r["term"] for _n, r in rows))
+        await self._add(self.years, db.upsert_years, (r["year"] for _n, r in rows))
+        people = {r["lecturer"]: r["role"] for _n, r in rows if r["lecturer"] and r["lecturer"] not in self.lecturers}
+        if people:
+            self.lecturers.update(await db.upsert_lecturers(people.items()))
+            self.created += len(people)
+
+        new_subjects = {}
+        for _n, r in rows:
+            level_id, term_id = self.levels[r["level"]], self.terms[r["term"]]
+            if r["code"] and (level_id, term_id, r["code"]) not in self.subjects:
+                new_subjects[(level_id, term_id, r["code"])] = (r["code"], r["subject"] or r["code"], level_id, term_id)
+        if new_subjects:
+            self.subjects.update(await db.upsert_subjects(new_subjects.values()))
+            for code, name, level_id, term_id in new_subjects.values():
+                self.subject_names.setdefault((level_id, term_id, name), self.subjects[(level_id, term_id, code)])
+            self.created += len(new_subjects)
+
+        out, errors = [], []
+        for line, r in rows:
+            level_id, term_id = self.levels[r["level"]], self.terms[r["term"]]
+            if r["code"]:
+                sid = self.subjects[(level_id, term_id, r["code"])]
+            else:
+                sid = self.subject_names.get((level_id, term_id, r["subject"]))
+                if sid is None:
+                    errors.append(f"line {line}: unknown subject {r['subject']!r} and no subject_code to create it")
+                    continue
+            out.append((
+                sid, r["section"], r["category"], r["title"], r["url"],
+                self.years.get(r["year"]), self.lecturers.get(r["lecturer"]),
+                r["archive_chat_id"], r["archive_message_id"],
+            ))
+        return out, errors
+
+# ---------------- Import ----------------
+
+def _peak_rss_mb() -> float:
+    """Peak memory of this process, or 0.0 where ``resource`` is missing (Windows)."""
+
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def import_manifest(
+    db: Database,
+    path: str | Path,
+    *,
+    fmt: str | None = None,
+    chunk_size: int = 5000,
+    restart: bool = False,
+    progress_every: float = 2.0,
+    out=sys.stdout,
+) -> dict:
+    """Import ``path`` in chunked transactions, resuming from its checkpoint."""
+
+    path = Path(path)
+    source = str(path.resolve())
+    print_ = lambda *a: print(*a, file=out, flush=True)
+    fp = fingerprint(path)
+    saved = None if restart else await db.get_import_checkpoint(source)
+    skip = saved[1] if saved and saved[0] == fp else 0
+    if saved and not skip:
+        print_("↺ الملف تغيّر أو طُلبت إعادة البدء: الاستيراد من أول صف.")
+    elif skip:
+        print_(f"↻ استئناف بعد {skip} صف من آخر نقطة حفظ.")
+
+    cache = NameCache()
+    await cache.load(db)
+    size = path.stat().st_size or 1
+    stats = {"rows": skip, "imported": 0, "changed": 0, "rejected": 0, "resumed_from": skip}
+    t0 = last = time.perf_counter()
+    with ManifestReader(path, fmt) as reader:
+        rows = iter(reader)
+        for _ in islice(rows, skip):
+            pass
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            parsed, errors = [], []
+            for line, raw in chunk:
+                try:
+                    parsed.append((line, parse_row(raw)))
+                except ValueError as exc:
+                    errors.append(f"line {line}: {exc}")
+            async with db.transaction():
+                material_rows, unresolved = await cache.resolve(db, parsed)
+                stats["changed"] += await db.upsert_materials(material_rows)
+                stats["rows"] += len(chunk)
+                await db.save_import_checkpoint(source, fp, stats["rows"])
+            for error in errors + unresolved:
+                stats["rejected"] += 1
+                if stats["rejected"] <= MAX_WARNINGS:
+                    print_(f"⚠️ {error}")
+            stats["imported"] += len(material_rows)
+
+            now = time.perf_counter()
+            if now - last >= progress_every:
+                last = now
+                done = stats["rows"] - skip
+                rss = _peak_rss_mb()
+                print_(
+                    f"… {stats['rows']} صف ({reader.position * 100 // size}%)"
+                    f" — {done / (now - t0):,.0f} صف/ث" + (f"، ذاكرة قصوى {rss:.0f} MB" if rss else "")
+                )
+    await db.clear_import_checkpoint(source)
+    elapsed = time.perf_counter() - t0
+    stats.update(
+        seconds=round(elapsed, 2),
+        rows_per_second=round((stats["rows"] - skip) / elapsed) if elapsed else 0,
+        names_created=cache.created,
+        peak_rss_mb=round(_peak_rss_mb(), 1),
+    )
+    return stats
+
+# ---------------- Entry point ----------------
+
+async def main(args) -> None:
+    async with Database(args.db) as db:
+        await db.init_db()
+        stats = await import_manifest(
+            db, args.manifest, fmt=args.format, chunk_size=args.chunk_size, restart=args.restart
+        )
+    print(
+        f"🎉 اكتمل الاستيراد: {stats['rows']} صف، {stats['imported']} ملف"
+        f" ({stats['changed']} جديد أو معدّل، {stats['rejected']} مرفوض) في {stats['seconds']} ث"
+        f" — {stats['rows_per_second']:,} صف/ث"
+        + (f"، ذاكرة قصوى {stats['peak_rss_mb']} MB." if stats["peak_rss_mb"] else ".")
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None, help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    asyncio.run(main(parser.parse_args()))
@@ -1,107 +1,148 @@
 """
-Script to seed database from YAML file.
+Seed the database from a YAML file.
+
+Everything is written in one transaction through the bulk upsert APIs of
+``Database``. Rows are keyed on their natural keys: names for levels, terms,
+years and lecturers, the code within a level and term for subjects, and
+(subject, section, category, title, year, lecturer) for materials. Running
+the script again therefore only adds new rows and updates changed ones, so
+it is safe to re-run after editing ``seed_data.yml``.
+
+With ``--sync`` the file is first diffed against the database
+(:mod:`bot.db.sync`) and only the inserts, updates and deletes are written,
+in one short transaction; ``--dry-run`` prints the diff without writing.
+Rows missing from the file are only deleted with ``--prune``, which treats
+the file as the complete archive.
+
+Usage:
+    python scripts/seed.py [--db database/archive.db] [--data scripts/seed_data.yml]
+    python scripts/seed.py --sync [--dry-run] [--prune]
 """
 
+import argparse
 import asyncio
+import os
+import sys
+import time
 from pathlib import Path
 
 import yaml
-from bot.db import Database
 
-# Database instance
-_db = Database()
-
-# ---------------- Helper utilities ----------------
-
-async def ensure_level_id(name: str) -> int:
-    _id = await _db.get_level_id_by_name(name)
-    if _id is not None:
-        return _id
-    await _db.insert_level(name)
-    _id = await _db.get_level_id_by_name(name)
-    if _id is None:
-        raise RuntimeError(f"Failed to create level: {name}")
-    return _id
-
-async def ensure_term_id(name: str) -> int:
-    _id = await _db.get_term_id_by_name(name)
-    if _id is not None:
-        return _id
-    await _db.insert_term(name)
-    _id = await _db.get_term_id_by_name(name)
-    if _id is None:
-        raise RuntimeError(f"Failed to create term: {name}")
-    return _id
-
-async def add_subjects(level_name: str, term_name: str, pairs: list[tuple[str, str]]):
-    """Add subjects for a level/term."""
-    level_id = await ensure_level_id(level_name)
-    term_id = await ensure_term_id(term_name)
-    for code, name in pairs:
-        if code.strip() == "---":
-            continue
-        await _db.insert_subject(code, name, level_id, term_id)
-
-async def _subject_id(level_name: str, term_name: str, subject_name: str) -> int:
-    level_id = await _db.get_level_id_by_name(level_name)
-    term_id = await _db.get_term_id_by_name(term_name)
-    if not (level_id and term_id):
-        raise RuntimeError(f"Level/Term not found: {level_name} / {term_name}")
-    sid = await _db.get_subject_id_by_name(level_id, term_id, subject_name)
-    if not sid:
-        raise RuntimeError(f"Subject not found: {subject_name} ({level_name}/{term_name})")
-    return sid
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bot.db import Database
+from bot.db.connection import DB_PATH
+from bot.db.sync import apply_sync, plan_sync
 
 # ---------------- YAML loading ----------------
 
-def _load_data() -> dict:
-    path = Path(__file__).with_name("seed_data.yml")
+def _load_data(path: str | Path | None = None) -> dict:
+    path = Path(path) if path else Path(__file__).with_name("seed_data.yml")
     with path.open("r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
 # ---------------- Seeding helpers ----------------
 
-async def seed_structure(structure: dict):
-    for level in structure.get("levels", []):
-        level_name = level["name"]
-        for term in level.get("terms", []):
-            term_name = term["name"]
-            pairs = [(s["code"], s["name"]) for s in term.get("subjects", [])]
-            await add_subjects(level_name, term_name, pairs)
-    print("✅ تم إدخال الهيكل (مستويات/أترام/مواد).")
+async def seed_structure(db: Database, structure: dict) -> dict[tuple[str, str, str], int]:
+    """Upsert levels, terms and subjects; map (level, term, subject name) to the subject id."""
 
-async def seed_years_and_lecturers(data: dict):
-    years = {key: await _db.ensure_year_id(val) for key, val in data.get("years", {}).items()}
-    people = {
-        key: await _db.ensure_lecturer_id(info["name"], info["role"])
-        for key, info in data.get("lecturers", {}).items()
+    levels = structure.get("levels", [])
+    level_ids = await db.upsert_levels(level["name"] for level in levels)
+    term_ids = await db.upsert_terms(
+        term["name"] for level in levels for term in level.get("terms", [])
+    )
+    rows, names = [], []
+    for level in levels:
+        for term in level.get("terms", []):
+            for s in term.get("subjects", []):
+                if s["code"].strip() == "---":
+                    continue
+                rows.append((s["code"], s["name"], level_ids[level["name"]], term_ids[term["name"]]))
+                names.append((level["name"], term["name"], s["name"]))
+    ids = await db.upsert_subjects(rows)
+    return {name: ids[(row[2], row[3], row[0])] for name, row in zip(names, rows)}
+
+async def seed_years_and_lecturers(db: Database, data: dict) -> dict:
+    year_ids = await db.upsert_years(data.get("years", {}).values())
+    people = data.get("lecturers", {})
+    person_ids = await db.upsert_lecturers((info["name"], info["role"]) for info in people.values())
+    return {
+        "years": {key: year_ids[name] for key, name in data.get("years", {}).items()},
+        "people": {key: person_ids[info["name"]] for key, info in people.items()},
     }
-    return {"years": years, "people": people}
 
-async def seed_materials_variants(data: dict, ctx: dict):
+def material_rows(data: dict, subjects: dict, ctx: dict):
+    """Yield material rows for ``upsert_materials``; entries naming an unknown subject are skipped."""
+
     Y = ctx["years"]; P = ctx["people"]
     for entry in data.get("materials", []):
-        sid = await _subject_id(entry["level"], entry["term"], entry["subject"])
+        sid = subjects.get((entry["level"], entry["term"], entry["subject"]))
+        if sid is None:
+            print(
+                f"⚠️ تم تخطي مواد مادة غير موجودة في الهيكل: {entry['subject']} ({entry['level']}/{entry['term']})",
+                file=sys.stderr,
+            )
+            continue
         for item in entry.get("items", []):
-            await _db.insert_material(
+            yield (
                 sid,
                 item["section"],
                 item["kind"],
                 item["title"],
                 item.get("url"),
-                Y[item["year"]],
-                P.get(item.get("person"))
+                Y.get(item.get("year")),
+                P.get(item.get("person")),
+                item.get("archive_chat_id"),
+                item.get("archive_message_id"),
             )
 
+async def seed(db: Database, data: dict) -> dict:
+    """Apply ``data`` in a single transaction; return row counts."""
+
+    async with db.transaction():
+        subjects = await seed_structure(db, data["structure"])
+        ctx = await seed_years_and_lecturers(db, data)
+        rows = list(material_rows(data, subjects, ctx))
+        changed = await db.upsert_materials(rows)
+    return {"subjects": len(subjects), "materials": len(rows), "materials_changed": changed}
+
 # ---------------- Entry point ----------------
 
-async def main():
-    data = _load_data()
-    async with _db:
-        await seed_structure(data["structure"])
-        ctx = await seed_years_and_lecturers(data)
-        await seed_materials_variants(data, ctx)
-        print("🎉 اكتمل إدخال البيانات (شغّله مرة واحدة فقط).")
+async def sync(db: Database, data: dict, *, dry_run: bool = False, prune: bool = False) -> None:
+    plan = await plan_sync(db, data, prune=prune)
+    for line in plan.report():
+        print(line)
+    if plan.is_empty():
+        print("✅ قاعدة البيانات مطابقة للملف، لا تغييرات.")
+        return
+    counts = {k: v for k, v in plan.counts().items() if v}
+    if dry_run:
+        print(f"🔎 تجربة فقط (لم يُكتب شيء): {counts}")
+        return
+    t0 = time.perf_counter()
+    await apply_sync(db, plan)
+    print(f"✅ طُبّقت التغييرات في {(time.perf_counter() - t0) * 1000:.1f} ms: {counts}")
+
+async def main(db_path: str, data_path: str | None, *, sync_mode=False, dry_run=False, prune=False) -> None:
+    data = _load_data(data_path)
+    async with Database(db_path) as db:
+        await db.init_db()
+        if sync_mode or dry_run or prune:
+            await sync(db, data, dry_run=dry_run, prune=prune)
+            return
+        counts = await seed(db, data)
+    print("✅ تم إدخال الهيكل (مستويات/أترام/مواد).")
+    print(
+        f"🎉 اكتمل إدخال البيانات: {counts['subjects']} مادة، {counts['materials']} ملف "
+        f"({counts['materials_changed']} جديد أو معدّل). يمكن إعادة تشغيله بأمان."
+    )
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--data", default=None, help="YAML file (default: scripts/seed_data.yml)")
+    parser.add_argument("--sync", action="store_true", help="write only the diff against the database")
+    parser.add_argument("--dry-run", action="store_true", help="print the diff without writing (implies --sync)")
+    parser.add_argument("--prune", action="store_true", help="also delete subjects and materials missing from the file (implies --sync)")
+    args = parser.parse_args()
+    asyncio.run(main(args.db, args.data, sync_mode=args.sync, dry_run=args.dry_run, prune=args.prune))
@@ -1,10 +1,15 @@
 import asyncio
 import os
+import sqlite3
 import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from bot.db import Database
+from bot.db.fuzzy import FuzzyIndex
+from bot.db.migrations import MIGRATIONS, get_version
+from bot.db.persistence import SQLitePersistence
+from bot.helpers import nav_get_ids, nav_resolve_button, nav_set_buttons, nav_set_level
 from bot.models import Subject, Lecturer, Material
 from bot.keyboards import generate_subjects_keyboard, generate_lecturers_keyboard
 
@@ -45,3 +50,607 @@ def test_keyboards_accept_dataclasses():
     kb2_dict = kb2.to_dict()
     texts2 = [btn["text"] for row in kb2_dict["keyboard"] for btn in row]
     assert "Prof" in texts2
+
+
+def test_read_pool_runs_reads_in_parallel_with_writes(tmp_path):
+    async def inner():
+        db = Database(str(tmp_path / "pool.db"), read_pool_size=3, cache_size=-2000)
+        async with db:
+            await db.init_db()
+            writer = await db.connect()
+            cur = await writer.execute("PRAGMA journal_mode")
+            assert (await cur.fetchone())[0] == "wal"
+            await db.insert_level("Level1")
+            await db.insert_level("Level2")
+            results = await asyncio.gather(*(db.get_levels() for _ in range(10)), db.insert_level("Level3"))
+            assert all(len(levels) >= 2 for levels in results[:10])
+            assert [name for _id, name in await db.get_levels()] == ["Level1", "Level2", "Level3"]
+            assert db._idle_readers.qsize() == 3
+
+    asyncio.run(inner())
+
+
+def test_reads_inside_a_transaction_see_its_writes_with_the_pool(tmp_path):
+    async def inner(name, queue):
+        async with Database(str(tmp_path / name), read_pool_size=2) as db:
+            await db.init_db()
+            if queue:
+                await db.enable_write_queue()
+                await db.enable_catalog(poll_interval=60)
+            async with db.transaction():
+                await db.insert_level("L")
+                assert await db.get_level_id_by_name("L") == 1
+                lecturer = await db.ensure_lecturer_id("Dr New", "ta")
+                assert await db.get_lecturer_id_by_name("Dr New") == lecturer
+            # an existing lecturer keeps its id and role
+            assert await db.ensure_lecturer_id("Dr New") == lecturer
+            row = await db._fetchone("test", "SELECT role FROM lecturers WHERE id=?", (lecturer,))
+            assert row[0] == "ta"
+            assert db._idle_readers.qsize() == 2
+
+    asyncio.run(inner("pool.db", queue=False))
+    asyncio.run(inner("queued.db", queue=True))
+
+
+def test_init_db_applies_migrations_once(tmp_path):
+    async def inner():
+        async with Database(str(tmp_path / "mig.db")) as db:
+            applied = await db.init_db()
+            assert applied == [m.version for m in MIGRATIONS]
+            assert await db.init_db() == []
+            conn = await db.connect()
+            assert await get_version(conn) == MIGRATIONS[-1].version
+            cur = await conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND name='idx_materials_category'")
+            assert await cur.fetchone() is not None
+
+    asyncio.run(inner())
+
+
+def test_bulk_upserts_are_idempotent_and_roll_back_together(tmp_path):
+    async def inner():
+        async with Database(str(tmp_path / "bulk.db")) as db:
+            await db.init_db()
+            levels = await db.upsert_levels(["L1", "L2", "L1"])
+            again = await db.upsert_levels(["L2", "L3"])
+            assert again["L2"] == levels["L2"] and again["L3"] not in levels.values()
+            people = await db.upsert_lecturers([("Dr A", "lecturer")])
+            assert await db.upsert_lecturers([("Dr A", "ta")]) == people
+            subjects = await db.upsert_subjects([("C1", "Old", 1, 1)])
+            assert await db.upsert_subjects([("C1", "New", 1, 1)]) == subjects
+            sid = subjects[(1, 1, "C1")]
+            rows = [(sid, "theory", "exam", "Final", "http://a", None, None),
+                    (sid, "theory", "exam", "Final", "http://a", None, people["Dr A"])]
+            assert await db.upsert_materials(rows) == 2
+            assert await db.upsert_materials(rows) == 0
+            rows[0] = (sid, "theory", "exam", "Final", "http://b", None, None)
+            assert await db.upsert_materials(rows) == 1
+            mats = await db.get_materials_by_category(sid, "theory", "exam")
+            assert sorted(m.url for m in mats) == ["http://a", "http://b"]
+            assert [s.name for s in await db.get_subjects_by_level_and_term(1, 1)] == ["New"]
+
+            try:
+                async with db.transaction():
+                    await db.upsert_years(["1445"])
+                    await db.upsert_materials([(sid, "lab", "exam", "X", None, None, None)])
+                    raise RuntimeError("abort")
+            except RuntimeError:
+                pass
+            assert await db.get_year_id_by_name("1445") is None
+            assert await db.get_materials_by_category(sid, "lab", "exam") == []
+
+    asyncio.run(inner())
+
+
+def test_sync_writes_only_the_diff_and_prunes_on_request(tmp_path):
+    from bot.db.sync import apply_sync, plan_sync
+
+    def archive(subject_name="Old", url="http://a", items=("A", "B")):
+        return {
+            "structure": {"levels": [{"name": "L1", "terms": [{"name": "T1", "subjects": [
+                {"code": "C1", "name": subject_name}]}]}]},
+            "years": {"y1": "1445"},
+            "lecturers": {"p1": {"name": "Dr A", "role": "lecturer"}},
+            "materials": [{"level": "L1", "term": "T1", "subject": subject_name, "items": [
+                {"section": "theory", "kind": "exam", "title": t, "url": url, "year": "y1", "person": "p1"}
+                for t in items]}],
+        }
+
+    async def inner():
+        async with Database(str(tmp_path / "sync.db")) as db:
+            await db.init_db()
+            plan = await plan_sync(db, archive())
+            assert plan.counts()["materials_inserted"] == 2 and plan.counts()["subjects_inserted"] == 1
+            await apply_sync(db, plan)
+            assert (await plan_sync(db, archive())).is_empty()
+            await db.insert_subject("C2", "Manual", 1, 1)
+
+            edited = archive(subject_name="New", url="http://b", items=("B", "C"))
+            plan = await plan_sync(db, edited)
+            assert {k: v for k, v in plan.counts().items() if v} == {
+                "subjects_updated": 1, "materials_inserted": 1, "materials_updated": 1}
+            assert "~ material  C1 theory/exam «B» [1445 Dr A] url: http://a -> http://b" in plan.report()
+            # planning alone writes nothing
+            assert [s.name for s in await db.get_subjects_by_level_and_term(1, 1)] == ["Old", "Manual"]
+            await apply_sync(db, plan)
+            assert (await plan_sync(db, edited)).is_empty()
+
+            plan = await plan_sync(db, edited, prune=True)
+            assert [name for _key, _id, name in plan.subject_deletes] == ["Manual"]
+            assert [key[3] for key, _id in plan.material_deletes] == ["A"]
+            await apply_sync(db, plan)
+            mats = await db.get_materials_by_category(1, "theory", "exam")
+            assert sorted((m.title, m.url) for m in mats) == [("B", "http://b"), ("C", "http://b")]
+            assert [s.name for s in await db.get_subjects_by_level_and_term(1, 1)] == ["New"]
+
+    asyncio.run(inner())
+
+
+def test_manifest_import_resumes_after_the_last_committed_chunk(tmp_path):
+    import io
+    from scripts.import_manifest import import_manifest
+
+    manifest = tmp_path / "m.csv"
+    manifest.write_text(
+        "level,term,subject_code,subject,section,category,title,url,year,lecturer\n"
+        + "".join(f"L1,T1,C1,Sub,theory,exam,E{i},http://u/{i},1445,Dr A\n" for i in range(5))
+        + "L1,T1,,Nope,theory,exam,X,,,\nL1,T1,C1,,theory,bogus,Y,,,\n",
+        encoding="utf-8",
+    )
+
+    async def inner():
+        async with Database(str(tmp_path / "imp.db")) as db:
+            await db.init_db()
+            upsert, calls = db.upsert_materials, []
+
+            async def crash_on_second_chunk(rows):
+                calls.append(rows)
+                if len(calls) == 2:
+                    raise RuntimeError("killed")
+                return await upsert(rows)
+
+            db.upsert_materials = crash_on_second_chunk
+            try:
+                await import_manifest(db, manifest, chunk_size=2, out=io.StringIO())
+            except RuntimeError:
+                pass
+            assert (await db.get_import_checkpoint(str(manifest.resolve())))[1] == 2
+            db.upsert_materials = upsert
+
+            stats = await import_manifest(db, manifest, chunk_size=2, out=io.StringIO())
+            assert (stats["resumed_from"], stats["rows"], stats["imported"], stats["rejected"]) == (2, 7, 3, 2)
+            mats = await db.get_materials_by_category(1, "theory", "exam")
+            assert sorted(m.title for m in mats) == [f"E{i}" for i in range(5)]
+            assert await db.get_import_checkpoint(str(manifest.resolve())) is None
+            again = await import_manifest(db, manifest, out=io.StringIO())
+            assert again["changed"] == 0 and again["names_created"] == 0
+
+    asyncio.run(inner())
+
+def test_manifest_import_rejects_malformed_jsonl_lines_and_carries_on(tmp_path):
+    import io
+    import json
+    from scripts.import_manifest import import_manifest
+
+    good = lambda i: json.dumps({"level": "L1", "term": "T1", "subject_code": "C1", "section": "theory",
+                                 "category": "exam", "title": f"E{i}"})
+    manifest = tmp_path / "m.jsonl"
+    manifest.write_text("\n".join([good(0), '{"level": "L1", "ter', "", "[1, 2]", "42", good(1)]) + "\n")
+
+    async def inner():
+        async with Database(str(tmp_path / "jsonl.db")) as db:
+            await db.init_db()
+            out = io.StringIO()
+            stats = await import_manifest(db, manifest, chunk_size=2, out=out)
+            assert (stats["imported"], stats["rejected"]) == (2, 3)
+            assert "line 2: invalid JSON" in out.getvalue()
+            assert "line 4: expected a JSON object, got list" in out.getvalue()
+            assert "line 5: expected a JSON object, got int" in out.getvalue()
+            mats = await db.get_materials_by_category(1, "theory", "exam")
+            assert sorted(m.title for m in mats) == ["E0", "E1"]
+
+    asyncio.run(inner())
+
+
+def test_write_queue_group_commits_and_isolates_failures(tmp_path):
+    async def inner():
+        async with Database(str(tmp_path / "wq.db")) as db:
+            await db.init_db()
+            queue = await db.enable_write_queue(max_batch=50, max_delay=0.05)
+            before = db.change_version
+            await asyncio.gather(*(db.insert_level(f"L{i}") for i in range(100)))
+            stats = queue.stats()
+            assert stats["ops"] == 100 and stats["batches"] == 2 and stats["max_batch"] == 50
+            assert len(await db.get_levels()) == 100 and db.change_version != before
+
+            bad = queue.execute("INSERT INTO materials (subject_id, section, category, title) VALUES (1, 'x', 'y', 'z')")
+            results = await asyncio.gather(bad, db.insert_term("T1"), return_exceptions=True)
+            assert isinstance(results[0], Exception) and results[1] is None
+            assert await db.get_term_id_by_name("T1") is not None and queue.stats()["failed"] == 1
+
+            # a transaction block holds the connection between batches; other
+            # tasks' writes wait instead of joining (and sharing its rollback)
+            inside = asyncio.Event()
+
+            async def failing_load():
+                async with db.transaction():
+                    await db.upsert_years(["1445", "1446"])
+                    inside.set()
+                    await asyncio.sleep(0.01)
+                    raise RuntimeError("abort")
+
+            async def single_write():
+                await inside.wait()
+                await db.insert_year("1447")
+
+            results = await asyncio.gather(failing_load(), single_write(), return_exceptions=True)
+            assert isinstance(results[0], RuntimeError) and results[1] is None
+            assert [await db.get_year_id_by_name(y) is None for y in ("1445", "1446", "1447")] == [True, True, False]
+            assert queue.stats()["exclusive_grants"] == 1
+        assert db.write_queue is None
+
+    asyncio.run(inner())
+
+def test_query_stats_time_methods_and_log_slow_queries_with_plan(tmp_path, caplog):
+    async def inner():
+        async with Database(str(tmp_path / "qs.db")) as db:
+            await _fill_small_archive(db)
+            stats = db.enable_query_stats(slow_ms=0)
+            for _ in range(10):
+                await db.get_materials_by_category(1, "theory", "exam")
+            await db.get_subject_path(99)
+            await db.get_levels()
+            await db.query_stats.drain()
+            figures = stats.stats()
+            exam = figures["get_materials_by_category"]
+            assert exam["statements"] == 10 and exam["rows"] == 20
+            assert 0 < exam["p50_ms"] <= exam["p95_ms"] <= exam["p99_ms"] <= exam["max_ms"]
+            assert figures["get_subject_path"]["rows"] == 0 and figures["get_levels"]["rows"] == 2
+            slow = stats.slow[-1]
+            assert slow["method"] == "get_levels" and "FROM levels" in slow["sql"]
+            assert "SCAN levels" in slow["plan"]
+
+            stats.slow_seconds = 10
+            try:
+                await db.insert_material(1, "nowhere", "exam", "bad")
+            except sqlite3.IntegrityError:
+                pass
+            assert stats.stats()["insert_material"]["errors"] == 1
+            assert len(stats.slow) == 12
+
+    with caplog.at_level("WARNING", logger="bot.db.slow_queries"):
+        asyncio.run(inner())
+    assert any("SCAN levels" in r.getMessage() for r in caplog.records)
+
+
+def test_query_stats_count_bulk_writes_and_catalog_reads(tmp_path):
+    async def inner():
+        async with Database(str(tmp_path / "qs-bulk.db")) as db:
+            await _fill_small_archive(db)
+            stats = db.enable_query_stats(slow_ms=10_000)
+            levels = await db.upsert_levels(["L1", "L9"])
+            await db.upsert_lecturers([("Dr A", "lecturer"), ("Dr Z", "lecturer")])
+            subjects = await db.upsert_subjects([("C9", "Subject9", levels["L9"], 1)])
+            sid = subjects[(levels["L9"], 1, "C9")]
+            added = await db.upsert_materials(
+                [(sid, "theory", "exam", f"E{i}", None, None, None) for i in range(3)]
+            )
+            await db.save_import_checkpoint("manifest", "abc", 3)
+            await db.clear_import_checkpoint("manifest")
+            assert await db.delete_subjects([sid]) == 1
+
+            figures = stats.stats()
+            assert figures["upsert_levels"]["statements"] == 2
+            assert figures["upsert_lecturers"]["statements"] == 2
+            assert figures["upsert_subjects"]["rows"] == 1
+            assert added == 3 and figures["upsert_materials"]["statements"] == 1
+            assert figures["delete_subjects"]["statements"] == 2
+            assert figures["save_import_checkpoint"]["statements"] == 1
+            assert figures["clear_import_checkpoint"]["statements"] == 1
+
+            catalog = await db.enable_catalog()
+            await db.get_levels()
+            await db.get_subject_path(99)
+            assert catalog.hits == 2
+            figures = stats.stats()
+            assert figures["get_levels"]["statements"] == 1 and figures["get_levels"]["rows"] == 3
+            assert figures["get_subject_path"]["rows"] == 0
+
+    asyncio.run(inner())
+
+
+def test_screen_snapshots_match_individual_queries(tmp_path):
+    async def inner():
+        async with Database(str(tmp_path / "snap.db")) as db:
+            await db.init_db()
+            await db.insert_level("L")
+            await db.insert_term("T")
+            level_id = await db.get_level_id_by_name("L")
+            term_id = await db.get_term_id_by_name("T")
+            await db.insert_subject("S1", "Subject1", level_id, term_id)
+            sid = (await db.get_subjects_by_level_and_term(level_id, term_id))[0].id
+            y1, y2 = await db.ensure_year_id("1445"), await db.ensure_year_id("1446")
+            lec = await db.ensure_lecturer_id("Dr X")
+            await db.insert_material(sid, "theory", "lecture", "L1", year_id=y1, lecturer_id=lec)
+            await db.insert_material(sid, "theory", "slides", "L1", year_id=y1, lecturer_id=lec)
+            await db.insert_material(sid, "theory", "exam", "Final", year_id=y2)
+
+            snap = await db.get_section_snapshot(sid, "theory")
+            assert snap.years == list(await db.get_years_for_subject_section(sid, "theory"))
+            assert snap.lecturers == await db.get_lecturers_for_subject_section(sid, "theory")
+            assert snap.lectures_exist == await db.has_lecture_category(sid, "theory")
+            assert snap.categories == {"lecture", "slides", "exam"}
+
+            ym = await db.get_year_menu_snapshot(sid, "theory", y2)
+            assert ym.lectures_exist is True
+            assert ym.categories == await db.list_categories_for_subject_section_year(sid, "theory", y2)
+            assert (await db.get_year_menu_snapshot(sid, "theory", y1)).categories == []
+            assert not (await db.get_year_menu_snapshot(sid, "lab", y1)).lectures_exist
+
+            ls = await db.get_lecturer_snapshot(sid, "theory", lec)
+            assert ls.years == list(await db.get_years_for_subject_section_lecturer(sid, "theory", lec))
+            assert ls.lectures_exist is True
+
+    asyncio.run(inner())
+
+
+async def _fill_small_archive(db):
+    await db.init_db()
+    for lvl in ("L1", "L2"):
+        await db.insert_level(lvl)
+    for term in ("T1", "T2"):
+        await db.insert_term(term)
+    for i, (lvl, term) in enumerate([(1, 1), (1, 1), (1, 2), (2, 1)], start=1):
+        await db.insert_subject(f"C{i}", f"Subject{i}", lvl, term)
+    years = [await db.ensure_year_id(y) for y in ("1444", "1445")]
+    lecs = [await db.ensure_lecturer_id(n) for n in ("Dr A", "Dr B")]
+    n = 0
+    for sid in (1, 2, 3):
+        for section in ("theory", "lab"):
+            for cat in ("lecture", "slides", "exam", "summary"):
+                for t in ("T-a", "T-b"):
+                    n += 1
+                    await db.insert_material(
+                        sid, section, cat, t, f"http://u/{n}",
+                        year_id=years[n % 2] if n % 5 else None,
+                        lecturer_id=lecs[n % 2] if n % 3 else None,
+                        archive_chat_id=-100 if n % 7 == 0 else None,
+                        archive_message_id=n if n % 4 == 0 else None,
+                    )
+
+
+def test_catalog_snapshot_answers_like_sql(tmp_path):
+    async def inner():
+        async with Database(str(tmp_path / "cat.db")) as db:
+            await _fill_small_archive(db)
+            calls = [("get_levels", ()), ("get_level_id_by_name", ("L2",)), ("get_term_id_by_name", ("T1",)),
+                     ("get_year_id_by_name", ("1445",)), ("get_lecturer_id_by_name", ("Dr B",))]
+            for lvl in (1, 2):
+                calls.append(("get_terms_by_level", (lvl,)))
+                for term in (1, 2):
+                    calls += [("get_subjects_by_level_and_term", (lvl, term)), ("count_subjects", (lvl, term)),
+                              ("term_feature_flags", (lvl, term)), ("get_subject_id_by_name", (lvl, term, "Subject2"))]
+            calls += [("get_subjects_for_lecturer", (lec,)) for lec in (1, 2, 3)]
+            for sid in (1, 2, 3, 4, 99):
+                calls += [("get_available_sections_for_subject", (sid,)), ("get_subject_path", (sid,))]
+                for sec in ("theory", "lab", "apps"):
+                    calls += [(m, (sid, sec)) for m in (
+                        "get_years_for_subject_section", "get_lecturers_for_subject_section",
+                        "has_lecture_category", "list_lecture_titles", "get_section_snapshot")]
+                    for y in (1, 2):
+                        calls += [("list_lecture_titles_by_year", (sid, sec, y)),
+                                  ("list_categories_for_subject_section_year", (sid, sec, y)),
+                                  ("get_year_menu_snapshot", (sid, sec, y))]
+                        for lec in (1, 2):
+                            calls += [("list_lecture_titles_by_lecturer_year", (sid, sec, lec, y)),
+                                      ("get_year_menu_snapshot", (sid, sec, y, lec))]
+                    for lec in (1, 2):
+                        calls += [("list_lecture_titles_by_lecturer", (sid, sec, lec)),
+                                  ("get_years_for_subject_section_lecturer", (sid, sec, lec)),
+                                  ("get_lecturer_snapshot", (sid, sec, lec))]
+                    calls += [("get_lecture_materials", (sid, sec)), ("get_materials_by_category", (sid, sec, "exam")),
+                              ("list_categories_for_lecture", (sid, sec, "T-a"))]
+            expected = [await getattr(db, name)(*args) for name, args in calls]
+
+            catalog = await db.enable_catalog()
+            got = [await getattr(db, name)(*args) for name, args in calls]
+            for (name, args), e, g in zip(calls, expected, got):
+                if isinstance(e, list) and name.startswith("list_categories"):
+                    e, g = sorted(e), sorted(g)
+                if hasattr(e, "categories") and isinstance(e.categories, list):
+                    e.categories, g.categories = sorted(e.categories), sorted(g.categories)
+                assert list(e) == list(g) if isinstance(e, list) else e == g, (name, args)
+            assert catalog.hits == len(calls) and catalog.misses == 0
+            archived = [m for m in await db.get_materials_by_category(1, "theory", "slides") if m.archive_message_id]
+            assert [(m.archive_chat_id, m.archive_message_id) for m in archived] == [(None, 4)]
+
+            # كتابة عبر Database تُسقط اللقطة حتى يُعاد بناؤها
+            await db.insert_level("L3")
+            assert len(await db.get_levels()) == 3
+            assert catalog.misses == 1
+            await catalog.refresh()
+            assert [name for _id, name in await db.get_levels()] == ["L1", "L2", "L3"]
+            assert catalog.stats()["rebuilds"] == 2
+
+    asyncio.run(inner())
+
+
+def test_search_normalises_arabic_and_follows_writes(tmp_path):
+    async def inner():
+        async with Database(str(tmp_path / "search.db")) as db:
+            await db.init_db()
+            for lvl in ("L1", "L2"):
+                await db.insert_level(lvl)
+            await db.insert_term("T1")
+            await db.insert_subject("MT101", "الدوائر الكهربائية", 1, 1)
+            await db.insert_subject("MT201", "التحكم الآلي", 2, 1)
+            lec = await db.ensure_lecturer_id("د. أحمد علي")
+            await db.insert_material(1, "theory", "lecture", "مُحاضَرة ١ مقدمة", "http://u/1", lecturer_id=lec)
+            await db.insert_material(1, "theory", "exam", "إمتحان نهائي", "http://u/2")
+            await db.insert_material(2, "theory", "lecture", "محاضرة الأنظمة", "http://u/3")
+
+            titles = lambda hits: [h.title for h in hits]
+            assert titles(await db.search_materials("امتحان")) == ["إمتحان نهائي"]
+            assert titles(await db.search_materials("احمد")) == ["مُحاضَرة ١ مقدمة"]
+            assert titles(await db.search_materials("mt201")) == ["محاضرة الأنظمة"]
+            assert titles(await db.search_materials("الكهرب")) == ["إمتحان نهائي", "مُحاضَرة ١ مقدمة"]
+            assert len(await db.search_materials("محاضره")) == 2
+            assert titles(await db.search_materials("محاضرة", level_id=2, term_id=1)) == ["محاضرة الأنظمة"]
+            assert titles(await db.search_materials("محاضرة", limit=1, offset=1))
+            assert await db.search_materials("محاضرة", offset=5) == []
+            assert await db.search_materials('"*) OR (') == []
+
+            conn = await db.connect()
+            await conn.execute("UPDATE subjects SET name = 'فيزياء' WHERE id = 2")
+            await conn.execute("DELETE FROM materials WHERE id = 2")
+            await conn.commit()
+            assert titles(await db.search_materials("فِيزياء")) == ["محاضرة الأنظمة"]
+            assert await db.search_materials("امتحان") == []
+
+    asyncio.run(inner())
+
+
+def test_fuzzy_index_matches_partial_and_misspelt_names(tmp_path):
+    async def inner():
+        async with Database(str(tmp_path / "fuzzy.db")) as db:
+            await db.init_db()
+            await db.insert_level("L1")
+            await db.insert_term("T1")
+            await db.insert_subject("B0303213", "الجبر الخطي", 1, 1)
+            await db.insert_subject("B0303301", "الدوائر الكهربائية", 1, 1)
+            await db.ensure_lecturer_id("د. أحمد علي")
+
+            index = FuzzyIndex()
+            assert await index.rebuild(db) == 3
+            best = lambda q: (index.search(q) or [None])[0]
+            assert (best("جبر").kind, best("جبر").id) == ("subject", 1)
+            assert best("B0303213").id == 1 and best("B0303213").score == 1.0
+            assert best("دوائر كهربائيه").id == 2
+            assert best("b0303310").id == 2
+            assert best("احمد").kind == "lecturer"
+            assert index.search("zzz") == []
+
+            await db.insert_subject("MT100", "التحكم الآلي", 1, 1)
+            assert await index.refresh(db) == 1
+            assert await index.refresh(db) == 0
+            assert best("تحكم").id == 3
+
+            path = await db.get_subject_path(3)
+            assert (path.level_name, path.term_name, path.code) == ("L1", "T1", "MT100")
+
+            # renames and deletions by another process (e.g. seed.py --sync) rebuild the index
+            await db.check_external_writes()
+            conn = sqlite3.connect(db.db_path)
+            conn.execute("UPDATE subjects SET name = 'الهندسة التحليلية' WHERE id = 1")
+            conn.execute("DELETE FROM subjects WHERE id = 2")
+            conn.commit()
+            conn.close()
+            assert await db.check_external_writes()
+            assert await index.refresh(db) == 3
+            assert best("جبر") is None and best("تحليلية").id == 1
+            assert best("دوائر كهربائيه") is None
+
+    asyncio.run(inner())
+
+
+def test_nav_persistence_batches_writes_and_loads_lazily(tmp_path):
+    path = str(tmp_path / "state.db")
+
+    async def inner():
+        store = SQLitePersistence(path)
+        assert await store.get_user_data() == {}
+        users = {}
+        for uid in range(1, 201):
+            users[uid] = {}
+            await store.refresh_user_data(uid, users[uid])
+            nav_set_level(users[uid], f"L{uid}", uid)
+            nav_set_buttons(users[uid], "term", [(5, "T5")])
+        # one round of the application's persistence updater
+        await asyncio.gather(*(store.update_user_data(uid, data) for uid, data in users.items()))
+        await store.drop_user_data(200)
+        await store.flush()
+        assert store.batches <= 2 and store.rows_written == 201
+
+        restarted = SQLitePersistence(path)
+        user_data = {}
+        await restarted.refresh_user_data(7, user_data)
+        assert nav_get_ids(user_data) == (7, None)
+        assert nav_resolve_button(user_data, "T5") == ("term", 5)
+        assert restarted.stats()["loads"] == 1
+        # later updates for the same user do not read again
+        nav_set_level(user_data, "L8", 8)
+        await restarted.refresh_user_data(7, user_data)
+        assert nav_get_ids(user_data) == (8, None)
+        dropped = {}
+        await restarted.refresh_user_data(200, dropped)
+        assert dropped == {}
+        await restarted.flush()
+
+    asyncio.run(inner())
+
+
+def test_idle_users_are_spilled_and_restored_on_next_update(tmp_path):
+    from types import SimpleNamespace
+    from telegram.ext import ApplicationBuilder, CommandHandler, ConversationHandler
+    from bot.eviction import IdleEvictor
+
+    async def inner():
+        store = SQLitePersistence(str(tmp_path / "state.db"))
+        app = ApplicationBuilder().token("1:test").persistence(store).build()
+        conv = ConversationHandler(entry_points=[CommandHandler("start", lambda u, c: None)], states={}, fallbacks=[])
+        now = [100.0]
+        evictor = IdleEvictor(app, ttl=60, max_users=2, conversations=[conv], clock=lambda: now[0])
+
+        for uid in (1, 2, 3, 4):
+            await store.refresh_user_data(uid, app._user_data[uid])
+            nav_set_level(app._user_data[uid], f"L{uid}", uid)
+            conv._conversations[(uid, uid)] = 0
+            await evictor.touch(SimpleNamespace(effective_user=SimpleNamespace(id=uid), effective_chat=SimpleNamespace(id=uid)))
+            now[0] += 10
+
+        # 1 and 2 are over the resident limit; 3 becomes idle later
+        assert evictor.sweep() == 2
+        assert sorted(app.user_data) == [3, 4] and sorted(conv._conversations) == [(3, 3), (4, 4)]
+        now[0] += 45
+        assert evictor.sweep() == 1
+        assert evictor.stats()["evicted_lru"] == 2 and evictor.stats()["evicted_idle"] == 1
+
+        # the application forwards the drops; spilled rows survive them
+        await app.update_persistence()
+        await store.flush()
+        restored = {}
+        await store.refresh_user_data(1, restored)
+        assert nav_get_ids(restored) == (1, None)
+        assert store.stats()["spills"] == 3
+        await store.flush()
+
+    asyncio.run(inner())
+
+
+def test_user_back_before_the_eviction_is_persisted_keeps_new_data(tmp_path):
+    from telegram.ext import ApplicationBuilder
+    from bot.eviction import IdleEvictor
+
+    async def inner():
+        store = SQLitePersistence(str(tmp_path / "state.db"))
+        app = ApplicationBuilder().token("1:test").persistence(store).build()
+        evictor = IdleEvictor(app, ttl=60, clock=lambda: 1000.0)
+        await store.refresh_user_data(1, app._user_data[1])
+        nav_set_level(app._user_data[1], "L1", 1)
+        evictor._seen[1] = (0.0, 1)
+        assert evictor.sweep() == 1
+
+        # an update arrives within the same persistence interval
+        await store.refresh_user_data(1, app._user_data[1])
+        assert nav_get_ids(app._user_data[1]) == (1, None)
+        nav_set_level(app._user_data[1], "L2", 2)
+        app._user_ids_to_be_updated_in_persistence.add(1)
+
+        # the application skips the update of a dropped user and forwards the drop
+        await app.update_persistence()
+        await store.flush()
+        reopened, restored = SQLitePersistence(str(tmp_path / "state.db")), {}
+        await reopened.refresh_user_data(1, restored)
+        await reopened.flush()
+        assert nav_get_ids(restored) == (2, None)
+
+    asyncio.run(inner())
@@ -0,0 +1,667 @@
+import asyncio
+import os
+import sqlite3
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bot.db import Database
+from bot.deeplink import decode_link, encode_link
+from bot.handlers.deep_link import current_link, open_deep_link
+from bot.handlers.subject_list import render_subject_list
+from bot.inline import (
+    NODE_KINDS,
+    InlineMessage,
+    inline_markup,
+    pack_callback,
+    resolve_callback,
+    unpack_callback,
+)
+from bot.keyboards import BACK, BACK_TO_LEVELS, generate_subjects_keyboard
+from bot.models import DeepLink, Subject
+from bot.nav_state import NavState
+from bot.render_cache import RenderCache, Screen
+from bot.screens import levels_screen
+from bot.helpers import (
+    nav_back_one,
+    nav_get,
+    nav_get_labels,
+    nav_go_levels_list,
+    nav_push_view,
+    nav_resolve_button,
+    nav_set_buttons,
+    nav_set_level,
+    nav_set_term,
+    nav_stack,
+    nav_top,
+)
+
+
+def test_button_index_resolves_only_on_the_screen_that_rendered_it():
+    user_data = {}
+    nav_go_levels_list(user_data)
+    nav_set_buttons(user_data, "level", [(1, "Level1"), (2, "Level2")])
+    assert nav_resolve_button(user_data, "Level2") == ("level", 2)
+    assert nav_resolve_button(user_data, "Unknown") is None
+
+    nav_set_level(user_data, "Level2", 2)
+    nav_push_view(user_data, "term_list")
+    # شاشة مختلفة: الفهرس القديم لا يُستخدم
+    assert nav_resolve_button(user_data, "Level1") is None
+    nav_set_buttons(user_data, "term", [(5, "Term1")])
+    assert nav_resolve_button(user_data, "Term1") == ("term", 5)
+
+
+def test_deep_link_codes_round_trip_and_reject_garbage():
+    link = DeepLink(subject_id=1234, section="lab", lecturer_id=7, year_id=36, lecture=0)
+    payload = encode_link(link)
+    assert payload == "sya-c2-l7-y10-m0"
+    assert decode_link(payload) == link
+    assert decode_link("SYA") == DeepLink(subject_id=1234)
+    for bad in ("", "x1", "c1", "s1-l2", "s1-c9", "s1-s2", "s1-c0-q1", "s1-c0-t3", "s" + "1" * 70):
+        assert decode_link(bad) is None
+
+
+class _Message:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, reply_markup=None):
+        self.replies.append(text)
+        return text
+
+
+def test_deep_link_rebuilds_the_nav_stack_in_one_update(tmp_path):
+    async def inner():
+        async with Database(str(tmp_path / "links.db")) as db:
+            await db.init_db()
+            await db.insert_level("L1")
+            await db.insert_term("T1")
+            await db.insert_subject("C1", "Subject1", 1, 1)
+            year = await db.ensure_year_id("1445")
+            lec = await db.ensure_lecturer_id("Dr A")
+            for title in ("Intro", "Kinematics"):
+                await db.insert_material(1, "theory", "lecture", title, "http://u", year_id=year, lecturer_id=lec)
+
+            context = SimpleNamespace(
+                application=SimpleNamespace(bot_data={"db": db}), user_data={}, args=[],
+            )
+            update = SimpleNamespace(message=_Message())
+            payload = encode_link(DeepLink(1, "theory", lecturer_id=lec, year_id=year, lecture=2))
+            assert await open_deep_link(update, context, payload)
+            assert [t for t, _ in nav_stack(context.user_data)] == [
+                "level", "term", "subject", "section", "lecturer_list", "lecturer",
+                "year_list", "year", "year_category_menu", "lecture_list", "lecture",
+                "lecture_category_menu",
+            ]
+            assert nav_get(context.user_data, "lecture_title") == "Kinematics"
+            assert update.message.replies == ["المحاضرة: Kinematics\nاختر نوع الملف:"]
+            assert encode_link(await current_link(context)) == payload
+
+            # unknown year: stop at the lecturer screen; unknown subject: nothing opens
+            assert await open_deep_link(update, context, "s1-c0-l1-y9")
+            assert nav_top(context.user_data) == "lecturer"
+            assert await open_deep_link(update, context, "s99") is None
+
+            # deleting an earlier title does not move the link to another lecture
+            await db.delete_materials([1])
+            assert await open_deep_link(update, context, payload)
+            assert nav_get(context.user_data, "lecture_title") == "Kinematics"
+            # and a deleted target stops at the screen above it
+            await db.insert_material(1, "theory", "lecture", "Dynamics", "http://u", year_id=year, lecturer_id=lec)
+            await db.delete_materials([2])
+            assert await open_deep_link(update, context, payload)
+            assert nav_top(context.user_data) == "year_category_menu"
+
+    asyncio.run(inner())
+
+
+def test_inline_buttons_pack_ids_and_resolve_without_lookups():
+    user_data = {}
+    nav_go_levels_list(user_data)
+    nav_set_level(user_data, "Level2", 2)
+    nav_push_view(user_data, "subject_list")
+    subjects = [Subject(id=300 + i, name=f"Subject{i}") for i in range(3)]
+    nav_set_buttons(user_data, "subject", ((s.id, s.name) for s in subjects))
+
+    markup = inline_markup(user_data, generate_subjects_keyboard(subjects))
+    buttons = [b for row in markup.inline_keyboard for b in row]
+    assert [b.text for b in buttons] == ["Subject0", "Subject1", "Subject2", BACK, BACK_TO_LEVELS]
+    assert unpack_callback(buttons[2].callback_data) == (NODE_KINDS["subject"], 302)
+    assert all(len(b.callback_data.encode()) <= 64 for b in buttons)
+    assert [resolve_callback(user_data, b.callback_data) for b in buttons] == [b.text for b in buttons]
+
+    # large ids and garbage
+    assert unpack_callback(pack_callback(NODE_KINDS["lecturer"], 2**40)) == (NODE_KINDS["lecturer"], 2**40)
+    assert resolve_callback(user_data, "not base64!") is None
+
+    # a subject button from this keyboard is stale once another screen is shown
+    nav_push_view(user_data, "term_list")
+    assert resolve_callback(user_data, buttons[0].callback_data) is None
+    assert resolve_callback(user_data, buttons[3].callback_data) == BACK
+
+
+def test_inline_message_edits_in_place_and_sends_content_separately():
+    sent, edited = [], []
+
+    class _Bot:
+        async def send_message(self, chat_id, text, reply_markup=None):
+            sent.append((text, reply_markup is not None))
+
+    async def edit_text(text, reply_markup=None):
+        edited.append(text)
+
+    context = SimpleNamespace(bot=_Bot(), user_data={})
+    keyboard = generate_subjects_keyboard([])
+
+    async def inner():
+        nav_msg = SimpleNamespace(edit_text=edit_text)
+        msg = InlineMessage(context, 1, editable=nav_msg)
+        await msg.reply_text("choose", reply_markup=keyboard)
+        assert edited == ["choose"] and sent == []
+
+        msg = InlineMessage(context, 1, editable=nav_msg)
+        await msg.reply_text("📄 file")
+        await msg.reply_text("choose again", reply_markup=keyboard)
+        assert edited == ["choose"]
+        assert sent == [("📄 file", False), ("choose again", True)]
+
+    asyncio.run(inner())
+
+
+def test_inline_screen_after_delivered_files_is_sent_below_them():
+    from bot.delivery import send_materials
+
+    posted, edited = [], []
+
+    class _Bot:
+        async def send_message(self, chat_id, text, reply_markup=None, **kwargs):
+            posted.append(text)
+
+        async def copy_messages(self, chat_id, from_chat_id, message_ids):
+            posted.append(f"copies:{len(message_ids)}")
+
+        async def send_media_group(self, chat_id, media, **kwargs):
+            posted.append(f"group:{len(media)}")
+
+    async def edit_text(text, reply_markup=None):
+        edited.append(text)
+
+    def mat(i, url=None, chat=None, message=None):
+        return SimpleNamespace(
+            title=f"exam {i}", category="exam", url=url or f"https://x.org/{i}",
+            archive_chat_id=chat, archive_message_id=message,
+        )
+
+    context = SimpleNamespace(bot=_Bot(), user_data={})
+    keyboard = generate_subjects_keyboard([])
+
+    async def deliver_then_reply(mats):
+        posted.clear()
+        edited.clear()
+        msg = InlineMessage(context, 1, editable=SimpleNamespace(edit_text=edit_text))
+        update = SimpleNamespace(message=msg, effective_chat=SimpleNamespace(id=1))
+        await send_materials(update, context, mats)
+        await msg.reply_text("menu", reply_markup=keyboard)
+
+    async def inner():
+        # archived files are copied through the bot, not the message
+        await deliver_then_reply([mat(i, chat=-1, message=i + 1) for i in range(3)])
+        assert edited == [] and posted == ["copies:3", "menu"]
+
+        await deliver_then_reply([mat(i, url=f"https://x.org/{i}.pdf") for i in range(2)])
+        assert edited == [] and posted == ["group:2", "menu"]
+
+    asyncio.run(inner())
+
+
+class _Replies:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, reply_markup=None, **kwargs):
+        self.replies.append(text)
+        return text
+
+
+def test_router_sends_text_to_the_screen_owner_and_falls_back(tmp_path, monkeypatch):
+    from bot import router
+    from bot.keyboards import TERM_MENU_SHOW_SUBJECTS
+    from bot.main import route_text
+
+    called = []
+
+    def spy(func):
+        async def wrapper(update, context, text):
+            called.append(func.__name__)
+            return await func(update, context, text)
+        return wrapper
+
+    spies = {}
+    for table in ("SCREEN_HANDLERS", "BUTTON_HANDLERS"):
+        monkeypatch.setattr(router, table, {
+            key: spies.setdefault(func, spy(func)) for key, func in getattr(router, table).items()
+        })
+    monkeypatch.setattr(router, "FALLBACK_HANDLERS", [spies.setdefault(f, spy(f)) for f in router.FALLBACK_HANDLERS])
+
+    async def inner():
+        async with Database(str(tmp_path / "router.db")) as db:
+            await db.init_db()
+            for level in ("L1", "L2"):
+                await db.insert_level(level)
+            await db.insert_term("T1")
+            await db.insert_subject("C1", "Physics", 1, 1)
+            await db.insert_subject("C2", "Chemistry", 2, 1)
+            await db.insert_material(1, "theory", "lecture", "Intro", "http://u")
+            context = SimpleNamespace(application=SimpleNamespace(bot_data={"db": db}), user_data={})
+
+            async def send(text):
+                called.clear()
+                update = SimpleNamespace(message=_Replies())
+                await route_text(update, context, text)
+                return update.message.replies
+
+            await send("📚 المستويات")
+            # each tap goes straight to the handler that owns the screen
+            for text, owner, top in (
+                ("L1", "handle_choose_level", "term_list"),
+                ("T1", "handle_choose_term", "term"),
+                (TERM_MENU_SHOW_SUBJECTS, "handle_term_menu_options", "subject_list"),
+                ("Physics", "handle_choose_subject", "subject"),
+            ):
+                assert await send(text)
+                assert called == [owner] and nav_top(context.user_data) == top
+
+            # the subject screen does not know level names: the old order takes over
+            assert await send("L2")
+            assert called[0] == "handle_choose_section" and called[-1] == "handle_choose_level"
+            assert nav_top(context.user_data) == "term_list" and nav_get(context.user_data, "level_id") == 2
+
+    asyncio.run(inner())
+
+
+def test_year_category_menu_without_a_year_shows_the_screen_above(tmp_path):
+    from bot.helpers import nav_go_subject, nav_set_section
+    from bot.router import render_state
+
+    async def inner():
+        async with Database(str(tmp_path / "year_menu.db")) as db:
+            await db.init_db()
+            await db.insert_level("L1")
+            await db.insert_term("T1")
+            await db.insert_subject("C1", "Physics", 1, 1)
+            await db.insert_material(1, "theory", "lecture", "Intro", "http://u")
+            context = SimpleNamespace(application=SimpleNamespace(bot_data={"db": db}), user_data={})
+            nav_go_subject(context.user_data, await db.get_subject_path(1))
+            nav_set_section(context.user_data, "theory", "theory")
+            # a stale stack: the year menu is on top but no year is chosen
+            nav_push_view(context.user_data, "year_category_menu")
+
+            update = SimpleNamespace(message=_Replies())
+            assert await render_state(update, context)
+            assert nav_top(context.user_data) == "section" and len(update.message.replies) == 1
+
+    asyncio.run(inner())
+
+
+def test_render_cache_lru_and_version_invalidation():
+    cache = RenderCache(maxsize=2)
+    screens = {k: Screen(k, None) for k in "abc"}
+    for k in "ab":
+        assert cache.get(k, 1) is None
+        cache.put(k, screens[k], 1)
+    assert cache.get("a", 1) is screens["a"]
+    cache.put("c", screens["c"], 1)  # evicts "b", the least recently used
+    assert cache.get("b", 1) is None and cache.get("a", 1) is screens["a"]
+    assert cache.get("a", 2) is None and len(cache) == 0
+    cache.put("a", screens["a"], 1)  # built before the change: not stored
+    assert len(cache) == 0
+    assert cache.stats()["evictions"] == 1 and cache.stats()["invalidations"] == 1
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 4
+
+
+def test_cached_screens_skip_queries_until_the_data_changes(tmp_path):
+    async def inner():
+        async with Database(str(tmp_path / "render.db")) as db:
+            await db.init_db()
+            await db.insert_level("L1")
+            await db.insert_term("T1")
+            await db.insert_subject("C1", "Subject1", 1, 1)
+
+            calls = []
+            get_subjects = db.get_subjects_by_level_and_term
+
+            async def counted(*args):
+                calls.append(args)
+                return await get_subjects(*args)
+
+            db.get_subjects_by_level_and_term = counted
+            context = SimpleNamespace(application=SimpleNamespace(bot_data={"db": db}), user_data={})
+            update = SimpleNamespace(message=_Message())
+            nav_set_level(context.user_data, "L1", 1)
+            nav_set_term(context.user_data, "T1", 1)
+            nav_push_view(context.user_data, "subject_list")
+
+            for _ in range(3):
+                await render_subject_list(update, context)
+            assert len(calls) == 1
+            assert nav_resolve_button(context.user_data, "Subject1") == ("subject", 1)
+
+            await db.insert_subject("C2", "Subject2", 1, 1)
+            await render_subject_list(update, context)
+            assert len(calls) == 2
+            assert nav_resolve_button(context.user_data, "Subject2") == ("subject", 2)
+            assert context.application.bot_data["render_cache"].stats()["hits"] == 2
+
+    asyncio.run(inner())
+
+
+def test_cached_screens_follow_writes_from_other_connections(tmp_path):
+    async def inner():
+        path = str(tmp_path / "external.db")
+        async with Database(path) as db:
+            await db.init_db()
+            await db.insert_level("L1")
+            await db.watch_external_writes(poll_interval=0.01)
+            context = SimpleNamespace(application=SimpleNamespace(bot_data={"db": db}), user_data={})
+            assert (await levels_screen(context)).buttons == ("level", ((1, "L1"),))
+
+            # e.g. seed.py --sync or import_manifest.py in another process
+            conn = sqlite3.connect(path)
+            conn.execute("INSERT INTO levels (name) VALUES ('L2')")
+            conn.commit()
+            conn.close()
+
+            for _ in range(100):
+                if db.external_changes:
+                    break
+                await asyncio.sleep(0.01)
+            assert (await levels_screen(context)).buttons == ("level", ((1, "L1"), (2, "L2")))
+
+    asyncio.run(inner())
+
+
+def test_nav_state_keeps_ids_only_and_round_trips_the_dict_form():
+    a, b = {}, {}
+    for user_data in (a, b):
+        nav_set_level(user_data, "المستوى الأول", 1)
+        nav_set_term(user_data, "الترم الأول", 2)
+        nav_push_view(user_data, "subject_list")
+    assert isinstance(a["nav"], NavState)
+    assert nav_get_labels(a) == ("المستوى الأول", "الترم الأول")
+    # labels are shared, not copied per user
+    assert nav_stack(a)[0][1] is nav_stack(b)[0][1]
+    nav_back_one(a)
+    nav_back_one(a)
+    assert nav_stack(a) == [("level", "المستوى الأول")]
+    assert nav_get(a, "term_id") is None and nav_get(a, "level_id") == 1
+
+    # a persisted (plain dict) state is converted on first use
+    nav_set_buttons(b, "subject", ((3, "Subject3"),))
+    restored = {"nav": b["nav"].to_dict()}
+    assert nav_stack(restored) == nav_stack(b)
+    assert nav_resolve_button(restored, "Subject3") == ("subject", 3)
+
+
+def test_updates_run_in_parallel_across_users_and_in_order_per_user():
+    from bot.update_processor import PerUserUpdateProcessor
+
+    async def inner():
+        processor = PerUserUpdateProcessor(2)
+        seen = []
+
+        async def handle(user_id, n):
+            await asyncio.sleep(0.01 * (3 - n))  # earlier taps are slower
+            seen.append((user_id, n))
+
+        updates = [
+            SimpleNamespace(effective_user=SimpleNamespace(id=uid), effective_chat=None)
+            for n in range(3) for uid in (1, 2, 3)
+        ]
+        await asyncio.gather(*(
+            processor.process_update(u, handle(u.effective_user.id, i // 3)) for i, u in enumerate(updates)
+        ))
+        for uid in (1, 2, 3):
+            assert [n for u, n in seen if u == uid] == [0, 1, 2]
+        stats = processor.stats()
+        assert stats["peak_in_flight"] == 2 and stats["processed"] == 9 and stats["active_users"] == 0
+
+    asyncio.run(inner())
+
+
+def test_materials_are_packed_into_few_html_messages():
+    from telegram.error import BadRequest
+
+    from bot.delivery import MESSAGE_LIMIT, pack_entries, send_materials as _send
+
+    async def send_materials(chat, mats):
+        update = SimpleNamespace(message=chat, effective_chat=SimpleNamespace(id=5))
+        return await _send(update, SimpleNamespace(bot=chat), mats)
+
+    class _Chat:
+        def __init__(self):
+            self.texts, self.groups, self.copies = [], [], []
+
+        async def copy_messages(self, chat_id, from_chat_id, message_ids):
+            self.copies.append((chat_id, from_chat_id, list(message_ids)))
+            if from_chat_id == -3:
+                raise BadRequest("Chat not found")
+
+        async def reply_text(self, text, reply_markup=None, **kwargs):
+            assert kwargs["parse_mode"] == "HTML"
+            self.texts.append(text)
+
+        async def reply_media_group(self, media, **kwargs):
+            self.groups.append(media)
+            if len(self.groups) == 2:
+                raise BadRequest("Failed to get HTTP URL content")
+
+    def mat(i, category="exam", url=None, chat=None, message=None):
+        return SimpleNamespace(
+            title=f"امتحان <{i}> & حل", category=category, url=url or f"https://x.org/{i}?a=1&b=2",
+            archive_chat_id=chat, archive_message_id=message,
+        )
+
+    async def inner():
+        chat = _Chat()
+        calls = await send_materials(chat, [mat(i) for i in range(40)])
+        assert calls == 1 and len(chat.texts) == 1
+        assert chat.texts[0].count("<a href=") == 40
+        assert "&lt;0&gt; &amp; حل" in chat.texts[0] and "?a=1&amp;b=2" in chat.texts[0]
+
+        chat = _Chat()
+        pdfs = [mat(i, url=f"https://x.org/{i}.pdf") for i in range(21)]
+        calls = await send_materials(chat, pdfs + [mat(99, url=None)])
+        # 10 + 10 in media groups (the second one rejected), the 21st and the rest as links
+        assert [len(g) for g in chat.groups] == [10, 10]
+        assert calls == 3 and chat.texts[0].count("<a href=") == 12
+
+        # archived files: one copyMessages per channel and 100 messages, ids in increasing order
+        chat = _Chat()
+        archived = [mat(i, chat=-1, message=500 - i) for i in range(150)] + [mat(900, chat=-3, message=7)]
+        calls = await send_materials(chat, archived + [mat(901)])
+        assert [(c[1], len(c[2])) for c in chat.copies] == [(-1, 100), (-1, 50), (-3, 1)]
+        assert chat.copies[0][0] == 5 and chat.copies[0][2] == sorted(chat.copies[0][2])
+        # the unreachable channel falls back to its URL, next to the unarchived material
+        assert calls == 4 and chat.texts[0].count("<a href=") == 2
+
+        # a title longer than a message is cut before escaping, so the link survives
+        chat = _Chat()
+        huge = mat(1, url="https://x.org/big")
+        huge.title = "Q&A <" * 1200
+        calls = await send_materials(chat, [huge, mat(2)])
+        assert calls == 2 and all(len(t) <= MESSAGE_LIMIT for t in chat.texts)
+        assert chat.texts[0].startswith('📄 <a href="https://x.org/big">Q&amp;A &lt;')
+        assert chat.texts[0].endswith("…</a>") and "&amp;amp;" not in chat.texts[0]
+
+    asyncio.run(inner())
+    chunks = pack_entries(["x" * 1000] * 9)
+    assert len(chunks) == 3 and all(len(c) <= MESSAGE_LIMIT for c in chunks)
+
+
+def test_rate_limiter_serves_navigation_first_and_spaces_group_messages():
+    from telegram.error import RetryAfter
+
+    from bot.rate_limiter import PriorityRateLimiter
+
+    async def inner():
+        limiter = PriorityRateLimiter(global_rate=50, group_rate=20)
+        await limiter.initialize()
+        loop = asyncio.get_running_loop()
+        done = []
+
+        async def call(name, data, fail=0):
+            async def callback():
+                nonlocal fail
+                if fail:
+                    fail -= 1
+                    raise RetryAfter(0)
+                done.append((name, loop.time()))
+                return True
+
+            return await limiter.process_request(callback, (), {}, "sendMessage", data, None)
+
+        # 60 material messages exhaust the global burst of 50; the keyboard reply jumps the queue
+        bulk = [asyncio.create_task(call(f"bulk{i}", {"chat_id": 1, "text": "x"})) for i in range(60)]
+        await asyncio.sleep(0.005)
+        await call("menu", {"chat_id": 2, "text": "x", "reply_markup": object()})
+        await asyncio.gather(*bulk)
+        names = [name for name, _t in done]
+        assert names.index("menu") == 50 and names[:50] == [f"bulk{i}" for i in range(50)]
+
+        # group chats get one message per 1/group_rate seconds; a RetryAfter is retried
+        done.clear()
+        await asyncio.gather(*(call(f"group{i}", {"chat_id": -5}, fail=i == 0) for i in range(3)))
+        stamps = [t for _name, t in done]
+        assert all(b - a >= 0.045 for a, b in zip(stamps, stamps[1:]))
+        stats = limiter.stats()
+        assert stats["retries"] == 1 and stats["granted"]["interactive"] == 1 and stats["queue_depth"] == 0
+        await limiter.shutdown()
+
+    asyncio.run(inner())
+
+
+def test_inline_search_pages_results_and_caches_each_query(tmp_path):
+    from telegram import InlineQueryResultArticle, InlineQueryResultDocument
+
+    from bot.handlers import handle_inline_query
+    from bot.handlers.inline_query import PAGE_SIZE
+    from bot.render_cache import QueryCache
+
+    class _Query:
+        def __init__(self, query, offset=""):
+            self.query, self.offset, self.answers = query, offset, []
+
+        async def answer(self, results, cache_time=None, next_offset=None):
+            self.answers.append((list(results), cache_time, next_offset))
+
+    async def inner():
+        async with Database(str(tmp_path / "inline.db")) as db:
+            await db.init_db()
+            await db.insert_level("L1")
+            await db.insert_term("T1")
+            await db.insert_subject("EE101", "دوائر كهربائية", 1, 1)
+            for i in range(PAGE_SIZE + 5):
+                await db.insert_material(1, "theory", "lecture", f"محاضرة {i}", f"https://x.org/{i}.pdf" if i % 2 else None)
+            clock = [0.0]
+            cache = QueryCache(ttl=60, clock=lambda: clock[0])
+            bot_data = {"db": db, "inline_cache": cache}
+            context = SimpleNamespace(application=SimpleNamespace(bot_data=bot_data), bot=SimpleNamespace(username="arch_bot"))
+
+            async def ask(text, offset=""):
+                query = _Query(text, offset)
+                await handle_inline_query(SimpleNamespace(inline_query=query), context)
+                return query.answers[0]
+
+            results, cache_time, next_offset = await ask("دوائر")
+            assert len(results) == PAGE_SIZE and cache_time == 60 and next_offset == str(PAGE_SIZE)
+            assert {type(r) for r in results} == {InlineQueryResultArticle, InlineQueryResultDocument}
+            assert "start=s1-c0" in results[0].reply_markup.inline_keyboard[0][0].url
+            results, _, next_offset = await ask("دوائر", next_offset)
+            assert len(results) == 5 and next_offset == ""
+
+            # same normalised query: served from the cache until the TTL runs out
+            await ask(" دَوائر ")
+            assert cache.hits == 1 and cache.misses == 2
+            clock[0] = 61
+            await ask("دوائر")
+            assert cache.expired == 1 and cache.misses == 3
+
+    asyncio.run(inner())
+
+
+def test_webhook_settings_are_checked_when_the_config_loads():
+    import subprocess
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    probe = (
+        "from bot import config as c;"
+        "print(c.UPDATE_MODE, c.WEBHOOK_URL, c.WEBHOOK_PATH, c.WEBHOOK_SECRET, c.WEBHOOK_MAX_CONNECTIONS)"
+    )
+
+    def load(**env):
+        env = {k: v for k, v in os.environ.items() if not k.startswith(("WEBHOOK_", "UPDATE_MODE"))} | env
+        return subprocess.run([sys.executable, "-c", probe], cwd=root, env=env, capture_output=True, text=True)
+
+    done = load(UPDATE_MODE="webhook", WEBHOOK_URL="https://bot.example.com/", WEBHOOK_PATH="/hook/",
+                WEBHOOK_SECRET="s3cret", WEBHOOK_MAX_CONNECTIONS="7")
+    assert done.returncode == 0, done.stderr
+    assert done.stdout.split() == ["webhook", "https://bot.example.com", "hook", "s3cret", "7"]
+
+    # path and secret are generated when not set; the connection limit defaults to 40
+    first, second = (load(UPDATE_MODE="webhook", WEBHOOK_URL="https://b").stdout.split() for _ in range(2))
+    assert first[2] != second[2] and first[3] != second[3] and first[4] == "40"
+
+    assert "WEBHOOK_URL is required" in load(UPDATE_MODE="webhook").stderr
+    for bad in ("0", "101"):
+        assert "between 1 and 100" in load(WEBHOOK_MAX_CONNECTIONS=bad).stderr
+    assert load(UPDATE_MODE="push").returncode != 0
+
+
+def test_fake_bot_api_pushes_updates_to_the_webhook():
+    import socket
+
+    import httpx
+    from telegram.ext import ApplicationBuilder, MessageHandler, filters
+
+    from scripts.fake_bot_api import FakeBotAPI
+
+    async def echo(update, context):
+        await update.message.reply_text(f"echo: {update.message.text}")
+
+    async def inner():
+        api = FakeBotAPI()
+        server = await api.serve("127.0.0.1", 0)
+        api_port = server.sockets[0].getsockname()[1]
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        app = ApplicationBuilder().token("1:test").base_url(f"http://127.0.0.1:{api_port}/bot").build()
+        app.add_handler(MessageHandler(filters.TEXT, echo))
+        async with server, app:
+            await app.start()
+            await app.updater.start_webhook(
+                listen="127.0.0.1", port=port, url_path="hook",
+                webhook_url=f"http://127.0.0.1:{port}/hook", secret_token="s3cret", max_connections=7,
+            )
+            try:
+                await asyncio.wait_for(api.webhook_set.wait(), 5)
+                assert api.webhook_url == f"http://127.0.0.1:{port}/hook"
+                assert api.secret_token == "s3cret" and api.max_connections == 7
+
+                async with httpx.AsyncClient(timeout=5) as client:
+                    first, last = await api.tap(client, 1000, "hello", settle=0.05, timeout=5)
+                    assert 0 < first <= last
+                    assert api.calls["sendMessage"] == 1
+
+                    # PTB rejects updates without the secret header
+                    response = await client.post(api.webhook_url, json=api.message_update(1000, "hi"))
+                    assert response.status_code == 403
+            finally:
+                await app.updater.stop()
+                await app.stop()
+                await api.close_connections()
+
+    asyncio.run(inner())